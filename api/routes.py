@@ -1,20 +1,40 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import ValidationError
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from typing import List, Optional
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from typing import AsyncIterator, List, Optional
+import asyncio
+import hashlib
+import io
+import json
 import os
-import tempfile
+import secrets
 from datetime import datetime
+from urllib.parse import quote
 
-from models.mcq_models import MCQRequest, DocumentMCQRequest, MCQSource
+from models.mcq_models import MCQ, MCQRequest, DocumentMCQRequest, MCQSource, BulkExportRequest
+from models.job_models import JobStatus
+from models.document_models import ExtractionRecord
+from models.delivery_models import Delivery, DeliveryStatus, BulkEmailRequest
 from core.mcq_generator import MCQGenerator
 from core.document_processor import DocumentProcessor
 from core.vector_store import VectorStore
 from core.external_apis import ExternalAPIs
+from core.context_fusion import ContextFusion
 from core.email_sender import EmailSender
 from core.google_drive import GoogleDriveUploader
+from core.job_queue import JobQueue
+from core.generation_cache import GenerationCache
+from core.question_bank import QuestionBank
+from core.extraction_cache import ExtractionCache
+from core.bulk_export import BulkExporter
+from core.artifact_store import ArtifactStore
+from core.delivery_queue import DeliveryQueue
 from utils.pdf_generator import PDFGenerator
+from config.settings import settings
 from utils.logger import logger
+from utils.concurrency import run_blocking, shutdown_executor
+from utils.upload_stream import UploadTooLarge, receive_upload
 
 app = FastAPI(title="MCQ AI Agent", version="1.0.0")
 
@@ -26,98 +46,330 @@ mcq_generator = MCQGenerator()
 document_processor = DocumentProcessor()
 vector_store = VectorStore()
 external_apis = ExternalAPIs()
+context_fusion = ContextFusion(external_apis, vector_store)
 email_sender = EmailSender()
 drive_uploader = GoogleDriveUploader()
+job_queue = JobQueue(settings.JOB_DB_PATH, workers=settings.JOB_WORKERS)
+delivery_queue = DeliveryQueue(
+    settings.DELIVERY_DB_PATH,
+    workers=settings.DELIVERY_WORKERS,
+    max_attempts=settings.DELIVERY_MAX_ATTEMPTS,
+    backoff_base=settings.DELIVERY_BACKOFF_BASE,
+    backoff_max=settings.DELIVERY_BACKOFF_MAX
+)
+generation_cache = GenerationCache(
+    max_items=settings.GENERATION_CACHE_ITEMS,
+    ttl_seconds=settings.GENERATION_CACHE_TTL,
+    similarity_threshold=settings.GENERATION_CACHE_SIMILARITY if settings.GENERATION_CACHE_SEMANTIC else None
+)
+extraction_cache = ExtractionCache(settings.EXTRACTION_CACHE_PATH, max_bytes=settings.EXTRACTION_CACHE_MAX_BYTES)
+artifact_store = ArtifactStore(max_bytes=settings.ARTIFACT_STORE_MAX_BYTES, ttl_seconds=settings.ARTIFACT_TTL)
+question_bank = QuestionBank(
+    settings.QUESTION_BANK_PATH,
+    duplicate_similarity=settings.QUESTION_BANK_DUPLICATE_SIMILARITY
+)
+
+# Scopes with a bank top-up in flight, and references that keep background tasks alive
+_bank_top_ups = set()
+_background_tasks = set()
+
+# Allowance for multipart boundaries and form fields when checking Content-Length
+_MULTIPART_OVERHEAD = 64 * 1024
+
+os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+
+@app.on_event("startup")
+async def startup():
+    # Load the tokenizer up front so the first prompt does not pay for it on the event loop
+    await run_blocking(mcq_generator.prompt_builder.load_tokenizer)
+    await delivery_queue.start()
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_queue.stop()
+    await delivery_queue.stop()
+    await external_apis.close()
+    shutdown_executor()
 
 @app.get("/")
 async def serve_index():
     return FileResponse("frontend/index.html")
 
-@app.post("/generate-domain-mcq")
-async def generate_domain_mcq(request: MCQRequest):
-    """Generate MCQs for a specific domain"""
+async def _fetch_source_content(request: MCQRequest) -> Optional[str]:
+    """Get context for the request's source, or None when generating from the model alone"""
+    if request.source == MCQSource.SERP_API:
+        return await external_apis.search_serp_api(request.domain)
+    if request.source == MCQSource.WIKIPEDIA:
+        return await external_apis.search_wikipedia(request.domain)
+    if request.source == MCQSource.WEB_AND_WIKIPEDIA:
+        return await external_apis.search_all(request.domain)
+    if request.source == MCQSource.ALL_SOURCES:
+        return await context_fusion.gather(request.domain)
+    return None
+
+async def _generate_for_request(request: MCQRequest, count: int) -> List[MCQ]:
+    """Fetch context for the request's source and generate MCQs from it"""
+    content = await _fetch_source_content(request)
+    
+    # Generate MCQs
+    if content:
+        return await mcq_generator.generate_mcqs_from_context(
+            content, count, request.difficulty, request.custom_prompt
+        )
+    return await mcq_generator.generate_mcqs_from_domain(
+        request.domain, count, request.difficulty
+    )
+
+async def _add_to_question_bank(mcqs: List[MCQ], domain: str, difficulty: str, source: str):
+    """Embed questions and store them in the question bank"""
     try:
-        # Get content based on source
-        if request.source == MCQSource.SERP_API:
-            content = external_apis.search_serp_api(request.domain)
-        elif request.source == MCQSource.WIKIPEDIA:
-            content = external_apis.search_wikipedia(request.domain)
-        else:
-            content = None
+        embeddings = await vector_store.embed_texts([mcq.question for mcq in mcqs])
+        await run_blocking(question_bank.add, mcqs, domain, difficulty, source, embeddings)
+    except Exception as e:
+        logger.error(f"Error adding questions to bank: {e}")
+
+def _schedule_bank_top_up(request: MCQRequest):
+    """Refill the question bank in the background once a domain runs low"""
+    scope = (request.domain.strip().lower(), request.difficulty.value, request.source.value)
+    if scope in _bank_top_ups:
+        return
+    _bank_top_ups.add(scope)
+    
+    async def top_up():
+        try:
+            size = await run_blocking(question_bank.size, request.domain, request.difficulty, request.source)
+            if size >= settings.QUESTION_BANK_LOW_WATER:
+                return
+            
+            logger.info(f"Topping up question bank for {request.domain} ({size} questions)")
+            mcqs = await _generate_for_request(request, settings.QUESTION_BANK_TOP_UP_COUNT)
+            await _add_to_question_bank(mcqs, request.domain, request.difficulty, request.source)
+        except Exception as e:
+            logger.error(f"Question bank top-up failed for {request.domain}: {e}")
+        finally:
+            _bank_top_ups.discard(scope)
+    
+    task = asyncio.create_task(top_up())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def _lookup_domain_mcqs(request: MCQRequest):
+    """Find stored MCQs for a domain request in the question bank or generation cache
+    
+    Returns the MCQs (or None) and the domain embedding used for semantic caching.
+    """
+    # Custom prompts change what a question looks like, so they bypass the bank
+    if not request.custom_prompt and not request.force_refresh:
+        mcqs = await run_blocking(
+            question_bank.sample, request.domain, request.difficulty, request.source, request.count
+        )
+        if mcqs is not None:
+            logger.info(f"Serving {len(mcqs)} MCQs for {request.domain} from question bank")
+            _schedule_bank_top_up(request)
+            return mcqs, None
+    
+    domain_embedding = None
+    if settings.GENERATION_CACHE_SEMANTIC:
+        try:
+            domain_embedding = (await vector_store.embed_texts([request.domain]))[0]
+        except Exception as e:
+            # Exact-match caching and generation still work without it
+            logger.warning(f"Could not embed {request.domain} for the generation cache: {e}")
+    
+    if not request.force_refresh:
+        mcqs = generation_cache.lookup(request.count, embedding=domain_embedding, **_cache_request(request))
+        if mcqs is not None:
+            logger.info(f"Serving {len(mcqs)} cached MCQs for {request.domain}")
+            return mcqs, domain_embedding
+    
+    return None, domain_embedding
+
+async def _remember_domain_mcqs(request: MCQRequest, mcqs: List[MCQ], domain_embedding: List[float] = None):
+    """Store freshly generated domain MCQs in the generation cache and question bank"""
+    generation_cache.store(mcqs, embedding=domain_embedding, **_cache_request(request))
+    if not request.custom_prompt:
+        await _add_to_question_bank(mcqs, request.domain, request.difficulty, request.source)
+
+def _cache_request(request: MCQRequest) -> dict:
+    return {
+        "domain": request.domain,
+        "difficulty": request.difficulty,
+        "source": request.source,
+        "custom_prompt": request.custom_prompt
+    }
+
+async def _deliver_to_drive(delivery: Delivery, data: bytes) -> Optional[str]:
+    return await run_blocking(drive_uploader.upload_bytes, data, delivery.artifact_name, idempotency_key=delivery.id)
+
+async def _deliver_email(delivery: Delivery, data: bytes) -> bool:
+    return await run_blocking(email_sender.send_mcq_pdf_bytes, delivery.target, data)
+
+delivery_queue.register("drive", _deliver_to_drive)
+delivery_queue.register("email", _deliver_email)
+
+async def _publish_pdf(mcqs: List[MCQ], pdf_filename: str, title: str, email: Optional[str]) -> dict:
+    """Render the PDF once in memory, keep it for download and queue its deliveries
+    
+    The Google Drive upload and email are handed to the delivery workers,
+    so the response does not wait on either.
+    """
+    pdf_data = await run_blocking(PDFGenerator.render_mcq_pdf, mcqs, title)
+    artifact_store.put(pdf_filename, pdf_data)
+    logger.info(f"PDF generated: {pdf_filename} ({len(pdf_data)} bytes)")
+    
+    await delivery_queue.submit(pdf_filename, pdf_data, "drive")
+    email_queued = bool(email and email.strip())
+    if email_queued:
+        await delivery_queue.submit(pdf_filename, pdf_data, "email", email.strip())
+    
+    return {
+        "pdf_filename": pdf_filename,
+        "pdf_url": f"/download-pdf/{pdf_filename}",
+        "delivery_url": f"/deliveries/{pdf_filename}",
+        "email_queued": email_queued
+    }
+
+async def _publish_domain_mcqs(request: MCQRequest, mcqs: List[MCQ]) -> dict:
+    """Build the PDF, upload it and email it, returning the response payload"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    pdf_filename = f"mcq_{request.domain}_{timestamp}.pdf"
+    delivery = await _publish_pdf(mcqs, pdf_filename, f"MCQ Assessment - {request.domain}", request.email)
+    
+    return {
+        "success": True,
+        "mcq_count": len(mcqs),
+        "mcqs": [mcq.model_dump(mode="json") for mcq in mcqs],
+        **delivery,
+        "message": "MCQs generated successfully"
+    }
+
+async def _run_domain_job(payload: dict) -> dict:
+    """Run the domain MCQ pipeline for a queued job"""
+    request = MCQRequest(**payload)
+    
+    mcqs, domain_embedding = await _lookup_domain_mcqs(request)
+    if mcqs is None:
+        mcqs = await _generate_for_request(request, request.count)
+        await _remember_domain_mcqs(request, mcqs, domain_embedding)
+    
+    return await _publish_domain_mcqs(request, mcqs)
+
+async def _stream_domain_events(request: MCQRequest) -> AsyncIterator[str]:
+    """Server-Sent Events for a domain request: one "mcq" event per question, then "complete" """
+    try:
+        mcqs, domain_embedding = await _lookup_domain_mcqs(request)
         
-        # Generate MCQs
-        if content:
-            mcqs = mcq_generator.generate_mcqs_from_context(
-                content, request.count, request.difficulty, request.custom_prompt
-            )
+        if mcqs is not None:
+            for mcq in mcqs:
+                yield _sse_event("mcq", mcq.model_dump(mode="json"))
         else:
-            mcqs = mcq_generator.generate_mcqs_from_domain(
-                request.domain, request.count, request.difficulty
-            )
-        
-        # Generate PDF
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        pdf_filename = f"mcq_{request.domain}_{timestamp}.pdf"
-        pdf_path = os.path.join(tempfile.gettempdir(), pdf_filename)
+            content = await _fetch_source_content(request)
+            if content:
+                stream = mcq_generator.stream_mcqs_from_context(
+                    content, request.count, request.difficulty, request.custom_prompt
+                )
+            else:
+                stream = mcq_generator.stream_mcqs_from_domain(request.domain, request.count, request.difficulty)
+            
+            mcqs = []
+            async for mcq in stream:
+                mcqs.append(mcq)
+                yield _sse_event("mcq", mcq.model_dump(mode="json"))
+            
+            if not mcqs:
+                raise ValueError("No MCQs could be generated")
+            
+            await _remember_domain_mcqs(request, mcqs, domain_embedding)
         
-        PDFGenerator.generate_mcq_pdf(mcqs, pdf_path, f"MCQ Assessment - {request.domain}")
-        
-        # Upload to Google Drive
-        drive_file_id = drive_uploader.upload_file(pdf_path, pdf_filename)
-        
-        # Send email if requested
-        if request.email:
-            email_sender.send_mcq_pdf(request.email, pdf_path)
-        
-        return {
-            "success": True,
-            "mcq_count": len(mcqs),
-            "pdf_path": pdf_path,
-            "drive_file_id": drive_file_id,
-            "message": "MCQs generated successfully"
-        }
+        yield _sse_event("complete", await _publish_domain_mcqs(request, mcqs))
         
     except Exception as e:
-        logger.error(f"Error generating domain MCQs: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error streaming domain MCQs: {e}")
+        yield _sse_event("error", {"detail": str(e)})
 
-@app.post("/upload-document-mcq")
-async def upload_document_mcq(
-    file: UploadFile = File(...),
-    count: int = Form(10),
-    difficulty: str = Form("medium"),
-    email: Optional[str] = Form(None),
-    custom_prompt: Optional[str] = Form(None)
-):
-    """Generate MCQs from uploaded document"""
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _run_document_job(payload: dict) -> dict:
+    """Run the document MCQ pipeline for a queued job"""
+    file_path = payload["file_path"]
+    filename = payload["filename"]
+    count = payload["count"]
+    difficulty = payload["difficulty"]
+    email = payload.get("email")
+    custom_prompt = payload.get("custom_prompt")
+    force_refresh = payload.get("force_refresh", False)
+    file_hash = payload.get("file_hash")
+    
     try:
-        logger.info(f"Processing document upload with email: {email}")
-        
-        # Validate email if provided
-        if email and email.strip() == "":
-            email = None
-        
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file.filename.split('.')[-1]}") as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
-        
-        logger.info(f"Temporary file created: {tmp_file_path}")
+        # A file seen before skips extraction, embedding and upsert
+        record = await run_blocking(extraction_cache.get, file_hash) if file_hash else None
         
-        # Extract text
-        text = document_processor.extract_text_from_file(tmp_file_path)
+        if record:
+            logger.info(f"Reusing cached extraction of {filename} ({len(record.chunk_ids)} chunks)")
+            document = record.document
+            text = document.text
+            spans = record.chunk_spans
+            chunks = [text[start:end] for start, end in spans]
+            chunk_pages = [document.page_for_offset(start) for start, _ in spans]
+        else:
+            # Extract text with page offsets, chunking pages as they come out of extraction
+            extracted = await run_blocking(document_processor.extract_and_chunk, file_path)
+            document, spans = extracted if extracted else (None, [])
+            text = document.text if document else ""
+            
+            if not text or text.strip() == "":
+                raise ValueError("No text could be extracted from the uploaded document")
+            
+            logger.info(f"Extracted text length: {len(text)} characters")
+            
+            # Add the chunks of the whole document to the vector store
+            chunks = [text[start:end] for start, end in spans]
+            chunk_pages = [document.page_for_offset(start) for start, _ in spans]
+            logger.info(f"Split document into {len(chunks)} chunks")
+            
+            chunk_ids = await vector_store.add_documents(
+                chunks,
+                [{"filename": filename, "chunk_index": i, "page": page} for i, page in enumerate(chunk_pages)]
+            )
+            
+            # Only cache documents whose chunks actually reached the vector store
+            if file_hash and chunk_ids:
+                await run_blocking(
+                    extraction_cache.put,
+                    file_hash,
+                    ExtractionRecord(document=document, chunk_spans=spans, chunk_ids=chunk_ids)
+                )
         
-        if not text or text.strip() == "":
-            raise ValueError("No text could be extracted from the uploaded document")
+        # Generate MCQs from chunks spread across the document
+        cache_request = {
+            "domain": "",
+            "difficulty": difficulty,
+            "source": "document",
+            "custom_prompt": custom_prompt,
+            "context": text
+        }
         
-        logger.info(f"Extracted text length: {len(text)} characters")
+        bank_source = f"document:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+        use_bank = not custom_prompt
         
-        # Add to vector store
-        vector_store.add_document(text, {"filename": file.filename})
+        mcqs = None
+        if not force_refresh:
+            if use_bank:
+                mcqs = await run_blocking(question_bank.sample, "", difficulty, bank_source, count)
+            if mcqs is None:
+                mcqs = generation_cache.lookup(count, **cache_request)
         
-        # Generate MCQs
-        mcqs = mcq_generator.generate_mcqs_from_context(text, count, difficulty, custom_prompt)
+        if mcqs is None:
+            mcqs = await mcq_generator.generate_mcqs_from_chunks(
+                chunks, count, difficulty, custom_prompt, chunk_pages=chunk_pages
+            )
+            generation_cache.store(mcqs, **cache_request)
+            if use_bank:
+                await _add_to_question_bank(mcqs, "", difficulty, bank_source)
+        else:
+            logger.info(f"Serving {len(mcqs)} stored MCQs for {filename}")
         
         if not mcqs:
             raise ValueError("No MCQs could be generated from the document")
@@ -126,65 +378,292 @@ async def upload_document_mcq(
         
         # Generate PDF
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_filename = "".join(c for c in file.filename if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        safe_filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_')).rstrip()
         pdf_filename = f"mcq_{safe_filename}_{timestamp}.pdf"
-        pdf_path = os.path.join(tempfile.gettempdir(), pdf_filename)
+        delivery = await _publish_pdf(mcqs, pdf_filename, f"MCQ Assessment - {filename}", email)
+        _remove_upload(file_path)
+        
+        return {
+            "success": True,
+            "mcq_count": len(mcqs),
+            "mcqs": [mcq.model_dump(mode="json") for mcq in mcqs],
+            **delivery,
+            "message": "MCQs generated from document successfully"
+        }
+    
+    except Exception:
+        # A job cancelled by shutdown keeps its upload so it can run again after a restart
+        _remove_upload(file_path)
+        raise
+
+def _remove_upload(file_path: str):
+    try:
+        os.unlink(file_path)
+        logger.info("Uploaded file cleaned up")
+    except Exception as cleanup_error:
+        logger.warning(f"Failed to cleanup uploaded file: {cleanup_error}")
+
+async def _run_bulk_export_job(payload: dict) -> dict:
+    """Render shuffled exam variants and their answer keys into one ZIP"""
+    request = BulkExportRequest(**payload)
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    zip_filename = f"mcq_variants_{request.seed}_{timestamp}.zip"
+    
+    # Kept in the artifact store so exports expire instead of piling up on disk
+    buffer = io.BytesIO()
+    variants = await BulkExporter.export_zip(request.mcqs, request.variants, request.title, request.seed, buffer)
+    artifact_store.put(zip_filename, buffer.getvalue(), media_type="application/zip")
+    
+    return {
+        "success": True,
+        "variants": variants,
+        "seed": request.seed,
+        "zip_url": f"/download-export/{zip_filename}",
+        "message": "Exam variants exported successfully"
+    }
+
+job_queue.register("domain", _run_domain_job)
+job_queue.register("document", _run_document_job)
+job_queue.register("bulk_export", _run_bulk_export_job)
+
+@app.post("/generate-domain-mcq")
+async def generate_domain_mcq(request: MCQRequest):
+    """Queue MCQ generation for a specific domain"""
+    try:
+        job_id = await job_queue.submit("domain", request.model_dump(mode="json"))
         
-        PDFGenerator.generate_mcq_pdf(mcqs, pdf_path, f"MCQ Assessment - {file.filename}")
+        return {
+            "success": True,
+            "job_id": job_id,
+            "status": JobStatus.QUEUED,
+            "message": "MCQ generation queued"
+        }
         
-        logger.info(f"PDF generated: {pdf_path}")
+    except Exception as e:
+        logger.error(f"Error queuing domain MCQs: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/generate-domain-mcq/stream")
+async def stream_domain_mcq(request: MCQRequest):
+    """Stream MCQs for a specific domain as Server-Sent Events while they are generated"""
+    return StreamingResponse(
+        _stream_domain_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/upload-document-mcq")
+async def upload_document_mcq(request: Request):
+    """Queue MCQ generation from an uploaded document
+    
+    The multipart body is parsed as it streams in rather than by FastAPI's
+    form handling, which would receive and spool the whole body before the
+    size limit could be checked.
+    """
+    try:
+        upload = await receive_upload(
+            request,
+            settings.UPLOAD_DIR,
+            max_bytes=settings.UPLOAD_MAX_BYTES,
+            field_overhead=_MULTIPART_OVERHEAD,
+            chunk_size=settings.UPLOAD_CHUNK_SIZE
+        )
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Uploaded file is too large")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if upload.path is None:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    
+    try:
+        fields = {name: value for name, value in upload.fields.items() if value.strip()}
+        options = DocumentMCQRequest(**{"count": 10, "difficulty": "medium", **fields})
+    except ValidationError as e:
+        _remove_upload(upload.path)
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    
+    try:
+        logger.info(f"Processing document upload with email: {options.email}")
+        logger.info(f"Uploaded file saved: {upload.path}")
         
-        # Upload to Google Drive
-        try:
-            drive_file_id = drive_uploader.upload_file(pdf_path, pdf_filename)
-            logger.info(f"File uploaded to Google Drive: {drive_file_id}")
-        except Exception as drive_error:
-            logger.error(f"Google Drive upload failed: {drive_error}")
-            drive_file_id = None
-        
-        # Send email if requested
-        email_sent = False
-        if email and email.strip():
-            try:
-                logger.info(f"Attempting to send email to: {email}")
-                email_sender.send_mcq_pdf(email.strip(), pdf_path)
-                email_sent = True
-                logger.info("Email sent successfully")
-            except Exception as email_error:
-                logger.error(f"Email sending failed: {email_error}")
-                # Don't raise exception, just log the error
-        
-        # Cleanup temporary file
-        try:
-            os.unlink(tmp_file_path)
-            logger.info("Temporary file cleaned up")
-        except Exception as cleanup_error:
-            logger.warning(f"Failed to cleanup temporary file: {cleanup_error}")
+        job_id = await job_queue.submit("document", {
+            "file_path": upload.path,
+            "file_hash": upload.sha256,
+            "filename": upload.filename,
+            **options.model_dump(mode="json")
+        })
         
         return {
             "success": True,
-            "mcq_count": len(mcqs),
-            "pdf_path": pdf_path,
-            "drive_file_id": drive_file_id,
-            "email_sent": email_sent,
-            "message": "MCQs generated from document successfully"
+            "job_id": job_id,
+            "status": JobStatus.QUEUED,
+            "message": "Document MCQ generation queued"
         }
         
     except Exception as e:
-        logger.error(f"Error processing document: {e}")
-        # Cleanup temporary file in case of error
-        try:
-            if 'tmp_file_path' in locals():
-                os.unlink(tmp_file_path)
-        except:
-            pass
+        logger.error(f"Error queuing document: {e}")
+        # Cleanup uploaded file in case of error
+        _remove_upload(upload.path)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/bulk-export")
+async def bulk_export(request: BulkExportRequest):
+    """Queue rendering of shuffled per-student exam variants"""
+    if not request.mcqs:
+        raise HTTPException(status_code=400, detail="No MCQs to export")
+    if not 1 <= request.variants <= settings.BULK_EXPORT_MAX_VARIANTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"variants must be between 1 and {settings.BULK_EXPORT_MAX_VARIANTS}"
+        )
+    
+    try:
+        # Fix the seed up front so the export can be reproduced from the job payload
+        if request.seed is None:
+            request.seed = secrets.randbelow(2 ** 31)
+        
+        job_id = await job_queue.submit("bulk_export", request.model_dump(mode="json"))
+        
+        return {
+            "success": True,
+            "job_id": job_id,
+            "seed": request.seed,
+            "status": JobStatus.QUEUED,
+            "message": "Exam variant export queued"
+        }
+        
+    except Exception as e:
+        logger.error(f"Error queuing bulk export: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status of a queued job, including its result once completed"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Get the result of a completed job"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}")
+    
+    return job.result
+
+@app.post("/bulk-email")
+async def bulk_email(request: BulkEmailRequest):
+    """Email a generated PDF to a whole class, returning the result for each recipient"""
+    artifact = artifact_store.get(request.pdf_filename)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not request.recipients:
+        raise HTTPException(status_code=400, detail="No recipients given")
+    
+    try:
+        results = await email_sender.send_bulk_mcq_pdf(
+            [(recipient.email, recipient.name) for recipient in request.recipients],
+            artifact[0],
+            request.subject
+        )
+        
+        return {
+            "success": all(results.values()),
+            "sent": sum(results.values()),
+            "failed": len(results) - sum(results.values()),
+            "results": results
+        }
+        
+    except Exception as e:
+        logger.error(f"Error sending bulk email: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/deliveries/dead-letter")
+async def get_dead_letters():
+    """Deliveries that ran out of retries"""
+    return {"deliveries": [delivery.model_dump(mode="json") for delivery in (await delivery_queue.dead_letters())]}
+
+@app.post("/deliveries/retry/{delivery_id}")
+async def retry_delivery(delivery_id: str):
+    """Requeue a dead-lettered delivery"""
+    if not await delivery_queue.retry(delivery_id):
+        raise HTTPException(status_code=404, detail="Dead-lettered delivery not found")
+    return {"success": True, "delivery_id": delivery_id}
+
+@app.get("/deliveries/{artifact_name}")
+async def get_deliveries(artifact_name: str):
+    """Drive upload and email status for a generated PDF"""
+    deliveries = await delivery_queue.for_artifact(artifact_name)
+    if not deliveries:
+        raise HTTPException(status_code=404, detail="No deliveries found")
+    
+    drive = next((delivery for delivery in deliveries if delivery.channel == "drive"), None)
+    return {
+        "artifact_name": artifact_name,
+        "drive_file_id": drive.result if drive and drive.status == DeliveryStatus.DELIVERED else None,
+        "deliveries": [delivery.model_dump(mode="json") for delivery in deliveries]
+    }
+
+@app.get("/model-stats")
+async def model_stats():
+    """Recent latency, error rate and load of each model tier"""
+    return mcq_generator.router.stats()
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """Hit and miss counters for the server-side caches"""
+    return {
+        # Both count rows in SQLite
+        "embedding_cache": await run_blocking(vector_store.embedding_cache.stats),
+        "extraction_cache": await run_blocking(extraction_cache.stats),
+        "artifact_store": artifact_store.stats(),
+        "context_cache": external_apis.cache.stats(),
+        "generation_cache": generation_cache.stats()
+    }
+
 @app.get("/download-pdf/{filename}")
 async def download_pdf(filename: str):
     """Download generated PDF"""
-    pdf_path = os.path.join(tempfile.gettempdir(), filename)
-    if os.path.exists(pdf_path):
-        return FileResponse(pdf_path, filename=filename)
-    else:
-        raise HTTPException(status_code=404, detail="File not found")
\ No newline at end of file
+    artifact = artifact_store.get(filename)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    data, media_type = artifact
+    return Response(
+        content=data,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"}
+    )
+
+@app.get("/download-export/{filename}")
+async def download_export(filename: str):
+    """Download a ZIP of exam variants"""
+    artifact = artifact_store.get(filename)
+    if artifact is None or artifact[1] != "application/zip":
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    data, media_type = artifact
+    return Response(
+        content=data,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"}
+    )
\ No newline at end of file
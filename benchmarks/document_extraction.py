@@ -0,0 +1,71 @@
+"""Extraction time for a generated PDF, page by page in-process versus across the process pool
+
+    python -m benchmarks.document_extraction [--pages 500] [--workers 4] [--repeat 3]
+
+Each run also reports time to the first chunk, which extract_and_chunk
+can cut while later page ranges are still being extracted. The pool only
+helps with more than one core.
+"""
+import argparse
+import os
+import tempfile
+import time
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from config.settings import settings
+from core.document_processor import DocumentProcessor, _SpanChunker
+from utils.concurrency import get_process_pool, shutdown_executor
+
+SENTENCE = "The mitochondria converts nutrients into adenosine triphosphate through oxidative phosphorylation. "
+
+def make_pdf(path: str, pages: int):
+    pdf = canvas.Canvas(path, pagesize=A4)
+    for page in range(pages):
+        text = pdf.beginText(40, 800)
+        for line in range(60):
+            text.textLine(f"{page + 1}.{line + 1} {SENTENCE}")
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+
+def run(path: str, parallel: bool) -> tuple:
+    settings.PDF_PARALLEL_MIN_PAGES = 1 if parallel else 10 ** 9
+    started = time.perf_counter()
+    first_chunk = None
+    
+    chunker = _SpanChunker()
+    offset = 0
+    for _, page_text in DocumentProcessor.iter_pages(path):
+        chunker.feed(page_text, offset)
+        offset += len(page_text) + 1
+        if first_chunk is None and chunker.spans:
+            first_chunk = time.perf_counter() - started
+    chunks = chunker.finish()
+    
+    return time.perf_counter() - started, first_chunk, len(chunks)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    settings.PROCESS_POOL_SIZE = args.workers
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.pdf")
+        make_pdf(path, args.pages)
+        # Start the workers outside the timed runs
+        list(get_process_pool().map(abs, range(args.workers)))
+        
+        print(f"{args.pages} pages, {args.workers} workers, {os.cpu_count()} cores")
+        for parallel in (False, True):
+            best = min(run(path, parallel) for _ in range(args.repeat))
+            label = "process pool" if parallel else "in-process"
+            print(f"{label:>13}: {best[0]:.2f}s total, first chunk after {best[1]:.3f}s, {best[2]} chunks "
+                  f"({args.pages / best[0]:.0f} pages/s)")
+    
+    shutdown_executor()
+
+if __name__ == "__main__":
+    main()
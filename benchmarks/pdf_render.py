@@ -0,0 +1,54 @@
+"""Pages per second of PDFGenerator.render_mcq_pdf for 10, 100 and 1000 questions
+
+Both PDF_RENDER_MODE settings are measured, rendering to memory.
+
+    python -m benchmarks.pdf_render [--questions 10 100 1000] [--repeat 3]
+"""
+import argparse
+import io
+import time
+from PyPDF2 import PdfReader
+from config.settings import settings
+from models.mcq_models import MCQ, MCQOption, DifficultyLevel
+from utils.pdf_generator import PDFGenerator
+
+def make_mcqs(count: int):
+    return [
+        MCQ(
+            question=f"Which statement about enzyme kinetics in experiment {i + 1} is correct when the substrate "
+                     f"concentration is far above the Michaelis constant?",
+            options=[
+                MCQOption(text="The reaction rate approaches Vmax", is_correct=True),
+                MCQOption(text="The reaction rate is proportional to substrate concentration", is_correct=False),
+                MCQOption(text="The enzyme is denatured", is_correct=False),
+                MCQOption(text="The Michaelis constant doubles", is_correct=False)
+            ],
+            explanation="At saturating substrate every active site is occupied, so the rate levels off at Vmax.",
+            difficulty=DifficultyLevel.MEDIUM
+        )
+        for i in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    print(f"{'questions':>9} {'mode':>9} {'pages':>6} {'seconds':>8} {'pages/s':>8}")
+    for count in args.questions:
+        mcqs = make_mcqs(count)
+        for mode in ("platypus", "canvas"):
+            settings.PDF_RENDER_MODE = mode
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                data = PDFGenerator.render_mcq_pdf(mcqs, "Benchmark")
+                timings.append(time.perf_counter() - started)
+            
+            pages = len(PdfReader(io.BytesIO(data)).pages)
+            seconds = min(timings)
+            print(f"{count:>9} {mode:>9} {pages:>6} {seconds:>8.3f} {pages / seconds:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Throughput of utils/text_normalizer on multi-megabyte text
+
+Compares the shared normalizers with the per-call str.replace loop they
+replaced and with a str.translate table over the same replacements, on
+symbol-dense text and on mostly-ASCII text with a few symbols. The last
+column is the speed relative to the replace loop, so below 1.00x is a
+slowdown.
+
+    python -m benchmarks.text_normalizer [--mb 3] [--repeat 5]
+"""
+import argparse
+import random
+import time
+from utils.text_normalizer import _BASE_REPLACEMENTS, _COMPACT_SYMBOLS, clean_text, clean_text_for_pdf
+
+REPLACEMENTS = {**_BASE_REPLACEMENTS, **_COMPACT_SYMBOLS}
+TABLE = str.maketrans(REPLACEMENTS)
+
+def replace_loop(text: str) -> str:
+    """The original implementation: one str.replace pass per symbol, then a per-character join"""
+    for old, new in REPLACEMENTS.items():
+        text = text.replace(old, new)
+    return "".join(char if ord(char) < 128 else "?" for char in text)
+
+def translate_table(text: str) -> str:
+    return text.translate(TABLE).encode("ascii", "replace").decode("ascii")
+
+def make_texts(size: int) -> dict:
+    rng = random.Random(0)
+    words = ["photosynthesis", "the", "cell", "energy", "—", "“quoted”", "≤", "×", "naïve", "…", "•", "日本"]
+    dense = " ".join(rng.choice(words) for _ in range(size // 5))[:size]
+    sentence = "The cell produces energy through ATP synthase in the inner membrane. "
+    sparse = (sentence * (size // len(sentence)))[:size - 12] + " “x” — ≤ ±"
+    return {"symbol-dense": dense, "mostly ASCII": sparse}
+
+def best_of(func, text: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=float, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    size = int(args.mb * 1024 * 1024)
+    candidates = {
+        "str.replace loop": replace_loop,
+        "str.translate": translate_table,
+        "clean_text": clean_text,
+        "clean_text_for_pdf": clean_text_for_pdf
+    }
+    
+    for label, text in make_texts(size).items():
+        print(f"{label} ({len(text) / 1024 / 1024:.1f} MB)")
+        baseline = None
+        for name, func in candidates.items():
+            seconds = best_of(func, text, args.repeat)
+            baseline = baseline or seconds
+            print(f"  {name:>18}: {seconds:.3f}s  {len(text) / seconds / 1024 / 1024:7.1f} MB/s  {baseline / seconds:5.2f}x")
+
+if __name__ == "__main__":
+    main()
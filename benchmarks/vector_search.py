@@ -0,0 +1,79 @@
+"""Query latency and recall of LocalVectorBackend at 10k, 100k and 1M vectors
+
+Exhaustive search is the ground truth; the IVF index is then trained over the
+same vectors and queried at several nprobe values. Recall is recall@k against
+the exhaustive top-k. Each block of 50k vectors is flushed to disk as it is
+added, and the time of the last flush is reported to show that it only
+depends on the block, not on the size of the index.
+    
+    python -m benchmarks.vector_search [--sizes 10000 100000 1000000] [--dim 128] [--data clustered]
+
+"random" draws isotropic Gaussian vectors, the worst case for IVF because
+there are no clusters to find; "clustered" draws from a Gaussian mixture,
+which is closer to how sentence embeddings are distributed.
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from core.vector_backends import LocalVectorBackend
+
+def make_vectors(rng: np.random.Generator, count: int, dim: int, data: str, centers: np.ndarray, spread: float = 1.0) -> np.ndarray:
+    if data == "random":
+        return rng.standard_normal((count, dim), dtype=np.float32)
+    labels = rng.integers(len(centers), size=count)
+    return centers[labels] + spread * rng.standard_normal((count, dim), dtype=np.float32)
+
+def timed_queries(backend: LocalVectorBackend, queries: np.ndarray, top_k: int):
+    results = []
+    started = time.perf_counter()
+    for query in queries:
+        results.append([match["id"] for match in backend.query(query, top_k)])
+    return results, (time.perf_counter() - started) / len(queries) * 1000
+
+def recall(results, truth) -> float:
+    return float(np.mean([len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)]))
+
+def run(size: int, dim: int, data: str, queries: int, top_k: int, nprobes):
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((1000, dim), dtype=np.float32)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        backend = LocalVectorBackend(directory, ivf_threshold=size + 1)
+        for start in range(0, size, 50000):
+            block = make_vectors(rng, min(50000, size - start), dim, data, centers)
+            backend.upsert([{"id": str(start + i), "values": values} for i, values in enumerate(block)])
+            started = time.perf_counter()
+            backend.flush()
+            flush_s = time.perf_counter() - started
+        print(f"{size:>9} {'flush':>10} {flush_s:>9.2f} s  (last {len(block)} vectors)")
+        
+        query_vectors = make_vectors(rng, queries, dim, data, centers)
+        truth, exact_ms = timed_queries(backend, query_vectors, top_k)
+        print(f"{size:>9} {'exact':>10} {exact_ms:>9.2f} ms {1.0:>7.3f}")
+        
+        started = time.perf_counter()
+        backend.build_ivf()
+        print(f"{size:>9} {'build':>10} {time.perf_counter() - started:>9.2f} s  ({len(backend._centroids)} lists)")
+        
+        for nprobe in nprobes:
+            backend.nprobe = nprobe
+            results, ivf_ms = timed_queries(backend, query_vectors, top_k)
+            print(f"{size:>9} {f'nprobe={nprobe}':>10} {ivf_ms:>9.2f} ms {recall(results, truth):>7.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--data", choices=["clustered", "random"], default="clustered")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32, 64, 128])
+    args = parser.parse_args()
+    
+    print(f"{'vectors':>9} {'search':>10} {'per query':>12} {'recall@' + str(args.top_k):>7}")
+    for size in args.sizes:
+        run(size, args.dim, args.data, args.queries, args.top_k, args.nprobe)
+
+if __name__ == "__main__":
+    main()
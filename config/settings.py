@@ -6,15 +6,82 @@ load_dotenv()
 class Settings:
     # HuggingFace
     HF_API_TOKEN = os.getenv("HF_API_TOKEN")
-    MAIN_MODEL = "openai/gpt-oss-120b"
+    MAIN_MODEL = os.getenv("MAIN_MODEL", "openai/gpt-oss-120b")
+    # Smaller model for easy and small requests and for fallback; empty disables routing
+    FAST_MODEL = os.getenv("FAST_MODEL", "openai/gpt-oss-20b")
+    # Prompt token counting: "auto" (download the model tokenizer), "local" (cached copy only) or "off"
+    PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", "auto")
+    HF_HUB_OFFLINE = os.getenv("HF_HUB_OFFLINE", "").lower() in ("1", "true", "yes")
+    
+    # LLM backend: "hf_router", "openai" (any OpenAI-compatible server) or "mock"
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "hf_router")
+    LLM_BASE_URL = os.getenv("LLM_BASE_URL")
+    LLM_API_KEY = os.getenv("LLM_API_KEY")
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    # Per-tier overrides; the larger model usually needs a longer timeout and fewer parallel calls
+    MAIN_MODEL_TIMEOUT = float(os.getenv("MAIN_MODEL_TIMEOUT", str(LLM_TIMEOUT)))
+    MAIN_MODEL_MAX_CONCURRENCY = int(os.getenv("MAIN_MODEL_MAX_CONCURRENCY", str(LLM_MAX_CONCURRENCY)))
+    FAST_MODEL_TIMEOUT = float(os.getenv("FAST_MODEL_TIMEOUT", str(LLM_TIMEOUT)))
+    FAST_MODEL_MAX_CONCURRENCY = int(os.getenv("FAST_MODEL_MAX_CONCURRENCY", str(LLM_MAX_CONCURRENCY)))
+    LLM_MOCK_RESPONSES = os.getenv("LLM_MOCK_RESPONSES")
+    LLM_MOCK_LATENCY = float(os.getenv("LLM_MOCK_LATENCY", "0.5"))
+    LLM_MOCK_JITTER = float(os.getenv("LLM_MOCK_JITTER", "0"))
+    
+    # Model routing between MAIN_MODEL and FAST_MODEL
+    ROUTER_SMALL_REQUEST = int(os.getenv("ROUTER_SMALL_REQUEST", "5"))
+    ROUTER_MAX_IN_FLIGHT = int(os.getenv("ROUTER_MAX_IN_FLIGHT", "16"))
+    ROUTER_WINDOW_SECONDS = float(os.getenv("ROUTER_WINDOW_SECONDS", "300"))
+    ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "10"))
+    ROUTER_P95_LATENCY = float(os.getenv("ROUTER_P95_LATENCY", "60"))
+    ROUTER_ERROR_RATE = float(os.getenv("ROUTER_ERROR_RATE", "0.2"))
+    
+    MCQ_BATCH_SIZE = int(os.getenv("MCQ_BATCH_SIZE", "10"))
+    MCQ_BATCH_CONCURRENCY = int(os.getenv("MCQ_BATCH_CONCURRENCY", "5"))
+    MCQ_TOP_UP_RETRIES = int(os.getenv("MCQ_TOP_UP_RETRIES", "2"))
+    PROMPT_CONTEXT_TOKENS = int(os.getenv("PROMPT_CONTEXT_TOKENS", "3000"))
+    TOKENS_PER_QUESTION = int(os.getenv("TOKENS_PER_QUESTION", "200"))
+    RESPONSE_TOKEN_OVERHEAD = int(os.getenv("RESPONSE_TOKEN_OVERHEAD", "512"))
+    MAX_OUTPUT_TOKENS = int(os.getenv("MAX_OUTPUT_TOKENS", "8192"))
     EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "outputs/embedding_cache.db")
+    EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000"))
+    EMBEDDING_CACHE_DISK_ITEMS = int(os.getenv("EMBEDDING_CACHE_DISK_ITEMS", "500000"))
+    
+    # Document chunking
+    CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "400"))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+    CONTEXT_CHUNKS_PER_BATCH = int(os.getenv("CONTEXT_CHUNKS_PER_BATCH", "4"))
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+    EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", "outputs/extraction_cache.db")
+    EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    
+    # Vector store backend: "pinecone" or "local"
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+    LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR", "outputs/vector_index")
+    # Exhaustive search stays under ~5ms up to here; IVF only pays off on clustered data
+    LOCAL_IVF_THRESHOLD = int(os.getenv("LOCAL_IVF_THRESHOLD", "200000"))
+    LOCAL_IVF_NPROBE = int(os.getenv("LOCAL_IVF_NPROBE", "32"))
+    UPSERT_PAGE_SIZE = int(os.getenv("UPSERT_PAGE_SIZE", "200"))
     
     # Pinecone
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
     PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "mcq-documents")
     
+    # PDF rendering: "platypus" for full flowable layout, "canvas" for direct drawing
+    PDF_RENDER_MODE = os.getenv("PDF_RENDER_MODE", "platypus")
+    BULK_EXPORT_MAX_VARIANTS = int(os.getenv("BULK_EXPORT_MAX_VARIANTS", "300"))
+    ARTIFACT_STORE_MAX_BYTES = int(os.getenv("ARTIFACT_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+    ARTIFACT_TTL = int(os.getenv("ARTIFACT_TTL", "86400"))
+    
     # SendGrid
     SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
+    # SendGrid accepts up to 1000 personalizations per request
+    EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "1000"))
+    EMAIL_BATCH_CONCURRENCY = int(os.getenv("EMAIL_BATCH_CONCURRENCY", "4"))
+    EMAIL_REQUESTS_PER_SECOND = float(os.getenv("EMAIL_REQUESTS_PER_SECOND", "5"))
     
     # Google Drive
     GOOGLE_DRIVE_FOLDER_ID = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
@@ -24,5 +91,46 @@ class Settings:
     
     # SERP API
     SERP_API_KEY = os.getenv("SERP_API_KEY")
+    
+    # Concurrency
+    BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "16"))
+    PROCESS_POOL_SIZE = int(os.getenv("PROCESS_POOL_SIZE", str(os.cpu_count() or 2)))
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    CONTEXT_CACHE_ITEMS = int(os.getenv("CONTEXT_CACHE_ITEMS", "1000"))
+    CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL", "3600"))
+    
+    # Context fusion across SERP, Wikipedia and the vector store
+    CONTEXT_DEADLINE = float(os.getenv("CONTEXT_DEADLINE", "3"))
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    CONTEXT_VECTOR_RESULTS = int(os.getenv("CONTEXT_VECTOR_RESULTS", "5"))
+    CONTEXT_DEDUPE_SIMILARITY = float(os.getenv("CONTEXT_DEDUPE_SIMILARITY", "0.9"))
+    
+    # Generation cache
+    GENERATION_CACHE_ITEMS = int(os.getenv("GENERATION_CACHE_ITEMS", "1000"))
+    GENERATION_CACHE_TTL = int(os.getenv("GENERATION_CACHE_TTL", "86400"))
+    GENERATION_CACHE_SEMANTIC = os.getenv("GENERATION_CACHE_SEMANTIC", "false").lower() == "true"
+    GENERATION_CACHE_SIMILARITY = float(os.getenv("GENERATION_CACHE_SIMILARITY", "0.92"))
+    
+    # Question bank
+    QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", "outputs/question_bank.db")
+    QUESTION_BANK_DUPLICATE_SIMILARITY = float(os.getenv("QUESTION_BANK_DUPLICATE_SIMILARITY", "0.95"))
+    QUESTION_BANK_LOW_WATER = int(os.getenv("QUESTION_BANK_LOW_WATER", "50"))
+    QUESTION_BANK_TOP_UP_COUNT = int(os.getenv("QUESTION_BANK_TOP_UP_COUNT", "20"))
+    
+    # Jobs
+    JOB_DB_PATH = os.getenv("JOB_DB_PATH", "outputs/jobs.db")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+    UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(200 * 1024 * 1024)))
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+    
+    # Delivery to Google Drive and email
+    DELIVERY_DB_PATH = os.getenv("DELIVERY_DB_PATH", "outputs/deliveries.db")
+    DELIVERY_WORKERS = int(os.getenv("DELIVERY_WORKERS", "4"))
+    DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "6"))
+    DELIVERY_BACKOFF_BASE = float(os.getenv("DELIVERY_BACKOFF_BASE", "2"))
+    DELIVERY_BACKOFF_MAX = float(os.getenv("DELIVERY_BACKOFF_MAX", "300"))
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+class ArtifactStore:
+    """In-memory store of generated files served for download
+    
+    Artifacts expire ttl_seconds after they are stored, and the least
+    recently used ones are dropped once the total size passes max_bytes.
+    """
+    
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, ttl_seconds: int = 86400):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def put(self, name: str, data: bytes, media_type: str = "application/pdf"):
+        with self._lock:
+            self._discard(name)
+            self._entries[name] = (data, media_type, time.time() + self.ttl_seconds)
+            self.total_bytes += len(data)
+            self._expire()
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                self._discard(next(iter(self._entries)))
+    
+    def get(self, name: str) -> Optional[Tuple[bytes, str]]:
+        """Return (data, media type) for a stored artifact, or None if it is unknown or expired"""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            self._entries.move_to_end(name)
+            return entry[0], entry[1]
+    
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire()
+            return {"items": len(self._entries), "bytes": self.total_bytes}
+    
+    def _discard(self, name: str):
+        entry = self._entries.pop(name, None)
+        if entry:
+            self.total_bytes -= len(entry[0])
+    
+    def _expire(self):
+        now = time.time()
+        expired = [name for name, (_, _, expires_at) in self._entries.items() if expires_at <= now]
+        for name in expired:
+            self._discard(name)
@@ -0,0 +1,86 @@
+import asyncio
+import csv
+import io
+import random
+import zipfile
+from typing import BinaryIO, List, Tuple, Union
+from models.mcq_models import MCQ
+from utils.pdf_generator import PDFGenerator
+from utils.concurrency import run_blocking, run_in_process
+from utils.logger import logger
+
+def _render_variant(mcqs: List[MCQ], title: str, seed: int, variant: int) -> Tuple[int, bytes, List[Tuple[int, str]]]:
+    """Shuffle and render one student variant; runs in a worker process"""
+    shuffled = BulkExporter.shuffle_variant(mcqs, seed, variant)
+    pdf = PDFGenerator.render_mcq_pdf(
+        [mcq for _, mcq in shuffled],
+        f"{title} - Variant {variant}",
+        show_answers=False
+    )
+    answer_key = [(source, BulkExporter.answer_letter(mcq)) for source, mcq in shuffled]
+    return variant, pdf, answer_key
+
+class BulkExporter:
+    """Render shuffled exam variants across the process pool into one ZIP"""
+    
+    @staticmethod
+    def shuffle_variant(mcqs: List[MCQ], seed: int, variant: int) -> List[Tuple[int, MCQ]]:
+        """Shuffle question and option order for a variant
+        
+        The same seed and variant always give the same exam. Returns
+        (1-based original question number, shuffled MCQ) pairs.
+        """
+        rng = random.Random(f"{seed}:{variant}")
+        order = list(range(len(mcqs)))
+        rng.shuffle(order)
+        
+        shuffled = []
+        for index in order:
+            options = list(mcqs[index].options)
+            rng.shuffle(options)
+            shuffled.append((index + 1, mcqs[index].model_copy(update={"options": options})))
+        
+        return shuffled
+    
+    @staticmethod
+    def answer_letter(mcq: MCQ) -> str:
+        return next(("ABCD"[j] for j, option in enumerate(mcq.options) if option.is_correct), "")
+    
+    @staticmethod
+    async def export_zip(mcqs: List[MCQ], variants: int, title: str, seed: int,
+                         target: Union[str, BinaryIO]) -> int:
+        """Write variant_NNN.pdf for each variant plus answer_keys.csv to target, a path or file object
+        
+        Variants render in parallel and are written to the archive as they
+        finish, so only in-flight PDFs are held in memory. Returns the
+        number of variants written.
+        """
+        answer_rows = []
+        tasks = [
+            asyncio.ensure_future(run_in_process(_render_variant, mcqs, title, seed, variant))
+            for variant in range(1, variants + 1)
+        ]
+        
+        try:
+            with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for next_done in asyncio.as_completed(tasks):
+                    variant, pdf, answer_key = await next_done
+                    await run_blocking(archive.writestr, f"variant_{variant:03d}.pdf", pdf)
+                    answer_rows.extend(
+                        (variant, number, answer, source)
+                        for number, (source, answer) in enumerate(answer_key, 1)
+                    )
+                
+                answer_rows.sort()
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(["variant", "question", "answer", "source_question"])
+                writer.writerows(answer_rows)
+                archive.writestr("answer_keys.csv", buffer.getvalue())
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        
+        logger.info(f"Exported {variants} exam variants")
+        return variants
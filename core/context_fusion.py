@@ -0,0 +1,103 @@
+import asyncio
+import re
+import time
+from typing import List, Tuple
+import numpy as np
+from config.settings import settings
+from core.document_processor import DocumentProcessor
+from core.external_apis import ExternalAPIs
+from core.vector_store import VectorStore
+from utils.logger import logger
+
+# Share of the deadline held back for ranking and de-duplicating passages
+_RANKING_SHARE = 0.25
+
+class ContextFusion:
+    """Build one context from SerpAPI, Wikipedia and the vector store under a deadline
+    
+    All sources are queried in parallel. Whatever has arrived by the fetch
+    cutoff, three quarters of CONTEXT_DEADLINE, is used. Passages are ranked by embedding
+    similarity to the domain, and near-duplicates are dropped. The best
+    passages are then packed into CONTEXT_TOKEN_BUDGET tokens. If ranking
+    cannot finish inside the deadline, passages are packed in source order.
+    """
+    
+    def __init__(self, external_apis: ExternalAPIs, vector_store: VectorStore):
+        self.external_apis = external_apis
+        self.vector_store = vector_store
+        # Late lookups keep running so their results warm the context cache
+        self._late_tasks = set()
+    
+    async def gather(self, domain: str) -> str:
+        deadline = time.monotonic() + settings.CONTEXT_DEADLINE
+        
+        sources = {
+            asyncio.ensure_future(self.external_apis.search_serp_api(domain)): "serp",
+            asyncio.ensure_future(self.external_apis.search_wikipedia(domain)): "wikipedia",
+            asyncio.ensure_future(self.vector_store.search_similar(domain, top_k=settings.CONTEXT_VECTOR_RESULTS)): "vector_store"
+        }
+        done, pending = await asyncio.wait(sources, timeout=settings.CONTEXT_DEADLINE * (1 - _RANKING_SHARE))
+        for task in pending:
+            self._late_tasks.add(task)
+            task.add_done_callback(self._late_tasks.discard)
+        
+        passages = []
+        for task, source in sources.items():
+            if task not in done or task.cancelled() or task.exception() is not None:
+                logger.info(f"Context source {source} missed the deadline for {domain}")
+                continue
+            result = task.result()
+            texts = result if isinstance(result, list) else [result]
+            passages.extend(self._split_passages(texts))
+        
+        passages = list(dict.fromkeys(passages))
+        if not passages:
+            return ""
+        
+        try:
+            remaining = max(0.0, deadline - time.monotonic())
+            passages = await asyncio.wait_for(self._rank(domain, passages), timeout=remaining)
+        except asyncio.TimeoutError:
+            logger.warning(f"Packing context for {domain} unranked: deadline reached")
+        except Exception as e:
+            logger.warning(f"Packing context for {domain} unranked: {e}")
+        
+        return self._pack(passages, settings.CONTEXT_TOKEN_BUDGET)
+    
+    async def _rank(self, domain: str, passages: List[str]) -> List[str]:
+        """Order passages by similarity to the domain, dropping near-duplicates"""
+        embeddings = await self.vector_store.embed_texts([domain] + passages)
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        
+        query, candidates = vectors[0], vectors[1:]
+        scores = candidates @ query
+        
+        kept: List[int] = []
+        for index in np.argsort(-scores):
+            if kept and float(np.max(candidates[kept] @ candidates[index])) >= settings.CONTEXT_DEDUPE_SIMILARITY:
+                continue
+            kept.append(int(index))
+        
+        return [passages[index] for index in kept]
+    
+    @staticmethod
+    def _split_passages(texts: List[str]) -> List[str]:
+        passages = []
+        for text in texts:
+            passages.extend(part.strip() for part in re.split(r"\n\s*\n|\n", text or "") if part.strip())
+        return passages
+    
+    @staticmethod
+    def _pack(passages: List[str], budget: int) -> str:
+        """Take passages in order while they fit the token budget"""
+        packed: List[Tuple[str, int]] = []
+        used = 0
+        for passage in passages:
+            tokens = DocumentProcessor.count_tokens(passage)
+            if used + tokens > budget:
+                continue
+            packed.append((passage, tokens))
+            used += tokens
+        
+        return "\n\n".join(passage for passage, _ in packed)
@@ -0,0 +1,298 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from models.delivery_models import Delivery, DeliveryStatus
+from utils.concurrency import run_blocking
+from utils.logger import logger
+
+DeliveryHandler = Callable[[Delivery, bytes], Awaitable[Any]]
+
+class DeliveryQueue:
+    """SQLite-backed outbox for artifacts that still have to reach Drive or email
+    
+    Each delivery is keyed by (channel, artifact content, target), so
+    submitting the same artifact twice never sends it twice. Failed
+    attempts are retried with exponential backoff and jitter. After
+    max_attempts the delivery moves to the dead-letter list until it is
+    retried by hand. Artifact bytes are kept until every delivery of them
+    has succeeded. Database reads and writes, artifact BLOBs included, run
+    on the shared blocking pool.
+    """
+    
+    def __init__(self, db_path: str, workers: int = 4, max_attempts: int = 6,
+                 backoff_base: float = 2.0, backoff_max: float = 300.0):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._handlers: Dict[str, DeliveryHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._timers: List[asyncio.TimerHandle] = []
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    id TEXT PRIMARY KEY,
+                    data BLOB NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS deliveries (
+                    id TEXT PRIMARY KEY,
+                    artifact_id TEXT NOT NULL,
+                    artifact_name TEXT NOT NULL,
+                    channel TEXT NOT NULL,
+                    target TEXT,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_deliveries_artifact ON deliveries (artifact_name)")
+    
+    def register(self, channel: str, handler: DeliveryHandler):
+        """Register the coroutine that delivers artifacts over a channel
+        
+        The handler raises or returns a falsy value when delivery failed.
+        """
+        self._handlers[channel] = handler
+    
+    async def start(self):
+        """Start workers and reschedule deliveries left over from a previous run"""
+        self._queue = asyncio.Queue()
+        
+        rows = await run_blocking(self._unfinished)
+        for row in rows:
+            self._schedule(row["id"], row["next_attempt_at"] - time.time())
+        
+        if rows:
+            logger.info(f"Recovered {len(rows)} unfinished deliveries")
+        
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+    
+    async def stop(self):
+        """Cancel workers and pending retries; unfinished deliveries stay in the database"""
+        for timer in self._timers:
+            timer.cancel()
+        self._timers = []
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    @staticmethod
+    def make_key(channel: str, artifact_id: str, target: Optional[str]) -> str:
+        return hashlib.sha256(f"{channel}\0{artifact_id}\0{target or ''}".encode("utf-8")).hexdigest()
+    
+    async def submit(self, artifact_name: str, data: bytes, channel: str, target: str = None) -> str:
+        """Persist a delivery and queue it, returning its idempotency key
+        
+        A delivery that already exists for the same key is left alone.
+        """
+        if channel not in self._handlers:
+            raise ValueError(f"No handler registered for delivery channel: {channel}")
+        
+        artifact_id = hashlib.sha256(data).hexdigest()
+        delivery_id = self.make_key(channel, artifact_id, target)
+        inserted = await run_blocking(self._insert, delivery_id, artifact_id, artifact_name, data, channel, target)
+        
+        if inserted:
+            self._schedule(delivery_id, 0)
+            logger.info(f"Delivery {delivery_id[:12]} ({channel}) of {artifact_name} queued")
+        else:
+            logger.info(f"Delivery {delivery_id[:12]} ({channel}) of {artifact_name} already exists")
+        
+        return delivery_id
+    
+    async def get(self, delivery_id: str) -> Optional[Delivery]:
+        return await run_blocking(self._get, delivery_id)
+    
+    async def for_artifact(self, artifact_name: str) -> List[Delivery]:
+        """All deliveries of the artifact stored under artifact_name"""
+        return await run_blocking(self._for_artifact, artifact_name)
+    
+    async def dead_letters(self) -> List[Delivery]:
+        return await run_blocking(self._dead_letters)
+    
+    async def retry(self, delivery_id: str) -> bool:
+        """Move a dead-lettered delivery back onto the queue with a fresh attempt budget"""
+        updated = await run_blocking(self._reset, delivery_id)
+        if updated:
+            self._schedule(delivery_id, 0)
+        return updated
+    
+    def _unfinished(self) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, next_attempt_at FROM deliveries WHERE status IN (?, ?) ORDER BY next_attempt_at",
+                (DeliveryStatus.PENDING.value, DeliveryStatus.RETRYING.value)
+            ).fetchall()
+    
+    def _insert(self, delivery_id: str, artifact_id: str, artifact_name: str, data: bytes,
+                channel: str, target: Optional[str]) -> bool:
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO artifacts (id, data) VALUES (?, ?)",
+                (artifact_id, data)
+            )
+            inserted = self._conn.execute(
+                """INSERT OR IGNORE INTO deliveries
+                   (id, artifact_id, artifact_name, channel, target, status, next_attempt_at, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (delivery_id, artifact_id, artifact_name, channel, target,
+                 DeliveryStatus.PENDING.value, time.time(), now, now)
+            ).rowcount
+        return bool(inserted)
+    
+    def _get(self, delivery_id: str) -> Optional[Delivery]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM deliveries WHERE id = ?", (delivery_id,)).fetchone()
+        return self._to_delivery(row) if row else None
+    
+    def _for_artifact(self, artifact_name: str) -> List[Delivery]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM deliveries WHERE artifact_name = ? ORDER BY created_at, channel",
+                (artifact_name,)
+            ).fetchall()
+        return [self._to_delivery(row) for row in rows]
+    
+    def _dead_letters(self) -> List[Delivery]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM deliveries WHERE status = ? ORDER BY updated_at DESC",
+                (DeliveryStatus.DEAD_LETTER.value,)
+            ).fetchall()
+        return [self._to_delivery(row) for row in rows]
+    
+    def _reset(self, delivery_id: str) -> bool:
+        with self._lock, self._conn:
+            updated = self._conn.execute(
+                """UPDATE deliveries SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ?
+                   WHERE id = ? AND status = ?""",
+                (DeliveryStatus.PENDING.value, time.time(), datetime.now().isoformat(),
+                 delivery_id, DeliveryStatus.DEAD_LETTER.value)
+            ).rowcount
+        return bool(updated)
+    
+    def _schedule(self, delivery_id: str, delay: float):
+        if delay <= 0:
+            self._queue.put_nowait(delivery_id)
+            return
+        
+        loop = asyncio.get_running_loop()
+        self._timers = [timer for timer in self._timers if not timer.cancelled() and timer.when() > loop.time()]
+        self._timers.append(loop.call_later(delay, self._queue.put_nowait, delivery_id))
+    
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+    
+    def _load_artifact(self, artifact_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+        return row["data"] if row else None
+    
+    def _record_success(self, delivery: Delivery, result: Any):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE deliveries SET status = ?, attempts = ?, result = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (DeliveryStatus.DELIVERED.value, delivery.attempts + 1, json.dumps(result),
+                 datetime.now().isoformat(), delivery.id)
+            )
+            # Drop the artifact once nothing still needs it
+            self._conn.execute(
+                """DELETE FROM artifacts WHERE id = ? AND NOT EXISTS
+                   (SELECT 1 FROM deliveries WHERE artifact_id = ? AND status != ?)""",
+                (delivery.artifact_id, delivery.artifact_id, DeliveryStatus.DELIVERED.value)
+            )
+    
+    def _record_failure(self, delivery: Delivery, error: str) -> Optional[float]:
+        """Store a failed attempt, returning the retry delay or None once dead-lettered"""
+        attempts = delivery.attempts + 1
+        retry_in = self._backoff(attempts) if attempts < self.max_attempts else None
+        status = DeliveryStatus.RETRYING if retry_in is not None else DeliveryStatus.DEAD_LETTER
+        
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE deliveries SET status = ?, attempts = ?, next_attempt_at = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status.value, attempts, time.time() + (retry_in or 0), error,
+                 datetime.now().isoformat(), delivery.id)
+            )
+        return retry_in
+    
+    @staticmethod
+    def _to_delivery(row: sqlite3.Row) -> Delivery:
+        return Delivery(
+            id=row["id"],
+            artifact_id=row["artifact_id"],
+            artifact_name=row["artifact_name"],
+            channel=row["channel"],
+            target=row["target"],
+            status=row["status"],
+            attempts=row["attempts"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"]
+        )
+    
+    async def _worker(self, worker_id: int):
+        while True:
+            delivery_id = await self._queue.get()
+            try:
+                delivery = await self.get(delivery_id)
+                if delivery is None or delivery.status in (DeliveryStatus.DELIVERED, DeliveryStatus.DEAD_LETTER):
+                    continue
+                
+                data = await run_blocking(self._load_artifact, delivery.artifact_id)
+                if data is None:
+                    await run_blocking(
+                        self._record_failure,
+                        delivery.model_copy(update={"attempts": self.max_attempts}),
+                        "Artifact data is missing"
+                    )
+                    continue
+                
+                try:
+                    result = await self._handlers[delivery.channel](delivery, data)
+                    error = None if result else "Delivery handler reported failure"
+                except Exception as e:
+                    result, error = None, str(e)
+                
+                if error is None:
+                    await run_blocking(self._record_success, delivery, result)
+                    logger.info(f"Delivery {delivery_id[:12]} ({delivery.channel}) succeeded")
+                    continue
+                
+                retry_in = await run_blocking(self._record_failure, delivery, error)
+                if retry_in is None:
+                    logger.error(f"Delivery {delivery_id[:12]} ({delivery.channel}) dead-lettered: {error}")
+                else:
+                    logger.warning(
+                        f"Delivery {delivery_id[:12]} ({delivery.channel}) failed, retrying in {retry_in:.1f}s: {error}"
+                    )
+                    self._schedule(delivery_id, retry_in)
+            finally:
+                self._queue.task_done()
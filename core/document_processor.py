@@ -1,43 +1,163 @@
+import mmap
 import os
-from typing import List
+import re
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
 from PyPDF2 import PdfReader
 from docx import Document
 from pptx import Presentation
+from config.settings import settings
+from models.document_models import ExtractedDocument
+from utils.concurrency import get_process_pool
 from utils.logger import logger
 
+# Words and individual punctuation marks approximate subword tokens closely
+# enough for sizing chunks without loading a tokenizer
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+@contextmanager
+def _open_mapped(file_path: str):
+    """Open a file as a read-only memory map so pages are read on demand instead of buffered"""
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield file
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+class _SpanChunker:
+    """Cut overlapping token-window chunks from text that arrives page by page
+    
+    Pages are joined with a newline, which never belongs to a token, so
+    tokenizing each page at its offset matches tokenizing the joined text.
+    A chunk is emitted as soon as its window is complete, and finish()
+    closes the tail exactly as one pass over the whole text would.
+    """
+    
+    def __init__(self, chunk_tokens: int = None, overlap_tokens: int = None):
+        self.chunk_tokens = chunk_tokens or settings.CHUNK_TOKENS
+        overlap_tokens = settings.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        self.step = max(1, self.chunk_tokens - overlap_tokens)
+        self.spans: List[Tuple[int, int]] = []
+        self._tokens: List[Tuple[int, int]] = []
+        self._next = 0
+    
+    def feed(self, text: str, offset: int = 0):
+        self._tokens.extend((start + offset, end + offset) for start, end in (
+            match.span() for match in _TOKEN_PATTERN.finditer(text)
+        ))
+        # A window ending exactly at the current token count waits, since it may be the last one
+        while self._next + self.chunk_tokens < len(self._tokens):
+            self._emit(self._next + self.chunk_tokens)
+    
+    def finish(self) -> List[Tuple[int, int]]:
+        while self._next < len(self._tokens):
+            end = min(self._next + self.chunk_tokens, len(self._tokens))
+            self._emit(end)
+            if end == len(self._tokens):
+                break
+        return self.spans
+    
+    def _emit(self, end: int):
+        self.spans.append((self._tokens[self._next][0], self._tokens[end - 1][1]))
+        self._next += self.step
+
+def _extract_pdf_range(file_path: str, start: int, end: int) -> List[str]:
+    """Extract text from pages [start, end) of a PDF; runs in a worker process"""
+    with _open_mapped(file_path) as file:
+        reader = PdfReader(file)
+        return [(reader.pages[i].extract_text() or "") for i in range(start, end)]
+
 class DocumentProcessor:
     
     @staticmethod
     def extract_text_from_file(file_path: str) -> str:
         """Extract text from various document formats"""
+        document = DocumentProcessor.extract_document(file_path)
+        return document.text if document else ""
+    
+    @staticmethod
+    def extract_document(file_path: str) -> Optional[ExtractedDocument]:
+        """Extract text along with the offset at which each page starts"""
+        extracted = DocumentProcessor._extract(file_path)
+        return extracted[0] if extracted else None
+    
+    @staticmethod
+    def extract_and_chunk(file_path: str) -> Optional[Tuple[ExtractedDocument, List[Tuple[int, int]]]]:
+        """Extract a document and its chunk spans, chunking each page as soon as it arrives
+        
+        For large PDFs, later page ranges are still being extracted in the
+        process pool while earlier pages are tokenized and chunked.
+        """
+        return DocumentProcessor._extract(file_path, _SpanChunker())
+    
+    @staticmethod
+    def _extract(file_path: str, chunker: _SpanChunker = None) -> Optional[Tuple[ExtractedDocument, List[Tuple[int, int]]]]:
         try:
-            # Clean the file path by removing any surrounding quotes
-            file_path = file_path.strip('\'"')
-            extension = os.path.splitext(file_path)[1].lower()
+            pages = []
+            page_offsets = []
+            offset = 0
             
-            if extension == '.pdf':
-                return DocumentProcessor._extract_from_pdf(file_path)
-            elif extension == '.docx':
-                return DocumentProcessor._extract_from_docx(file_path)
-            elif extension == '.pptx':
-                return DocumentProcessor._extract_from_pptx(file_path)
-            elif extension == '.txt':
-                return DocumentProcessor._extract_from_txt(file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {extension}")
+            for _, page_text in DocumentProcessor.iter_pages(file_path):
+                page_offsets.append(offset)
+                pages.append(page_text)
+                if chunker:
+                    chunker.feed(page_text, offset)
+                offset += len(page_text) + 1
+            
+            document = ExtractedDocument(text="\n".join(pages), page_offsets=page_offsets)
+            return document, chunker.finish() if chunker else []
                 
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {e}")
-            return ""
+            return None
     
     @staticmethod
-    def _extract_from_pdf(file_path: str) -> str:
-        text = ""
-        with open(file_path, 'rb') as file:
+    def iter_pages(file_path: str) -> Iterator[Tuple[int, str]]:
+        """Yield (page number, text) pairs in order as soon as each page is extracted"""
+        # Clean the file path by removing any surrounding quotes
+        file_path = file_path.strip('\'"')
+        extension = os.path.splitext(file_path)[1].lower()
+        
+        if extension == '.pdf':
+            pages = DocumentProcessor._iter_pdf_pages(file_path)
+        elif extension == '.docx':
+            pages = [DocumentProcessor._extract_from_docx(file_path)]
+        elif extension == '.pptx':
+            pages = DocumentProcessor._iter_pptx_slides(file_path)
+        elif extension == '.txt':
+            pages = [DocumentProcessor._extract_from_txt(file_path)]
+        else:
+            raise ValueError(f"Unsupported file format: {extension}")
+        
+        for page_number, page_text in enumerate(pages, 1):
+            yield page_number, page_text
+    
+    @staticmethod
+    def _iter_pdf_pages(file_path: str) -> Iterator[str]:
+        with _open_mapped(file_path) as file:
             reader = PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        return text
+            page_count = len(reader.pages)
+            
+            if page_count < settings.PDF_PARALLEL_MIN_PAGES:
+                for page in reader.pages:
+                    yield page.extract_text() or ""
+                return
+        
+        # Split pages into ranges across the process pool, then yield them in order
+        range_size = max(1, -(-page_count // (settings.PROCESS_POOL_SIZE * 2)))
+        pool = get_process_pool()
+        futures = [
+            pool.submit(_extract_pdf_range, file_path, start, min(start + range_size, page_count))
+            for start in range(0, page_count, range_size)
+        ]
+        
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
     
     @staticmethod
     def _extract_from_docx(file_path: str) -> str:
@@ -45,16 +165,32 @@ class DocumentProcessor:
         return "\n".join([paragraph.text for paragraph in doc.paragraphs])
     
     @staticmethod
-    def _extract_from_pptx(file_path: str) -> str:
+    def _iter_pptx_slides(file_path: str) -> Iterator[str]:
         prs = Presentation(file_path)
-        text = ""
         for slide in prs.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text"):
-                    text += shape.text + "\n"
-        return text
+            yield "\n".join(shape.text for shape in slide.shapes if hasattr(shape, "text"))
     
     @staticmethod
     def _extract_from_txt(file_path: str) -> str:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
\ No newline at end of file
+        # Decode straight from the mapping, without an intermediate bytes copy
+        with _open_mapped(file_path) as file:
+            if isinstance(file, mmap.mmap):
+                return str(file, 'utf-8')
+            return file.read().decode('utf-8')
+    
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        """Approximate token count, using the same word/punctuation split as chunking"""
+        return sum(1 for _ in _TOKEN_PATTERN.finditer(text or ""))
+    
+    @staticmethod
+    def chunk_text(text: str, chunk_tokens: int = None, overlap_tokens: int = None) -> List[str]:
+        """Split text into overlapping chunks of roughly chunk_tokens tokens"""
+        return [text[start:end] for start, end in DocumentProcessor.chunk_spans(text, chunk_tokens, overlap_tokens)]
+    
+    @staticmethod
+    def chunk_spans(text: str, chunk_tokens: int = None, overlap_tokens: int = None) -> List[Tuple[int, int]]:
+        """Character (start, end) spans of overlapping chunks of roughly chunk_tokens tokens"""
+        chunker = _SpanChunker(chunk_tokens, overlap_tokens)
+        chunker.feed(text or "")
+        return chunker.finish()
\ No newline at end of file
@@ -1,56 +1,20 @@
+import asyncio
 import os
 from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Attachment
+from sendgrid.helpers.mail import Mail, Attachment, Personalization, Substitution, To
 import base64
+import html
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from utils.concurrency import run_blocking
 from utils.logger import logger
+from utils.rate_limiter import AsyncRateLimiter
 from config.settings import settings
 from datetime import datetime
 
-class EmailSender:
-    def __init__(self):
-        self.sg = SendGridAPIClient(api_key=settings.SENDGRID_API_KEY)
-    
-    def send_mcq_pdf(self, recipient_email: str, pdf_path: str, recipient_name: str = None, subject: str = None):
-        """Send MCQ PDF via email with improved deliverability"""
-        try:
-            # More personalized subject line
-            if not subject:
-                subject = f"Your MCQ Assessment Results - {datetime.now().strftime('%B %d, %Y')}"
-            
-            # Create personalized HTML content
-            html_content = self._create_html_content(recipient_name or "Student")
-            
-            message = Mail(
-                from_email=('malindap288@gmail.com', 'MCQ Assessment System'),
-                to_emails=recipient_email,
-                subject=subject,
-                html_content=html_content
-            )
-            
-            # Add PDF attachment
-            with open(pdf_path, 'rb') as f:
-                data = f.read()
-                encoded = base64.b64encode(data).decode()
-            
-            attachment = Attachment(
-                file_content=encoded,
-                file_type='application/pdf',
-                file_name='MCQ_Assessment_Results.pdf',
-                disposition='attachment'
-            )
-            message.attachment = attachment
-            
-            response = self.sg.send(message)
-            logger.info(f"Email sent successfully to {recipient_email}, Status: {response.status_code}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error sending email to {recipient_email}: {e}")
-            return False
-    
-    def _create_html_content(self, recipient_name: str) -> str:
-        """Create rich HTML content for better deliverability"""
-        return f"""
+# Rendered once per year; "-name-" is filled in per recipient, by SendGrid substitution for bulk sends
+_HTML_TEMPLATE = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -65,7 +29,7 @@ class EmailSender:
             </div>
             
             <div style="background-color: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
-                <h2 style="color: #2980b9; margin-bottom: 20px;">Dear {recipient_name},</h2>
+                <h2 style="color: #2980b9; margin-bottom: 20px;">Dear -name-,</h2>
                 
                 <p style="font-size: 16px; margin-bottom: 20px;">
                     Thank you for completing your MCQ assessment! We're pleased to provide you with your results.
@@ -105,9 +69,152 @@ class EmailSender:
                     <a href="mailto:malindaall999@gmail.com" style="color: #3498db;">contact us here</a>.
                 </p>
                 <p style="font-size: 11px; color: #bdc3c7; margin: 0;">
-                    © {datetime.now().year} MCQ Assessment System. All rights reserved.
+                    © -year- MCQ Assessment System. All rights reserved.
                 </p>
             </div>
         </body>
         </html>
-        """
\ No newline at end of file
+        """
+
+_NAME_TAG = "-name-"
+
+# A dotted domain and no characters SendGrid rejects; deliverability is left to SendGrid
+_EMAIL_PATTERN = re.compile(
+    r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+    r"@(?:[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?\.)+[A-Za-z]{2,}"
+)
+
+def is_valid_email(email: str) -> bool:
+    return _EMAIL_PATTERN.fullmatch(email) is not None
+
+class EmailSender:
+    def __init__(self):
+        self.sg = SendGridAPIClient(api_key=settings.SENDGRID_API_KEY)
+        self.rate_limiter = AsyncRateLimiter(settings.EMAIL_REQUESTS_PER_SECOND, burst=settings.EMAIL_BATCH_CONCURRENCY)
+    
+    def send_mcq_pdf(self, recipient_email: str, pdf_path: str, recipient_name: str = None, subject: str = None):
+        """Send MCQ PDF via email with improved deliverability"""
+        try:
+            with open(pdf_path, 'rb') as f:
+                data = f.read()
+        except Exception as e:
+            logger.error(f"Error reading {pdf_path} for {recipient_email}: {e}")
+            return False
+        
+        return self.send_mcq_pdf_bytes(recipient_email, data, recipient_name, subject)
+    
+    def send_mcq_pdf_bytes(self, recipient_email: str, data: bytes, recipient_name: str = None, subject: str = None):
+        """Send an in-memory MCQ PDF via email"""
+        try:
+            # More personalized subject line
+            if not subject:
+                subject = f"Your MCQ Assessment Results - {datetime.now().strftime('%B %d, %Y')}"
+            
+            # Create personalized HTML content
+            html_content = self._create_html_content(recipient_name or "Student")
+            
+            message = Mail(
+                from_email=('malindap288@gmail.com', 'MCQ Assessment System'),
+                to_emails=recipient_email,
+                subject=subject,
+                html_content=html_content
+            )
+            
+            # Add PDF attachment
+            message.attachment = self._create_attachment(base64.b64encode(data).decode())
+            
+            response = self.sg.send(message)
+            logger.info(f"Email sent successfully to {recipient_email}, Status: {response.status_code}")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error sending email to {recipient_email}: {e}")
+            return False
+    
+    async def send_bulk_mcq_pdf(self, recipients: List[Tuple[str, str]], data: bytes,
+                                subject: str = None) -> Dict[str, bool]:
+        """Send one PDF to many (email, name) recipients, returning whether each send succeeded
+        
+        The attachment is encoded once. Recipients are grouped into
+        requests of EMAIL_BATCH_SIZE personalizations, and the requests are
+        sent EMAIL_BATCH_CONCURRENCY at a time under the rate limiter.
+        Malformed addresses are reported as failed and left out of the
+        requests, since SendGrid rejects a whole request over one of them.
+        """
+        if not subject:
+            subject = f"Your MCQ Assessment Results - {datetime.now().strftime('%B %d, %Y')}"
+        
+        # Each address gets the exam once
+        results = {}
+        unique = {}
+        for email, name in recipients:
+            email = email.strip()
+            if is_valid_email(email):
+                unique.setdefault(email.lower(), (email, name))
+            else:
+                results[email] = False
+        recipients = list(unique.values())
+        if results:
+            logger.warning(f"Skipping {len(results)} invalid email addresses: {', '.join(results)}")
+        
+        encoded = base64.b64encode(data).decode()
+        template = self._html_template(datetime.now().year)
+        semaphore = asyncio.Semaphore(settings.EMAIL_BATCH_CONCURRENCY)
+        batch_size = settings.EMAIL_BATCH_SIZE
+        
+        async def send(batch: List[Tuple[str, str]]) -> Dict[str, bool]:
+            async with semaphore:
+                await self.rate_limiter.acquire()
+                sent = await run_blocking(self._send_batch, batch, encoded, template, subject)
+                return {email: sent for email, _ in batch}
+        
+        for batch_results in await asyncio.gather(*(
+            send(recipients[start:start + batch_size]) for start in range(0, len(recipients), batch_size)
+        )):
+            results.update(batch_results)
+        
+        logger.info(f"Bulk email sent to {sum(results.values())} of {len(results)} recipients")
+        return results
+    
+    def _send_batch(self, recipients: List[Tuple[str, str]], encoded: str, template: str, subject: str) -> bool:
+        """Send one request with a personalization per recipient"""
+        try:
+            message = Mail(
+                from_email=('malindap288@gmail.com', 'MCQ Assessment System'),
+                subject=subject,
+                html_content=template
+            )
+            
+            for email, name in recipients:
+                personalization = Personalization()
+                personalization.add_to(To(email, name))
+                personalization.add_substitution(Substitution(_NAME_TAG, html.escape(name or "Student")))
+                message.add_personalization(personalization)
+            
+            message.attachment = self._create_attachment(encoded)
+            
+            response = self.sg.send(message)
+            logger.info(f"Bulk email batch of {len(recipients)} sent, Status: {response.status_code}")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error sending bulk email batch of {len(recipients)}: {e}")
+            return False
+    
+    @staticmethod
+    def _create_attachment(encoded: str) -> Attachment:
+        return Attachment(
+            file_content=encoded,
+            file_type='application/pdf',
+            file_name='MCQ_Assessment_Results.pdf',
+            disposition='attachment'
+        )
+    
+    def _create_html_content(self, recipient_name: str) -> str:
+        """Create rich HTML content for better deliverability"""
+        return self._html_template(datetime.now().year).replace(_NAME_TAG, html.escape(recipient_name))
+    
+    @staticmethod
+    @lru_cache(maxsize=2)
+    def _html_template(year: int) -> str:
+        return _HTML_TEMPLATE.replace("-year-", str(year))
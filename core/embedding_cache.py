@@ -0,0 +1,135 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from utils.logger import logger
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed by SHA-256 of (model, text)
+    
+    An in-memory LRU sits in front of a SQLite store that is trimmed to
+    its least recently used entries once it grows past disk_items. The
+    memory tier holds float32 arrays (3KB per 768-d vector) rather than
+    lists of Python floats, which take about nine times as much.
+    """
+    
+    def __init__(self, db_path: str, memory_items: int = 10000, disk_items: int = 500000):
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_trim = 0
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_access ON embeddings (last_access)")
+    
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+    
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up embeddings for texts, returning None where there is no cached vector"""
+        keys = [self.make_key(model, text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            
+            disk_keys = [key for key in set(keys) if key not in found]
+            if disk_keys:
+                placeholders = ",".join("?" * len(disk_keys))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    disk_keys
+                ).fetchall()
+                
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector)
+                
+                if rows:
+                    with self._conn:
+                        self._conn.executemany(
+                            "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                            [(time.time(), key) for key, _ in rows]
+                        )
+            
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        
+        return [found[key].tolist() if key in found else None for key in keys]
+    
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        """Store embeddings in both tiers"""
+        now = time.time()
+        rows = []
+        
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.make_key(model, text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes(), now))
+            
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                    rows
+                )
+            
+            self._writes_since_trim += len(rows)
+            if self._writes_since_trim >= 1000:
+                self._trim_disk()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            disk_count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "memory_items": len(self._memory),
+                "disk_items": disk_count
+            }
+    
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+    
+    def _trim_disk(self):
+        self._writes_since_trim = 0
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.disk_items
+        if excess > 0:
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+                    (excess,)
+                )
+            logger.info(f"Evicted {excess} embeddings from disk cache")
\ No newline at end of file
@@ -1,13 +1,49 @@
-import requests
-import wikipedia
+import asyncio
+import re
+import httpx
 from config.settings import settings
 from utils.logger import logger
+from utils.ttl_cache import AsyncTTLCache
+
+_WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
 
 class ExternalAPIs:
+    """Context retrieval from SerpAPI and Wikipedia over one pooled HTTP client
     
-    @staticmethod
-    def search_serp_api(query: str, num_results: int = 5) -> str:
+    Results are cached by source and normalized query for CONTEXT_CACHE_TTL,
+    so popular domains are answered without network I/O.
+    """
+    
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS
+            ),
+            headers={"User-Agent": "MCQ-AI-Agent/1.0"}
+        )
+        self.cache = AsyncTTLCache(max_items=settings.CONTEXT_CACHE_ITEMS, ttl_seconds=settings.CONTEXT_CACHE_TTL)
+    
+    async def close(self):
+        await self.client.aclose()
+    
+    async def search_serp_api(self, query: str, num_results: int = 5) -> str:
         """Search using SERP API"""
+        key = ("serp", self._normalize(query), num_results)
+        return await self.cache.get_or_fetch(key, lambda: self._fetch_serp_api(query, num_results))
+    
+    async def search_wikipedia(self, query: str, sentences: int = 5) -> str:
+        """Search Wikipedia"""
+        key = ("wikipedia", self._normalize(query), sentences)
+        return await self.cache.get_or_fetch(key, lambda: self._fetch_wikipedia(query, sentences))
+    
+    async def search_all(self, query: str) -> str:
+        """Search SERP API and Wikipedia concurrently and combine whatever they return"""
+        results = await asyncio.gather(self.search_serp_api(query), self.search_wikipedia(query))
+        return "\n\n".join(result for result in results if result)
+    
+    async def _fetch_serp_api(self, query: str, num_results: int) -> str:
         try:
             url = "https://serpapi.com/search"
             params = {
@@ -17,7 +53,8 @@ class ExternalAPIs:
                 "engine": "google"
             }
             
-            response = requests.get(url, params=params)
+            response = await self.client.get(url, params=params)
+            response.raise_for_status()
             data = response.json()
             
             # Extract organic results
@@ -31,19 +68,42 @@ class ExternalAPIs:
             logger.error(f"SERP API error: {e}")
             return ""
     
-    @staticmethod
-    def search_wikipedia(query: str, sentences: int = 5) -> str:
-        """Search Wikipedia"""
+    async def _fetch_wikipedia(self, query: str, sentences: int) -> str:
+        """Fetch the intro of the best matching article in a single request
+        
+        The search generator returns the top few hits along with their
+        extracts, so a disambiguation page is skipped in favour of the next
+        hit without another round trip.
+        """
         try:
-            summary = wikipedia.summary(query, sentences=sentences)
-            return summary
+            params = {
+                "action": "query",
+                "format": "json",
+                "formatversion": 2,
+                "generator": "search",
+                "gsrsearch": query,
+                "gsrlimit": 3,
+                "prop": "extracts|pageprops",
+                "ppprop": "disambiguation",
+                "exintro": 1,
+                "explaintext": 1,
+                "exsentences": sentences,
+                "redirects": 1
+            }
+            
+            response = await self.client.get(_WIKIPEDIA_API, params=params)
+            response.raise_for_status()
+            pages = response.json().get("query", {}).get("pages", [])
+            
+            for page in sorted(pages, key=lambda page: page.get("index", 0)):
+                if "disambiguation" not in page.get("pageprops", {}) and page.get("extract"):
+                    return page["extract"]
+            return ""
             
-        except wikipedia.exceptions.DisambiguationError as e:
-            # Try first option
-            try:
-                return wikipedia.summary(e.options[0], sentences=sentences)
-            except:
-                return ""
         except Exception as e:
             logger.error(f"Wikipedia error: {e}")
-            return ""
\ No newline at end of file
+            return ""
+    
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return re.sub(r"\s+", " ", query).strip().lower()
@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+from models.document_models import ExtractionRecord
+from utils.logger import logger
+
+class ExtractionCache:
+    """Content-addressed cache of extracted documents keyed by SHA-256 of the upload
+    
+    Records are stored zlib-compressed in SQLite. Once the stored records
+    grow past max_bytes the least recently used ones are evicted.
+    """
+    
+    def __init__(self, db_path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS extractions (
+                    file_hash TEXT PRIMARY KEY,
+                    record BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_access ON extractions (last_access)")
+    
+    def get(self, file_hash: str) -> Optional[ExtractionRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM extractions WHERE file_hash = ?", (file_hash,)
+            ).fetchone()
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            try:
+                record = ExtractionRecord.model_validate_json(zlib.decompress(row[0]))
+            except Exception as e:
+                logger.error(f"Dropping unreadable extraction cache entry {file_hash}: {e}")
+                with self._conn:
+                    self._conn.execute("DELETE FROM extractions WHERE file_hash = ?", (file_hash,))
+                self.misses += 1
+                return None
+            
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE extractions SET last_access = ? WHERE file_hash = ?",
+                    (time.time(), file_hash)
+                )
+            self.hits += 1
+            return record
+    
+    def put(self, file_hash: str, record: ExtractionRecord):
+        blob = zlib.compress(record.model_dump_json().encode("utf-8"))
+        if len(blob) > self.max_bytes:
+            logger.info(f"Not caching extraction {file_hash}: {len(blob)} bytes exceeds the cache size")
+            return
+        
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO extractions (file_hash, record, size, last_access) VALUES (?, ?, ?, ?)",
+                    (file_hash, blob, len(blob), time.time())
+                )
+            self._trim()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "items": count,
+                "bytes": total
+            }
+    
+    def _trim(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        evict = []
+        for file_hash, size in self._conn.execute("SELECT file_hash, size FROM extractions ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            evict.append((file_hash,))
+            total -= size
+        
+        with self._conn:
+            self._conn.executemany("DELETE FROM extractions WHERE file_hash = ?", evict)
+        logger.info(f"Evicted {len(evict)} documents from extraction cache")
@@ -0,0 +1,114 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+from models.mcq_models import MCQ
+
+class GenerationCache:
+    """TTL + LRU cache of generated MCQ pools keyed by the normalized request
+    
+    Exact lookups match on domain, difficulty, source, custom prompt and a
+    hash of the context. When semantic matching is enabled, a request whose
+    domain embedding is within similarity_threshold of a stored pool with
+    the same difficulty, source, custom prompt and context reuses that pool.
+    """
+    
+    def __init__(self, max_items: int = 1000, ttl_seconds: int = 86400, similarity_threshold: float = None):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+    
+    def lookup(self, count: int, domain: str, difficulty: str, source: str, custom_prompt: str = None,
+               context: str = None, embedding: List[float] = None) -> Optional[List[MCQ]]:
+        """Return count cached MCQs for the request, or None on a miss"""
+        self._expire()
+        key, scope = self._make_key(domain, difficulty, source, custom_prompt, context)
+        
+        entry = self._entries.get(key)
+        if entry and len(entry["mcqs"]) >= count:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["mcqs"][:count]
+        
+        if embedding is not None and self.similarity_threshold is not None:
+            entry_key = self._find_similar(scope, embedding, count)
+            if entry_key:
+                self._entries.move_to_end(entry_key)
+                self.semantic_hits += 1
+                return self._entries[entry_key]["mcqs"][:count]
+        
+        self.misses += 1
+        return None
+    
+    def store(self, mcqs: List[MCQ], domain: str, difficulty: str, source: str, custom_prompt: str = None,
+              context: str = None, embedding: List[float] = None):
+        """Store a generated MCQ pool, replacing any smaller pool for the same request"""
+        if not mcqs:
+            return
+        
+        key, scope = self._make_key(domain, difficulty, source, custom_prompt, context)
+        existing = self._entries.get(key)
+        if existing and len(existing["mcqs"]) > len(mcqs):
+            return
+        
+        self._entries[key] = {
+            "mcqs": list(mcqs),
+            "scope": scope,
+            "embedding": self._normalize(embedding) if embedding is not None else None,
+            "created_at": time.time()
+        }
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            "items": len(self._entries)
+        }
+    
+    def _find_similar(self, scope: str, embedding: List[float], count: int) -> Optional[str]:
+        query = self._normalize(embedding)
+        best_key, best_score = None, self.similarity_threshold
+        
+        for key, entry in self._entries.items():
+            if entry["scope"] != scope or entry["embedding"] is None or len(entry["mcqs"]) < count:
+                continue
+            score = float(entry["embedding"] @ query)
+            if score >= best_score:
+                best_key, best_score = key, score
+        
+        return best_key
+    
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry["created_at"] < cutoff]
+        for key in expired:
+            del self._entries[key]
+    
+    @staticmethod
+    def _make_key(domain: str, difficulty: str, source: str, custom_prompt: str, context: str):
+        def normalize(value) -> str:
+            value = getattr(value, "value", value)
+            return " ".join(str(value or "").lower().split())
+        
+        context_hash = hashlib.sha256(context.encode("utf-8")).hexdigest() if context else ""
+        scope = "\0".join([normalize(difficulty), normalize(source), normalize(custom_prompt), context_hash])
+        key = hashlib.sha256(f"{normalize(domain)}\0{scope}".encode("utf-8")).hexdigest()
+        return key, scope
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
\ No newline at end of file
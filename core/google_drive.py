@@ -1,8 +1,9 @@
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 from config.settings import settings
 from utils.logger import logger
+import io
 
 class GoogleDriveUploader:
     def __init__(self):
@@ -17,13 +18,36 @@ class GoogleDriveUploader:
     
     def upload_file(self, file_path: str, file_name: str) -> str:
         """Upload file to Google Drive"""
+        return self._upload(MediaFileUpload(file_path, resumable=True), file_name)
+    
+    def upload_bytes(self, data: bytes, file_name: str, mime_type: str = 'application/pdf',
+                     idempotency_key: str = None) -> str:
+        """Upload in-memory file contents to Google Drive
+        
+        With an idempotency key, a file already uploaded under the same key
+        is returned instead of uploading a second copy.
+        """
+        media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mime_type, resumable=True)
+        return self._upload(media, file_name, idempotency_key)
+    
+    def _upload(self, media, file_name: str, idempotency_key: str = None) -> str:
         try:
             file_metadata = {
                 'name': file_name,
                 'parents': [settings.GOOGLE_DRIVE_FOLDER_ID]
             }
             
-            media = MediaFileUpload(file_path, resumable=True)
+            if idempotency_key:
+                existing = self.service.files().list(
+                    q=(f"appProperties has {{ key='idempotency_key' and value='{idempotency_key}' }} "
+                       "and trashed = false"),
+                    fields='files(id)',
+                    pageSize=1
+                ).execute().get('files', [])
+                if existing:
+                    logger.info(f"File already on Google Drive with ID: {existing[0]['id']}")
+                    return existing[0]['id']
+                file_metadata['appProperties'] = {'idempotency_key': idempotency_key}
             
             file = self.service.files().create(
                 body=file_metadata,
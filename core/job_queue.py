@@ -0,0 +1,168 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from models.job_models import Job, JobStatus
+from utils.concurrency import run_blocking
+from utils.logger import logger
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+class JobQueue:
+    """SQLite-backed job queue drained by a bounded pool of asyncio workers
+    
+    Database reads and writes run on the shared blocking pool so the event
+    loop never waits on SQLite.
+    """
+    
+    def __init__(self, db_path: str, workers: int = 4):
+        self.db_path = db_path
+        self.workers = workers
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+    
+    def register(self, kind: str, handler: JobHandler):
+        """Register the coroutine that runs jobs of the given kind"""
+        self._handlers[kind] = handler
+    
+    async def start(self):
+        """Start workers and re-enqueue jobs interrupted by a previous shutdown"""
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        
+        job_ids = await run_blocking(self._requeue_unfinished)
+        for job_id in job_ids:
+            self._queue.put_nowait(job_id)
+        
+        if job_ids:
+            logger.info(f"Recovered {len(job_ids)} unfinished jobs")
+        
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+    
+    async def stop(self):
+        """Cancel workers; unfinished jobs stay queued in the database"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> str:
+        """Persist a new job and hand it to the workers, returning its ID"""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        
+        job_id = str(uuid.uuid4())
+        await run_blocking(self._insert, job_id, kind, payload)
+        
+        await self._queue.put(job_id)
+        logger.info(f"Job {job_id} ({kind}) queued")
+        return job_id
+    
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Load a job by ID"""
+        return await run_blocking(self._get, job_id)
+    
+    def _insert(self, job_id: str, kind: str, payload: Dict[str, Any]):
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, JobStatus.QUEUED.value, json.dumps(payload), now, now)
+            )
+    
+    def _requeue_unfinished(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+            ).fetchall()
+        
+        for row in rows:
+            self._update(row["id"], status=JobStatus.QUEUED)
+        return [row["id"] for row in rows]
+    
+    def _get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        
+        if row is None:
+            return None
+        
+        return Job(
+            id=row["id"],
+            kind=row["kind"],
+            status=row["status"],
+            payload=json.loads(row["payload"]),
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"]
+        )
+    
+    def _update(self, job_id: str, status: JobStatus, result: Dict[str, Any] = None, error: str = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (
+                    status.value,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    datetime.now().isoformat(),
+                    job_id
+                )
+            )
+    
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await self.get(job_id)
+                if job is None:
+                    continue
+                
+                await run_blocking(self._update, job_id, status=JobStatus.RUNNING)
+                logger.info(f"Worker {worker_id} running job {job_id} ({job.kind})")
+                
+                try:
+                    result = await self._handlers[job.kind](job.payload)
+                    await run_blocking(self._update, job_id, status=JobStatus.COMPLETED, result=result)
+                    logger.info(f"Job {job_id} completed")
+                except asyncio.CancelledError:
+                    if self._stopping:
+                        raise
+                    # Cancelled from inside the job rather than by stop(); keep the worker alive
+                    logger.error(f"Job {job_id} was cancelled")
+                    await run_blocking(self._update, job_id, status=JobStatus.FAILED, error="Job was cancelled")
+                except Exception as e:
+                    logger.error(f"Job {job_id} failed: {e}")
+                    await run_blocking(self._update, job_id, status=JobStatus.FAILED, error=str(e))
+            finally:
+                self._queue.task_done()
\ No newline at end of file
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import AsyncIterator, Dict, List
+import httpx
+from config.settings import settings
+from utils.logger import logger
+
+Messages = List[Dict[str, str]]
+
+class LLMBackend:
+    """Interface implemented by every chat completion backend
+    
+    Calls are limited to max_concurrency at a time and fail with
+    asyncio.TimeoutError after timeout seconds. For streams, the timeout
+    covers the whole response.
+    """
+    
+    def __init__(self, model: str, timeout: float, max_concurrency: int):
+        self.model = model
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def complete(self, messages: Messages, max_tokens: int) -> str:
+        async with self._semaphore:
+            return await asyncio.wait_for(self._complete(messages, max_tokens), timeout=self.timeout)
+    
+    async def stream(self, messages: Messages, max_tokens: int) -> AsyncIterator[str]:
+        """Yield text deltas of the completion as they arrive"""
+        async with self._semaphore:
+            deadline = time.monotonic() + self.timeout
+            deltas = self._stream(messages, max_tokens).__aiter__()
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        delta = await asyncio.wait_for(deltas.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        return
+                    yield delta
+            finally:
+                await deltas.aclose()
+    
+    async def _complete(self, messages: Messages, max_tokens: int) -> str:
+        raise NotImplementedError
+    
+    async def _stream(self, messages: Messages, max_tokens: int) -> AsyncIterator[str]:
+        raise NotImplementedError
+        yield
+
+class HFRouterBackend(LLMBackend):
+    """Hugging Face inference router"""
+    
+    def __init__(self, model: str, timeout: float, max_concurrency: int):
+        from huggingface_hub import AsyncInferenceClient
+        
+        super().__init__(model, timeout, max_concurrency)
+        self.client = AsyncInferenceClient(api_key=settings.HF_API_TOKEN, timeout=timeout)
+    
+    async def _complete(self, messages: Messages, max_tokens: int) -> str:
+        completion = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens
+        )
+        return completion.choices[0].message.content or ""
+    
+    async def _stream(self, messages: Messages, max_tokens: int) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server exposing the OpenAI chat completions API, such as vLLM or llama.cpp
+    
+    base_url is the API root, e.g. http://localhost:8000/v1.
+    """
+    
+    def __init__(self, model: str, base_url: str, timeout: float, max_concurrency: int, api_key: str = None):
+        super().__init__(model, timeout, max_concurrency)
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else None
+        )
+    
+    async def _complete(self, messages: Messages, max_tokens: int) -> str:
+        response = await self.client.post(self.url, json={
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens
+        })
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"].get("content") or ""
+    
+    async def _stream(self, messages: Messages, max_tokens: int) -> AsyncIterator[str]:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        async with self.client.stream("POST", self.url, json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                
+                choices = json.loads(data).get("choices") or []
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if delta:
+                    yield delta
+
+class MockBackend(LLMBackend):
+    """Deterministic offline backend for load tests and benchmarks
+    
+    Replays responses recorded in a JSON array file, choosing one by a hash
+    of the user prompt. Without recordings it synthesizes a valid JSON
+    array with as many questions as the prompt asks for. Every response
+    takes latency seconds (plus or minus jitter), spread across its
+    streamed pieces.
+    """
+    
+    def __init__(self, model: str, timeout: float, max_concurrency: int, responses_path: str = None,
+                 latency: float = 0.5, jitter: float = 0.0):
+        super().__init__(model, timeout, max_concurrency)
+        self.latency = latency
+        self.jitter = jitter
+        self.responses: List[str] = []
+        
+        if responses_path:
+            with open(responses_path, "r", encoding="utf-8") as file:
+                self.responses = [
+                    response if isinstance(response, str) else json.dumps(response)
+                    for response in json.load(file)
+                ]
+            logger.info(f"Mock LLM replaying {len(self.responses)} recorded responses")
+    
+    async def _complete(self, messages: Messages, max_tokens: int) -> str:
+        response, seed = self._respond(messages)
+        await asyncio.sleep(self._delay(seed))
+        return response
+    
+    async def _stream(self, messages: Messages, max_tokens: int) -> AsyncIterator[str]:
+        response, seed = self._respond(messages)
+        pieces = [response[i:i + 64] for i in range(0, len(response), 64)] or [""]
+        pause = self._delay(seed) / len(pieces)
+        for piece in pieces:
+            await asyncio.sleep(pause)
+            yield piece
+    
+    def _respond(self, messages: Messages):
+        prompt = messages[-1]["content"] if messages else ""
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16], 16)
+        if self.responses:
+            return self.responses[seed % len(self.responses)], seed
+        return self._synthesize(prompt, seed), seed
+    
+    def _delay(self, seed: int) -> float:
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self.latency + random.Random(seed).uniform(-self.jitter, self.jitter))
+    
+    @staticmethod
+    def _synthesize(prompt: str, seed: int) -> str:
+        match = re.search(r"[Gg]enerate (\d+)", prompt)
+        count = int(match.group(1)) if match else 1
+        difficulty = next((level for level in ("easy", "medium", "hard") if level in prompt), "medium")
+        
+        questions = []
+        for i in range(count):
+            correct = (seed + i) % 4
+            questions.append({
+                "question": f"Mock question {seed % 100000}-{i + 1}?",
+                "options": [
+                    {"text": f"Option {'ABCD'[j]}", "is_correct": j == correct}
+                    for j in range(4)
+                ],
+                "explanation": f"Option {'ABCD'[correct]} is correct.",
+                "difficulty": difficulty
+            })
+        return json.dumps(questions)
+
+def create_llm_backend(model: str = None, timeout: float = None, max_concurrency: int = None) -> LLMBackend:
+    """Build the backend selected by settings.LLM_BACKEND
+    
+    timeout and max_concurrency default to LLM_TIMEOUT and LLM_MAX_CONCURRENCY.
+    """
+    model = model or settings.MAIN_MODEL
+    timeout = timeout or settings.LLM_TIMEOUT
+    max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+    
+    if settings.LLM_BACKEND == "hf_router":
+        return HFRouterBackend(model, timeout, max_concurrency)
+    if settings.LLM_BACKEND == "openai":
+        if not settings.LLM_BASE_URL:
+            raise ValueError("LLM_BASE_URL is required for the openai backend")
+        return OpenAICompatibleBackend(
+            model,
+            settings.LLM_BASE_URL,
+            timeout,
+            max_concurrency,
+            api_key=settings.LLM_API_KEY
+        )
+    if settings.LLM_BACKEND == "mock":
+        return MockBackend(
+            model,
+            timeout,
+            max_concurrency,
+            responses_path=settings.LLM_MOCK_RESPONSES,
+            latency=settings.LLM_MOCK_LATENCY,
+            jitter=settings.LLM_MOCK_JITTER
+        )
+    raise ValueError(f"Unsupported LLM backend: {settings.LLM_BACKEND}")
@@ -1,198 +1,315 @@
-import json
+import asyncio
 import re
-from huggingface_hub import InferenceClient
 from config.settings import settings
 from models.mcq_models import MCQ, DifficultyLevel
+from core.document_processor import DocumentProcessor
+from core.mcq_parser import MCQStreamParser, parse_mcq_objects
+from core.prompt_builder import PromptBuilder
+from core.llm_backends import create_llm_backend
+from core.model_router import ModelRouter
 from utils.logger import logger
-from typing import List
+from utils.text_normalizer import clean_text
+from utils.concurrency import run_blocking
+from typing import AsyncIterator, Callable, List, Optional
 
 class MCQGenerator:
     def __init__(self):
-        self.client = InferenceClient(api_key=settings.HF_API_TOKEN)
+        tiers = {
+            ModelRouter.PRIMARY: create_llm_backend(
+                settings.MAIN_MODEL, settings.MAIN_MODEL_TIMEOUT, settings.MAIN_MODEL_MAX_CONCURRENCY
+            )
+        }
+        if settings.FAST_MODEL and settings.FAST_MODEL != settings.MAIN_MODEL:
+            tiers[ModelRouter.FAST] = create_llm_backend(
+                settings.FAST_MODEL, settings.FAST_MODEL_TIMEOUT, settings.FAST_MODEL_MAX_CONCURRENCY
+            )
+        self.router = ModelRouter(tiers)
+        self.prompt_builder = PromptBuilder(settings.MAIN_MODEL)
+    
+    async def generate_mcqs_from_domain(self, domain: str, count: int, difficulty: DifficultyLevel) -> List[MCQ]:
+        return await self._generate_batched(
+            lambda batch_count, part, parts: self._create_domain_prompt(domain, batch_count, difficulty, part, parts),
+            count,
+            difficulty
+        )
     
-    def generate_mcqs_from_domain(self, domain: str, count: int, difficulty: DifficultyLevel) -> List[MCQ]:
-        prompt = self._create_domain_prompt(domain, count, difficulty)
+    async def generate_mcqs_from_context(self, context: str, count: int, difficulty: DifficultyLevel, custom_prompt: str = None) -> List[MCQ]:
+        chunks = await run_blocking(DocumentProcessor.chunk_text, context)
+        return await self.generate_mcqs_from_chunks(chunks, count, difficulty, custom_prompt)
+    
+    async def generate_mcqs_from_chunks(self, chunks: List[str], count: int, difficulty: DifficultyLevel,
+                                        custom_prompt: str = None, chunk_pages: List[int] = None) -> List[MCQ]:
+        """Generate MCQs with each sub-batch drawing on its own share of the document
         
-        try:
-            completion = self.client.chat.completions.create(
-                model=settings.MAIN_MODEL,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            response = completion.choices[0].message.content
-            return self._parse_mcq_response(response)
-            
-        except Exception as e:
-            logger.error(f"Error generating MCQs: {e}")
-            return []
+        When chunk_pages gives the page each chunk starts on, every MCQ is
+        tagged with the pages its sub-batch was generated from.
+        """
+        def annotate(mcqs: List[MCQ], part: int, parts: int):
+            if chunk_pages:
+                pages = sorted({chunk_pages[i] for i in self._select_chunk_indices(len(chunks), part, parts)})
+                for mcq in mcqs:
+                    mcq.source_pages = pages
+        
+        return await self._generate_batched(
+            lambda batch_count, part, parts: self._create_context_prompt(
+                self._select_chunks(chunks, part, parts), batch_count, difficulty, custom_prompt, part, parts
+            ),
+            count,
+            difficulty,
+            annotate
+        )
     
-    def generate_mcqs_from_context(self, context: str, count: int, difficulty: DifficultyLevel, custom_prompt: str = None) -> List[MCQ]:
-        prompt = self._create_context_prompt(context, count, difficulty, custom_prompt)
+    async def _generate_batched(self, build_prompt: Callable[[int, int, int], str], count: int,
+                                difficulty: DifficultyLevel,
+                                annotate: Callable[[List[MCQ], int, int], None] = None) -> List[MCQ]:
+        """Split a request into sub-batches, run them concurrently and merge the unique results"""
+        batch_counts = self._split_batches(count)
+        tier = self.router.select(difficulty, count)
+        semaphore = asyncio.Semaphore(settings.MCQ_BATCH_CONCURRENCY)
         
-        try:
-            completion = self.client.chat.completions.create(
-                model=settings.MAIN_MODEL,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            response = completion.choices[0].message.content
-            return self._parse_mcq_response(response)
+        async def run_batch(batch_count: int, part: int) -> List[MCQ]:
+            mcqs = []
+            async with semaphore:
+                # Re-request only what was lost to malformed or truncated output
+                for attempt in range(settings.MCQ_TOP_UP_RETRIES + 1):
+                    missing = batch_count - len(mcqs)
+                    if missing <= 0:
+                        break
+                    if attempt:
+                        logger.info(f"Re-requesting {missing} missing MCQs for batch {part}/{len(batch_counts)}")
+                    try:
+                        mcqs.extend(await self._complete(build_prompt(missing, part, len(batch_counts)), missing, tier))
+                    except Exception as e:
+                        logger.error(f"Error generating MCQ batch {part}/{len(batch_counts)}: {e}")
+                        break
             
-        except Exception as e:
-            logger.error(f"Error generating MCQs from context: {e}")
-            return []
+            if annotate:
+                annotate(mcqs, part, len(batch_counts))
+            return mcqs
+        
+        batches = await asyncio.gather(*(
+            run_batch(batch_count, part)
+            for part, batch_count in enumerate(batch_counts, 1)
+        ))
+        
+        mcqs = self._merge_unique(batches)
+        if len(batch_counts) > 1:
+            logger.info(f"Generated {len(mcqs)} unique MCQs from {len(batch_counts)} batches")
+        return mcqs[:count]
     
-    def _create_domain_prompt(self, domain: str, count: int, difficulty: DifficultyLevel) -> str:
-        return f"""
-        Generate {count} multiple choice questions about {domain} with {difficulty} difficulty level.
+    async def stream_mcqs_from_domain(self, domain: str, count: int, difficulty: DifficultyLevel) -> AsyncIterator[MCQ]:
+        """Yield MCQs about a domain as soon as each one has been generated"""
+        async for mcq in self._stream_batched(
+            lambda batch_count, part, parts: self._create_domain_prompt(domain, batch_count, difficulty, part, parts),
+            count,
+            difficulty
+        ):
+            yield mcq
+    
+    async def stream_mcqs_from_context(self, context: str, count: int, difficulty: DifficultyLevel, custom_prompt: str = None) -> AsyncIterator[MCQ]:
+        """Yield MCQs from a context as soon as each one has been generated"""
+        chunks = await run_blocking(DocumentProcessor.chunk_text, context)
+        async for mcq in self._stream_batched(
+            lambda batch_count, part, parts: self._create_context_prompt(
+                self._select_chunks(chunks, part, parts), batch_count, difficulty, custom_prompt, part, parts
+            ),
+            count,
+            difficulty
+        ):
+            yield mcq
+    
+    async def _stream_batched(self, build_prompt: Callable[[int, int, int], str], count: int,
+                              difficulty: DifficultyLevel) -> AsyncIterator[MCQ]:
+        """Stream all sub-batches concurrently, yielding unique MCQs in arrival order"""
+        batch_counts = self._split_batches(count)
+        tier = self.router.select(difficulty, count)
+        semaphore = asyncio.Semaphore(settings.MCQ_BATCH_CONCURRENCY)
+        queue: asyncio.Queue = asyncio.Queue()
         
-        IMPORTANT: Use only standard ASCII characters. Replace special characters as follows:
-        - Use regular dash (-) instead of em-dash
-        - Use regular apostrophe (') instead of curly quotes
-        - Use standard bullet points or numbers
-        - Avoid mathematical symbols that might not render properly
+        async def run_batch(batch_count: int, part: int):
+            try:
+                async with semaphore:
+                    received = 0
+                    for attempt in range(settings.MCQ_TOP_UP_RETRIES + 1):
+                        missing = batch_count - received
+                        if missing <= 0:
+                            break
+                        async for mcq in self._stream_completion(build_prompt(missing, part, len(batch_counts)), missing, tier):
+                            received += 1
+                            await queue.put(mcq)
+            except Exception as e:
+                logger.error(f"Error streaming MCQ batch {part}/{len(batch_counts)}: {e}")
+            finally:
+                # Marks this batch as finished
+                await queue.put(None)
         
-        Format each question as JSON:
-        {{
-            "question": "Question text using standard characters only",
-            "options": [
-                {{"text": "Option A", "is_correct": false}},
-                {{"text": "Option B", "is_correct": true}},
-                {{"text": "Option C", "is_correct": false}},
-                {{"text": "Option D", "is_correct": false}}
-            ],
-            "explanation": "Brief explanation of correct answer using standard characters",
-            "difficulty": "{difficulty}"
-        }}
+        tasks = [
+            asyncio.create_task(run_batch(batch_count, part))
+            for part, batch_count in enumerate(batch_counts, 1)
+        ]
         
-        Return as JSON array of questions. Ensure all text uses standard ASCII characters only.
-        """
+        seen = set()
+        remaining = len(tasks)
+        yielded = 0
+        try:
+            while remaining and yielded < count:
+                mcq = await queue.get()
+                if mcq is None:
+                    remaining -= 1
+                    continue
+                
+                key = self._question_key(mcq.question)
+                if key and key not in seen:
+                    seen.add(key)
+                    yielded += 1
+                    yield mcq
+        finally:
+            for task in tasks:
+                task.cancel()
     
-    def _create_context_prompt(self, context: str, count: int, difficulty: DifficultyLevel, custom_prompt: str) -> str:
-        # Clean the context first
-        cleaned_context = self._clean_text(context)
+    async def _stream_completion(self, prompt: str, count: int, tier: str) -> AsyncIterator[MCQ]:
+        parser = MCQStreamParser()
+        messages = self.prompt_builder.messages(prompt)
+        async for delta, model in self.router.stream(tier, messages, self.prompt_builder.max_tokens(count)):
+            for data in parser.feed(delta):
+                mcq = self._try_build_mcq(data, parser.dropped)
+                if mcq:
+                    mcq.model = model
+                    yield mcq
         
-        base_prompt = f"""
-        Based on the following context, generate {count} multiple choice questions with {difficulty} difficulty:
+        parser.finish()
+        if parser.dropped:
+            logger.warning(f"Dropped {len(parser.dropped)} streamed MCQs: {'; '.join(parser.dropped)}")
+    
+    async def _complete(self, prompt: str, count: int, tier: str) -> List[MCQ]:
+        response, model = await self.router.complete(
+            tier, self.prompt_builder.messages(prompt), self.prompt_builder.max_tokens(count)
+        )
+        mcqs = self._parse_mcq_response(response)
+        for mcq in mcqs:
+            mcq.model = model
+        return mcqs
+    
+    @staticmethod
+    def _select_chunks(chunks: List[str], part: int, parts: int) -> str:
+        return "\n\n".join(chunks[i] for i in MCQGenerator._select_chunk_indices(len(chunks), part, parts))
+    
+    @staticmethod
+    def _select_chunk_indices(chunk_count: int, part: int, parts: int) -> List[int]:
+        """Pick evenly spaced chunks from this part's slice of the document"""
+        if chunk_count == 0:
+            return []
         
-        Context: {cleaned_context[:2000]}...
+        start = (part - 1) * chunk_count // parts
+        end = max(start + 1, part * chunk_count // parts)
+        segment = list(range(start, end))
         
-        {custom_prompt if custom_prompt else ''}
+        limit = settings.CONTEXT_CHUNKS_PER_BATCH
+        if len(segment) > limit:
+            stride = len(segment) / limit
+            segment = [segment[int(i * stride)] for i in range(limit)]
         
-        IMPORTANT: Use only standard ASCII characters in your response. Replace special characters as follows:
-        - Use regular dash (-) instead of em-dash
-        - Use regular apostrophe (') instead of curly quotes
-        - Use standard bullet points or numbers
-        - Avoid mathematical symbols that might not render properly
-        """
-        return base_prompt + self._get_format_instructions(difficulty)
+        return segment
     
-    def _get_format_instructions(self, difficulty: DifficultyLevel) -> str:
-        return f"""
-        Format as JSON array with this structure:
-        [{{
-            "question": "Question text using standard characters only",
-            "options": [
-                {{"text": "Option A", "is_correct": false}},
-                {{"text": "Option B", "is_correct": true}},
-                {{"text": "Option C", "is_correct": false}},
-                {{"text": "Option D", "is_correct": false}}
-            ],
-            "explanation": "Brief explanation using standard characters",
-            "difficulty": "{difficulty}"
-        }}]
+    @staticmethod
+    def _split_batches(count: int) -> List[int]:
+        batch_size = max(1, settings.MCQ_BATCH_SIZE)
+        batch_counts = [batch_size] * (count // batch_size)
+        if count % batch_size:
+            batch_counts.append(count % batch_size)
+        return batch_counts
+    
+    @staticmethod
+    def _question_key(question: str) -> str:
+        return " ".join(re.sub(r"[^a-z0-9]+", " ", question.lower()).split())
+    
+    @staticmethod
+    def _merge_unique(batches: List[List[MCQ]]) -> List[MCQ]:
+        """Merge batches, dropping questions whose normalized text was already seen"""
+        seen = set()
+        merged = []
+        for batch in batches:
+            for mcq in batch:
+                key = MCQGenerator._question_key(mcq.question)
+                if key and key not in seen:
+                    seen.add(key)
+                    merged.append(mcq)
+        return merged
+    
+    def _batch_hint(self, part: int, parts: int) -> str:
+        if parts <= 1:
+            return ""
+        return (
+            f"This is part {part} of {parts} of a larger question set. "
+            f"Focus on subtopics likely to differ from the other parts so that no question repeats."
+        )
+    
+    def _create_domain_prompt(self, domain: str, count: int, difficulty: DifficultyLevel, part: int = 1, parts: int = 1) -> str:
+        return f"Generate {count} multiple choice questions about {domain} with {difficulty} difficulty. {self._batch_hint(part, parts)}".rstrip()
+    
+    def _create_context_prompt(self, context: str, count: int, difficulty: DifficultyLevel, custom_prompt: str, part: int = 1, parts: int = 1) -> str:
+        # Clean the context first, then fit it to the prompt budget
+        packed_context = self.prompt_builder.pack_context(self._clean_text(context))
         
-        Ensure all text uses standard ASCII characters only.
-        """
+        instructions = [
+            f"Based on the context above, generate {count} multiple choice questions with {difficulty} difficulty.",
+            custom_prompt or "",
+            self._batch_hint(part, parts)
+        ]
+        return f"Context:\n{packed_context}\n\n" + " ".join(line for line in instructions if line)
     
     def _clean_text(self, text: str) -> str:
         """Clean text by replacing problematic characters with standard ones"""
-        if not text:
-            return ""
-        
-        # Dictionary of character replacements
-        replacements = {
-            # Em-dash and en-dash
-            '—': '-',
-            '–': '-',
-            '―': '-',
-            
-            # Quotes
-            '"': '"',
-            '"': '"',
-            ''': "'",
-            ''': "'",
-            
-            # Bullets and special symbols
-            '•': '*',
-            '◦': '-',
-            '▪': '*',
-            '▫': '-',
-            '■': '*',
-            '□': '-',
-            
-            # Mathematical symbols
-            '×': 'x',
-            '÷': '/',
-            '±': '+/-',
-            '∑': 'Sum',
-            '∏': 'Product',
-            '∞': 'infinity',
-            '≈': '~=',
-            '≤': '<=',
-            '≥': '>=',
-            '≠': '!=',
-            
-            # Other problematic characters
-            '…': '...',
-            '™': '(TM)',
-            '©': '(C)',
-            '®': '(R)',
-        }
-        
-        # Apply replacements
-        cleaned_text = text
-        for old_char, new_char in replacements.items():
-            cleaned_text = cleaned_text.replace(old_char, new_char)
-        
-        # Remove any remaining non-ASCII characters
-        cleaned_text = ''.join(char if ord(char) < 128 else '?' for char in cleaned_text)
-        
-        return cleaned_text
+        return clean_text(text)
     
     def _parse_mcq_response(self, response: str) -> List[MCQ]:
+        """Recover every well-formed MCQ from a response, even if other items are broken"""
         try:
-            # Clean the response first
-            cleaned_response = self._clean_text(response)
+            # Parse the raw response; cleaning it first would turn curly quotes
+            # inside string values into bare '"' and break the JSON
+            mcq_data, dropped = parse_mcq_objects(response)
             
-            # Extract JSON from response
-            start_idx = cleaned_response.find('[')
-            end_idx = cleaned_response.rfind(']') + 1
+            # Clean each MCQ data before creating objects
+            mcqs = []
+            for mcq in mcq_data:
+                built = self._try_build_mcq(mcq, dropped)
+                if built:
+                    mcqs.append(built)
             
-            if start_idx != -1 and end_idx != -1:
-                json_str = cleaned_response[start_idx:end_idx]
-                mcq_data = json.loads(json_str)
-                
-                # Clean each MCQ data before creating objects
-                cleaned_mcqs = []
-                for mcq in mcq_data:
-                    cleaned_mcq = {
-                        "question": self._clean_text(mcq.get("question", "")),
-                        "options": [
-                            {
-                                "text": self._clean_text(option.get("text", "")),
-                                "is_correct": option.get("is_correct", False)
-                            }
-                            for option in mcq.get("options", [])
-                        ],
-                        "explanation": self._clean_text(mcq.get("explanation", "")),
-                        "difficulty": mcq.get("difficulty", "medium")
-                    }
-                    cleaned_mcqs.append(MCQ(**cleaned_mcq))
-                
-                return cleaned_mcqs
+            if dropped:
+                logger.warning(f"Dropped {len(dropped)} MCQs from response: {'; '.join(dropped)}")
+            
+            return mcqs
             
         except Exception as e:
             logger.error(f"Error parsing MCQ response: {e}")
         
-        return []
\ No newline at end of file
+        return []
+    
+    def _try_build_mcq(self, mcq: dict, dropped: List[str]) -> Optional[MCQ]:
+        try:
+            built = self._build_mcq(mcq)
+        except Exception as e:
+            dropped.append(f"invalid MCQ ({e.__class__.__name__})")
+            return None
+        
+        if not built.question or len(built.options) < 2:
+            dropped.append("incomplete MCQ")
+            return None
+        
+        return built
+    
+    def _build_mcq(self, mcq: dict) -> MCQ:
+        cleaned_mcq = {
+            "question": self._clean_text(mcq.get("question", "")),
+            "options": [
+                {
+                    "text": self._clean_text(option.get("text", "")),
+                    "is_correct": option.get("is_correct", False)
+                }
+                for option in mcq.get("options", [])
+            ],
+            "explanation": self._clean_text(mcq.get("explanation", "")),
+            "difficulty": mcq.get("difficulty", "medium")
+        }
+        return MCQ(**cleaned_mcq)
\ No newline at end of file
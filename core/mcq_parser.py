@@ -0,0 +1,179 @@
+import json
+import re
+from typing import List, Tuple
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_PYTHON_LITERAL = re.compile(r"([:\[,]\s*)(True|False|None)\b")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+class _Frame:
+    __slots__ = ("start", "is_item", "has_items", "key_start")
+    
+    def __init__(self, start: int):
+        self.start = start
+        # An item is an object whose first key is "question"
+        self.is_item = False
+        self.has_items = False
+        # Where the first key's string starts, while it is still being read
+        self.key_start = None
+
+class MCQStreamParser:
+    """Incrementally extracts MCQ objects from streamed model output
+    
+    Text is fed in arbitrary pieces. An object whose first key is
+    "question" is returned by feed() as soon as its closing brace arrives,
+    at any depth, so items inside a wrapper such as {"questions": [...]}
+    come out one by one and survive the wrapper being truncated. Other
+    top-level objects are returned when they close. Anything outside an
+    object, such as code fences or prose around the array, is skipped.
+    
+    If a new item opens while another is still open, the open one lost
+    its closing brace: it is dropped and parsing resumes at the new item,
+    so one fault does not swallow the rest of the output. Objects that
+    fail to parse are passed through a few repairs for common model faults
+    (trailing commas, Python literals, raw newlines inside strings) and
+    recorded in dropped if they still cannot be read.
+    """
+    
+    def __init__(self):
+        self.dropped: List[str] = []
+        self._buffer = ""
+        self._pos = 0
+        self._frames: List[_Frame] = []
+        self._expect_key = False
+        self._in_string = False
+        self._escape = False
+        self._items = 0
+    
+    def feed(self, text: str) -> List[dict]:
+        """Consume more output and return the objects completed by it"""
+        self._buffer += text
+        objects = []
+        
+        buffer = self._buffer
+        frames = self._frames
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if frames[-1].key_start is not None:
+                        self._first_key_read(buffer[frames[-1].key_start + 1:pos])
+                continue
+            
+            if self._expect_key and not char.isspace():
+                self._expect_key = False
+                if char == '"':
+                    frames[-1].key_start = pos
+            
+            if char == '"':
+                if frames:
+                    self._in_string = True
+            elif char == "{":
+                frames.append(_Frame(pos))
+                self._expect_key = True
+            elif char == "}" and frames:
+                frame = frames.pop()
+                self._expect_key = False
+                if frame.is_item:
+                    objects.extend(self._decode(buffer[frame.start:pos + 1]))
+                    for parent in frames:
+                        parent.has_items = True
+                elif not frames and not frame.has_items:
+                    objects.extend(self._decode(buffer[frame.start:pos + 1]))
+        
+        # Keep only the unfinished objects, if any
+        if frames:
+            offset = frames[0].start
+            self._buffer = buffer[offset:]
+            for frame in frames:
+                frame.start -= offset
+                if frame.key_start is not None:
+                    frame.key_start -= offset
+        else:
+            self._buffer = ""
+        self._pos = len(self._buffer)
+        
+        return objects
+    
+    def finish(self) -> List[dict]:
+        """Signal the end of output, recording any object cut off by truncation"""
+        open_items = [frame for frame in self._frames if frame.is_item]
+        if open_items or (self._frames and not self._frames[0].has_items):
+            self._items += 1
+            self.dropped.append(f"item {self._items}: truncated")
+        self._buffer = ""
+        self._pos = 0
+        self._frames = []
+        self._expect_key = False
+        self._in_string = False
+        self._escape = False
+        return []
+    
+    def _first_key_read(self, key: str):
+        frames = self._frames
+        frame = frames[-1]
+        frame.key_start = None
+        if key != "question":
+            return
+        
+        frame.is_item = True
+        open_item = next((i for i in range(len(frames) - 2, -1, -1) if frames[i].is_item), None)
+        if open_item is not None:
+            # Items never nest, so the open one is missing its closing brace
+            self._items += 1
+            self.dropped.append(f"item {self._items}: missing closing brace")
+            for parent in frames[:open_item]:
+                parent.has_items = True
+            del frames[open_item:-1]
+    
+    def _decode(self, fragment: str) -> List[dict]:
+        self._items += 1
+        data, error = _loads_with_repair(fragment)
+        
+        if data is None:
+            self.dropped.append(f"item {self._items}: {error}")
+            return []
+        
+        # Some responses wrap the array, e.g. {"questions": [...]}
+        if "question" not in data:
+            for value in data.values():
+                if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+                    return value
+        
+        return [data]
+
+def parse_mcq_objects(text: str) -> Tuple[List[dict], List[str]]:
+    """Extract every readable MCQ object from a complete response
+    
+    Returns the objects and a description of each item that was dropped.
+    """
+    parser = MCQStreamParser()
+    objects = parser.feed(text)
+    parser.finish()
+    return objects, parser.dropped
+
+def _loads_with_repair(fragment: str):
+    try:
+        return json.loads(fragment), None
+    except json.JSONDecodeError as e:
+        error = f"invalid JSON ({e.msg})"
+    
+    repaired = _TRAILING_COMMA.sub(r"\1", fragment)
+    repaired = _PYTHON_LITERAL.sub(lambda match: match.group(1) + _PYTHON_LITERALS[match.group(2)], repaired)
+    
+    try:
+        return json.loads(repaired), None
+    except json.JSONDecodeError:
+        pass
+    
+    try:
+        # strict=False accepts raw control characters such as newlines inside strings
+        return json.loads(repaired, strict=False), None
+    except json.JSONDecodeError:
+        return None, error
\ No newline at end of file
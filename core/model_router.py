@@ -0,0 +1,130 @@
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Tuple
+from config.settings import settings
+from core.llm_backends import LLMBackend, Messages
+from models.mcq_models import DifficultyLevel
+from utils.logger import logger
+
+class _TierStats:
+    """Latency and outcome of a tier's recent calls, kept for window_seconds"""
+    
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._samples: deque = deque()
+    
+    def record(self, latency: float, ok: bool):
+        self._samples.append((time.monotonic(), latency, ok))
+        self._trim()
+    
+    def snapshot(self) -> dict:
+        self._trim()
+        latencies = sorted(latency for _, latency, ok in self._samples if ok)
+        errors = sum(1 for _, _, ok in self._samples if not ok)
+        total = len(self._samples)
+        return {
+            "calls": total,
+            "error_rate": errors / total if total else 0.0,
+            "p95_latency": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+        }
+    
+    def _trim(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+class ModelRouter:
+    """Pick a model tier per request and fall back when the primary struggles
+    
+    Easy requests, and medium requests of at most ROUTER_SMALL_REQUEST
+    questions, go to the fast tier. Everything else goes to the primary
+    tier, unless the primary is unhealthy or overloaded:
+    - its p95 latency or error rate over the last ROUTER_WINDOW_SECONDS
+      crossed a threshold, or
+    - ROUTER_MAX_IN_FLIGHT calls are already running on it.
+    A call that fails on one tier is retried once on the other.
+    """
+    
+    PRIMARY = "primary"
+    FAST = "fast"
+    
+    def __init__(self, tiers: Dict[str, LLMBackend]):
+        self.tiers = tiers
+        self._stats = {name: _TierStats(settings.ROUTER_WINDOW_SECONDS) for name in tiers}
+        self._in_flight = {name: 0 for name in tiers}
+    
+    def select(self, difficulty: DifficultyLevel, count: int) -> str:
+        if self.FAST not in self.tiers:
+            return self.PRIMARY
+        
+        if difficulty == DifficultyLevel.EASY:
+            return self.FAST
+        if difficulty == DifficultyLevel.MEDIUM and count <= settings.ROUTER_SMALL_REQUEST:
+            return self.FAST
+        
+        reason = self._degraded_reason(self.PRIMARY)
+        if reason:
+            logger.info(f"Routing {difficulty} request for {count} MCQs to the fast tier: {reason}")
+            return self.FAST
+        return self.PRIMARY
+    
+    async def complete(self, tier: str, messages: Messages, max_tokens: int) -> Tuple[str, str]:
+        """Run a completion, returning the response and the model that produced it"""
+        for attempt, name in enumerate(self._attempt_order(tier)):
+            backend = self.tiers[name]
+            started = time.monotonic()
+            self._in_flight[name] += 1
+            try:
+                response = await backend.complete(messages, max_tokens)
+                self._stats[name].record(time.monotonic() - started, True)
+                return response, backend.model
+            except Exception as e:
+                self._stats[name].record(time.monotonic() - started, False)
+                if attempt or len(self.tiers) == 1:
+                    raise
+                logger.warning(f"{backend.model} failed, falling back: {e.__class__.__name__}: {e}")
+            finally:
+                self._in_flight[name] -= 1
+    
+    async def stream(self, tier: str, messages: Messages, max_tokens: int) -> AsyncIterator[Tuple[str, str]]:
+        """Yield (delta, model) pairs; falls back only if nothing was received yet"""
+        for attempt, name in enumerate(self._attempt_order(tier)):
+            backend = self.tiers[name]
+            started = time.monotonic()
+            received = False
+            self._in_flight[name] += 1
+            try:
+                async for delta in backend.stream(messages, max_tokens):
+                    received = True
+                    yield delta, backend.model
+                self._stats[name].record(time.monotonic() - started, True)
+                return
+            except Exception as e:
+                self._stats[name].record(time.monotonic() - started, False)
+                if received or attempt or len(self.tiers) == 1:
+                    raise
+                logger.warning(f"{backend.model} stream failed, falling back: {e.__class__.__name__}: {e}")
+            finally:
+                self._in_flight[name] -= 1
+    
+    def stats(self) -> dict:
+        return {
+            name: {"model": backend.model, "in_flight": self._in_flight[name], **self._stats[name].snapshot()}
+            for name, backend in self.tiers.items()
+        }
+    
+    def _attempt_order(self, tier: str) -> List[str]:
+        return [tier] + [name for name in (self.PRIMARY, self.FAST) if name != tier and name in self.tiers]
+    
+    def _degraded_reason(self, tier: str) -> str:
+        if self._in_flight[tier] >= settings.ROUTER_MAX_IN_FLIGHT:
+            return f"{self._in_flight[tier]} calls in flight"
+        
+        snapshot = self._stats[tier].snapshot()
+        if snapshot["calls"] < settings.ROUTER_MIN_SAMPLES:
+            return ""
+        if snapshot["p95_latency"] > settings.ROUTER_P95_LATENCY:
+            return f"p95 latency {snapshot['p95_latency']:.1f}s"
+        if snapshot["error_rate"] > settings.ROUTER_ERROR_RATE:
+            return f"error rate {snapshot['error_rate']:.0%}"
+        return ""
@@ -0,0 +1,108 @@
+import re
+import threading
+from typing import Dict, List
+from config.settings import settings
+from utils.logger import logger
+
+# Format and character rules are sent once as a short system message instead
+# of being repeated in every user prompt
+SYSTEM_MESSAGE = (
+    "You write multiple choice questions. Reply with only a JSON array, one object per question: "
+    '{"question": str, "options": [{"text": str, "is_correct": bool}] x4 with exactly one true, '
+    '"explanation": str (brief), "difficulty": the requested level}. '
+    "Use plain ASCII only: - not dashes, ' not curly quotes, no special math symbols."
+)
+
+# Words and punctuation marks, used to approximate tokens when the model tokenizer is unavailable
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"[.!?]\s|\n")
+
+class PromptBuilder:
+    """Chat messages sized with the model's tokenizer
+    
+    Context is packed into PROMPT_CONTEXT_TOKENS and cut at a sentence
+    boundary where possible. max_tokens is set from the number of
+    questions requested.
+    """
+    
+    def __init__(self, model: str = None):
+        self.model = model or settings.MAIN_MODEL
+        self._tokenizer = None
+        self._tokenizer_loaded = False
+        self._lock = threading.Lock()
+    
+    def load_tokenizer(self):
+        """Load the model tokenizer, falling back to a word/punctuation approximation
+        
+        PROMPT_TOKENIZER picks the source: "auto" downloads the tokenizer
+        if it is not cached, "local" only uses a cached copy and "off" always
+        approximates. The mock backend and HF_HUB_OFFLINE never download.
+        """
+        with self._lock:
+            if self._tokenizer_loaded:
+                return self._tokenizer
+            
+            mode = settings.PROMPT_TOKENIZER
+            if mode == "auto" and settings.LLM_BACKEND == "mock":
+                mode = "off"
+            
+            if mode == "off":
+                logger.info(f"Approximating token counts for {self.model}")
+            else:
+                try:
+                    from transformers import AutoTokenizer
+                    self._tokenizer = AutoTokenizer.from_pretrained(
+                        self.model,
+                        local_files_only=mode == "local" or settings.HF_HUB_OFFLINE
+                    )
+                    logger.info(f"Loaded tokenizer for {self.model}")
+                except Exception as e:
+                    logger.warning(f"Tokenizer for {self.model} unavailable, approximating token counts: {e}")
+            self._tokenizer_loaded = True
+            return self._tokenizer
+    
+    def messages(self, prompt: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def max_tokens(self, count: int) -> int:
+        """Output budget for count questions"""
+        return min(
+            settings.MAX_OUTPUT_TOKENS,
+            count * settings.TOKENS_PER_QUESTION + settings.RESPONSE_TOKEN_OVERHEAD
+        )
+    
+    def count_tokens(self, text: str) -> int:
+        return len(self._token_ends(text))
+    
+    def pack_context(self, context: str, budget: int = None) -> str:
+        """Trim context to at most budget tokens, preferring to end on a sentence"""
+        budget = budget or settings.PROMPT_CONTEXT_TOKENS
+        ends = self._token_ends(context)
+        if len(ends) <= budget:
+            return context
+        
+        cut = ends[budget - 1]
+        # Back off to the last sentence end, unless that would drop over a fifth of the budget
+        boundary = None
+        for match in _SENTENCE_END.finditer(context, 0, cut):
+            boundary = match.start() + 1
+        if boundary and boundary >= cut * 0.8:
+            cut = boundary
+        
+        logger.info(f"Packed context from {len(ends)} to {budget} tokens")
+        return context[:cut].rstrip()
+    
+    def _token_ends(self, text: str) -> List[int]:
+        """Character offset at which each token of text ends"""
+        if not text:
+            return []
+        
+        tokenizer = self.load_tokenizer()
+        if tokenizer is not None and getattr(tokenizer, "is_fast", False):
+            encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+            return [end for _, end in encoding["offset_mapping"]]
+        
+        return [match.end() for match in _TOKEN_PATTERN.finditer(text)]
@@ -0,0 +1,141 @@
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+from models.mcq_models import MCQ
+from utils.logger import logger
+
+class QuestionBank:
+    """Persistent store of generated MCQs indexed by domain, difficulty and source
+    
+    Every question is stored with its embedding so that near-duplicates can
+    be rejected on insert and kept apart when sampling.
+    """
+    
+    def __init__(self, db_path: str, duplicate_similarity: float = 0.95):
+        self.duplicate_similarity = duplicate_similarity
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS questions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    domain TEXT NOT NULL,
+                    difficulty TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    question_key TEXT NOT NULL,
+                    mcq TEXT NOT NULL,
+                    embedding BLOB,
+                    created_at TEXT NOT NULL,
+                    UNIQUE (domain, difficulty, source, question_key)
+                )
+            """)
+    
+    def add(self, mcqs: List[MCQ], domain: str, difficulty: str, source: str,
+            embeddings: List[List[float]] = None) -> int:
+        """Store new questions, skipping exact and near duplicates; returns how many were added"""
+        scope = self._scope(domain, difficulty, source)
+        embeddings = embeddings or [None] * len(mcqs)
+        
+        with self._lock:
+            existing = [vector for _, vector in self._load(scope)]
+            rows = []
+            
+            for mcq, embedding in zip(mcqs, embeddings):
+                vector = self._normalize(embedding) if embedding is not None else None
+                if vector is not None and self._is_duplicate(vector, existing):
+                    continue
+                if vector is not None:
+                    existing.append(vector)
+                
+                rows.append((
+                    *scope,
+                    self._question_key(mcq.question),
+                    json.dumps(mcq.model_dump(mode="json")),
+                    vector.tobytes() if vector is not None else None,
+                    datetime.now().isoformat()
+                ))
+            
+            with self._conn:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    """INSERT OR IGNORE INTO questions
+                       (domain, difficulty, source, question_key, mcq, embedding, created_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    rows
+                )
+                added = self._conn.total_changes - before
+        
+        if added:
+            logger.info(f"Added {added} questions to bank for {scope[0]} ({scope[1]}, {scope[2]})")
+        return added
+    
+    def sample(self, domain: str, difficulty: str, source: str, count: int) -> Optional[List[MCQ]]:
+        """Randomly pick count mutually non-duplicate questions, or None if the bank cannot supply them"""
+        with self._lock:
+            candidates = self._load(self._scope(domain, difficulty, source))
+        
+        if len(candidates) < count:
+            return None
+        
+        random.shuffle(candidates)
+        selected, selected_vectors = [], []
+        for mcq, vector in candidates:
+            if vector is not None and self._is_duplicate(vector, selected_vectors):
+                continue
+            selected.append(mcq)
+            if vector is not None:
+                selected_vectors.append(vector)
+            if len(selected) == count:
+                return selected
+        
+        return None
+    
+    def size(self, domain: str, difficulty: str, source: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM questions WHERE domain = ? AND difficulty = ? AND source = ?",
+                self._scope(domain, difficulty, source)
+            ).fetchone()[0]
+    
+    def _load(self, scope: tuple) -> list:
+        rows = self._conn.execute(
+            "SELECT mcq, embedding FROM questions WHERE domain = ? AND difficulty = ? AND source = ?",
+            scope
+        ).fetchall()
+        return [
+            (MCQ(**json.loads(mcq)), np.frombuffer(blob, dtype=np.float32) if blob else None)
+            for mcq, blob in rows
+        ]
+    
+    def _is_duplicate(self, vector: np.ndarray, others: List[np.ndarray]) -> bool:
+        if not others:
+            return False
+        return float(np.max(np.vstack(others) @ vector)) >= self.duplicate_similarity
+    
+    @staticmethod
+    def _scope(domain: str, difficulty: str, source: str) -> tuple:
+        def normalize(value) -> str:
+            value = getattr(value, "value", value)
+            return " ".join(str(value or "").lower().split())
+        return normalize(domain), normalize(difficulty), normalize(source)
+    
+    @staticmethod
+    def _question_key(question: str) -> str:
+        return " ".join(re.sub(r"[^a-z0-9]+", " ", question.lower()).split())
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
\ No newline at end of file
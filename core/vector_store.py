@@ -1,63 +1,141 @@
-from pinecone import Pinecone
-from huggingface_hub import InferenceClient
+import asyncio
+from huggingface_hub import AsyncInferenceClient
 from typing import List
 from config.settings import settings
 from utils.logger import logger
+from utils.concurrency import run_blocking
+from core.embedding_cache import EmbeddingCache
+from core.vector_backends import create_vector_backend
 import hashlib
 import uuid
 
+# Pinecone caps metadata at 40KB per vector
+MAX_METADATA_TEXT = 4000
+
 class VectorStore:
     def __init__(self):
-        # Initialize Pinecone client with the new API
-        self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-        self.index = self.pc.Index(settings.PINECONE_INDEX_NAME)
-        self.embedding_client = InferenceClient(
+        self.backend = create_vector_backend()
+        self.embedding_client = AsyncInferenceClient(
             api_key=settings.HF_API_TOKEN
         )
+        self.embedding_cache = EmbeddingCache(
+            settings.EMBEDDING_CACHE_PATH,
+            memory_items=settings.EMBEDDING_CACHE_MEMORY_ITEMS,
+            disk_items=settings.EMBEDDING_CACHE_DISK_ITEMS
+        )
     
-    def add_document(self, text: str, metadata: dict = None):
+    async def add_document(self, text: str, metadata: dict = None):
         """Add document to vector store"""
+        doc_ids = await self.add_documents([text], [metadata or {}])
+        return doc_ids[0] if doc_ids else None
+    
+    async def add_documents(self, texts: List[str], metadatas: List[dict] = None) -> List[str]:
+        """Embed texts in batches and upsert them to the vector store in pages
+        
+        Embedding requests run EMBEDDING_CONCURRENCY batches at a time while
+        the previous page is still being upserted.
+        """
         try:
-            # Create embeddings
-            embedding = self.embedding_client.feature_extraction(
-                text,
-                model=settings.EMBEDDING_MODEL
-            )
+            metadatas = metadatas or [{} for _ in texts]
+            doc_ids = [str(uuid.uuid4()) for _ in texts]
+            batch_size = settings.EMBEDDING_BATCH_SIZE
+            wave_size = batch_size * settings.EMBEDDING_CONCURRENCY
+            page_size = settings.UPSERT_PAGE_SIZE
+            
+            pending = []
+            upsert_task = None
             
-            # Generate unique ID
-            doc_id = str(uuid.uuid4())
+            for wave_start in range(0, len(texts), wave_size):
+                wave_end = min(wave_start + wave_size, len(texts))
+                batches = await asyncio.gather(*(
+                    self._embed_batch(texts[start:min(start + batch_size, wave_end)])
+                    for start in range(wave_start, wave_end, batch_size)
+                ))
+                embeddings = [embedding for batch in batches for embedding in batch]
+                
+                pending.extend(
+                    {
+                        "id": doc_ids[i],
+                        "values": embedding,
+                        "metadata": {**metadatas[i], "text": texts[i][:MAX_METADATA_TEXT]}
+                    }
+                    for i, embedding in zip(range(wave_start, wave_end), embeddings)
+                )
+                
+                while len(pending) >= page_size or (pending and wave_end == len(texts)):
+                    page, pending = pending[:page_size], pending[page_size:]
+                    if upsert_task:
+                        await upsert_task
+                    upsert_task = asyncio.create_task(run_blocking(self.backend.upsert, page))
             
-            # Upsert to Pinecone
-            self.index.upsert([
-                {
-                    "id": doc_id,
-                    "values": embedding,
-                    "metadata": metadata or {"text": text[:500]}
-                }
-            ])
+            if upsert_task:
+                await upsert_task
+            await run_blocking(self.backend.flush)
             
-            logger.info(f"Document added to vector store with ID: {doc_id}")
-            return doc_id
+            logger.info(f"Added {len(doc_ids)} documents to vector store")
+            return doc_ids
             
         except Exception as e:
-            logger.error(f"Error adding document to vector store: {e}")
-            return None
+            logger.error(f"Error adding documents to vector store: {e}")
+            return []
+    
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in model-sized batches, using the embedding cache"""
+        embeddings = []
+        for start in range(0, len(texts), settings.EMBEDDING_BATCH_SIZE):
+            embeddings.extend(await self._embed_batch(texts[start:start + settings.EMBEDDING_BATCH_SIZE]))
+        return embeddings
+    
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, only calling the embedding model for cache misses"""
+        embeddings = await run_blocking(self.embedding_cache.get_many, settings.EMBEDDING_MODEL, texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            fresh = await self._fetch_embeddings(missing_texts)
+            await run_blocking(self.embedding_cache.put_many, settings.EMBEDDING_MODEL, missing_texts, fresh)
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+        
+        return embeddings
+    
+    async def _fetch_embeddings(self, texts: List[str]) -> List[List[float]]:
+        embeddings = await self.embedding_client.feature_extraction(
+            texts,
+            model=settings.EMBEDDING_MODEL
+        )
+        
+        # A single input comes back as one flat vector
+        if embeddings.ndim == 1:
+            embeddings = embeddings.reshape(1, -1)
+        
+        return embeddings.tolist()
+    
+    async def search_many(self, queries: List[str], top_k: int = 3) -> List[List[str]]:
+        """Search for similar documents for several queries at once"""
+        try:
+            embeddings = await self.embed_texts(queries)
+            
+            results = await asyncio.gather(*(
+                run_blocking(self.backend.query, embedding, top_k)
+                for embedding in embeddings
+            ))
+            
+            return [[match["metadata"].get("text", "") for match in matches] for matches in results]
+            
+        except Exception as e:
+            logger.error(f"Error searching vector store: {e}")
+            return [[] for _ in queries]
     
-    def search_similar(self, query: str, top_k: int = 3) -> List[str]:
+    async def search_similar(self, query: str, top_k: int = 3) -> List[str]:
         """Search for similar documents"""
         try:
-            query_embedding = self.embedding_client.feature_extraction(
-                query,
-                model=settings.EMBEDDING_MODEL
-            )
+            query_embedding = (await self._embed_batch([query]))[0]
             
-            results = self.index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True
-            )
+            matches = await run_blocking(self.backend.query, query_embedding, top_k)
             
-            return [match.metadata.get("text", "") for match in results.matches]
+            return [match["metadata"].get("text", "") for match in matches]
             
         except Exception as e:
             logger.error(f"Error searching vector store: {e}")
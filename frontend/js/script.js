@@ -282,7 +282,7 @@ class MCQGenerator {
             return;
         }
         
-        await this.generateMCQs('/generate-domain-mcq', formData);
+        await this.streamMCQs('/generate-domain-mcq/stream', formData);
     }
 
     async handleDocumentFormSubmit(e) {
@@ -380,7 +380,7 @@ class MCQGenerator {
             const result = await response.json();
             
             if (response.ok && result.success) {
-                this.showSuccess(result);
+                await this.pollJob(result.job_id);
             } else {
                 this.showError(result.detail || result.message || 'An error occurred while generating MCQs');
             }
@@ -391,6 +391,133 @@ class MCQGenerator {
         }
     }
 
+    async streamMCQs(endpoint, data) {
+        this.showLoading();
+        
+        try {
+            const response = await fetch(endpoint, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(data)
+            });
+            
+            if (!response.ok || !response.body) {
+                const result = await response.json();
+                this.showError(result.detail || result.message || 'An error occurred while generating MCQs');
+                return;
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) {
+                    break;
+                }
+                
+                buffer += decoder.decode(value, { stream: true });
+                
+                // Server-Sent Events are separated by a blank line
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const rawEvent = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    
+                    if (this.handleStreamEvent(rawEvent)) {
+                        reader.cancel();
+                        return;
+                    }
+                }
+            }
+            
+            this.showError('The connection closed before generation finished. Please try again.');
+            
+        } catch (error) {
+            console.error('Network error:', error);
+            this.showError('Network error: Unable to connect to the server. Please check your connection and try again.');
+        }
+    }
+
+    handleStreamEvent(rawEvent) {
+        let eventName = 'message';
+        const dataLines = [];
+        
+        rawEvent.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                eventName = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trim());
+            }
+        });
+        
+        if (dataLines.length === 0) {
+            return false;
+        }
+        
+        const data = JSON.parse(dataLines.join('\n'));
+        
+        if (eventName === 'mcq') {
+            this.renderLiveQuestion(data);
+            return false;
+        }
+        
+        if (eventName === 'complete') {
+            this.showSuccess(data);
+            return true;
+        }
+        
+        if (eventName === 'error') {
+            this.showError(data.detail || 'An error occurred while generating MCQs');
+            return true;
+        }
+        
+        return false;
+    }
+
+    renderLiveQuestion(mcq) {
+        const container = document.getElementById('live-questions');
+        if (!container) {
+            return;
+        }
+        
+        container.classList.remove('hidden');
+        const index = container.children.length + 1;
+        
+        const item = document.createElement('div');
+        item.className = 'live-question';
+        
+        const title = document.createElement('h4');
+        title.textContent = `Q${index}. ${mcq.question}`;
+        item.appendChild(title);
+        
+        const options = document.createElement('ol');
+        options.type = 'A';
+        mcq.options.forEach(option => {
+            const optionItem = document.createElement('li');
+            optionItem.textContent = option.text;
+            if (option.is_correct) {
+                optionItem.className = 'correct';
+            }
+            options.appendChild(optionItem);
+        });
+        item.appendChild(options);
+        
+        container.appendChild(item);
+        this.updateLoadingStatus(`Received ${index} question${index === 1 ? '' : 's'}...`);
+    }
+
+    clearLiveQuestions() {
+        const container = document.getElementById('live-questions');
+        if (container) {
+            container.innerHTML = '';
+            container.classList.add('hidden');
+        }
+    }
+
     async generateMCQsWithFile(endpoint, formData) {
         this.showLoading();
         
@@ -403,7 +530,7 @@ class MCQGenerator {
             const result = await response.json();
             
             if (response.ok && result.success) {
-                this.showSuccess(result);
+                await this.pollJob(result.job_id);
             } else {
                 this.showError(result.detail || result.message || 'An error occurred while generating MCQs');
             }
@@ -414,9 +541,66 @@ class MCQGenerator {
         }
     }
 
+    async pollJob(jobId) {
+        const pollInterval = 2000;
+        
+        while (true) {
+            const response = await fetch(`/jobs/${jobId}`);
+            const job = await response.json();
+            
+            if (!response.ok) {
+                this.showError(job.detail || 'Unable to fetch job status');
+                return;
+            }
+            
+            if (job.status === 'completed') {
+                this.showSuccess(job.result);
+                return;
+            }
+            
+            if (job.status === 'failed') {
+                this.showError(job.error || 'An error occurred while generating MCQs');
+                return;
+            }
+            
+            this.updateLoadingStatus(job.status === 'running'
+                ? 'Generating your questions...'
+                : 'Waiting in queue...');
+            
+            await new Promise(resolve => setTimeout(resolve, pollInterval));
+        }
+    }
+
+    async fetchDriveFileId(result) {
+        if (!result.delivery_url) {
+            return result.drive_file_id || null;
+        }
+        
+        try {
+            const response = await fetch(result.delivery_url);
+            if (!response.ok) {
+                return null;
+            }
+            const status = await response.json();
+            return status.drive_file_id;
+        } catch (error) {
+            console.error('Error fetching delivery status:', error);
+            return null;
+        }
+    }
+
+    updateLoadingStatus(message) {
+        const statusElement = document.getElementById('loading-status');
+        if (statusElement) {
+            statusElement.textContent = message;
+        }
+    }
+
     showLoading() {
         this.hideAllResults();
+        this.clearLiveQuestions();
         const loadingElement = document.getElementById('loading');
+        this.updateLoadingStatus('Please wait while we create your questions');
         loadingElement.classList.remove('hidden');
         loadingElement.scrollIntoView({ behavior: 'smooth', block: 'center' });
     }
@@ -429,25 +613,26 @@ class MCQGenerator {
         
         messageP.innerHTML = `
             <strong>Generated ${result.mcq_count || 'your'} MCQs successfully!</strong><br>
-            PDF has been created and uploaded to Google Drive.<br>
-            ${result.email ? '<span style="color: var(--success-color);">✉️ Email notification sent successfully!</span>' : ''}
+            PDF has been created and is being uploaded to Google Drive.<br>
+            ${result.email_queued ? '<span style="color: var(--success-color);">✉️ Your email is on its way!</span>' : ''}
         `;
         
         // Setup download button
         const downloadBtn = document.getElementById('download-btn');
         downloadBtn.onclick = () => {
-            const filename = result.pdf_path ? result.pdf_path.split('/').pop() : 'mcq_questions.pdf';
-            this.downloadFile(`/download-pdf/${filename}`, filename);
+            const filename = result.pdf_filename || 'mcq_questions.pdf';
+            this.downloadFile(result.pdf_url || `/download-pdf/${filename}`, filename);
         };
         
         // Setup copy button
         const copyBtn = document.getElementById('copy-btn');
-        copyBtn.onclick = () => {
-            if (result.drive_file_id) {
-                const driveLink = `https://drive.google.com/file/d/${result.drive_file_id}/view`;
+        copyBtn.onclick = async () => {
+            const driveFileId = await this.fetchDriveFileId(result);
+            if (driveFileId) {
+                const driveLink = `https://drive.google.com/file/d/${driveFileId}/view`;
                 this.copyToClipboard(driveLink);
             } else {
-                this.showNotification('Drive link not available', 'warning');
+                this.showNotification('Drive link not available yet', 'warning');
             }
         };
         
@@ -1,5 +1,4 @@
 import uvicorn
-from api.routes import app
 from utils.logger import logger
 import os
 
@@ -13,8 +12,10 @@ if __name__ == "__main__":
     create_directories()
     logger.info("Starting MCQ AI Agent...")
     
+    # Passed as an import string so the app is only built in the server process,
+    # not again in every process pool worker that re-imports this module
     uvicorn.run(
-        app,
+        "api.routes:app",
         host="0.0.0.0",
         port=8000,
         reload=True
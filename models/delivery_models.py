@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from typing import Any, List, Optional
+from enum import Enum
+
+class DeliveryStatus(str, Enum):
+    PENDING = "pending"
+    RETRYING = "retrying"
+    DELIVERED = "delivered"
+    DEAD_LETTER = "dead_letter"
+
+class Delivery(BaseModel):
+    # Idempotency key: the same artifact sent to the same target over the same channel
+    id: str
+    artifact_id: str
+    artifact_name: str
+    channel: str
+    target: Optional[str] = None
+    status: DeliveryStatus
+    attempts: int = 0
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
+class EmailRecipient(BaseModel):
+    email: str
+    name: Optional[str] = None
+
+class BulkEmailRequest(BaseModel):
+    # Name of a generated PDF, as returned in pdf_filename
+    pdf_filename: str
+    recipients: List[EmailRecipient]
+    subject: Optional[str] = None
@@ -0,0 +1,19 @@
+from bisect import bisect_right
+from pydantic import BaseModel
+from typing import List, Tuple
+
+class ExtractedDocument(BaseModel):
+    text: str
+    # Character offset in text where each page (or slide) starts
+    page_offsets: List[int]
+    
+    def page_for_offset(self, offset: int) -> int:
+        """1-based page number containing the character at offset"""
+        return max(1, bisect_right(self.page_offsets, offset))
+
+class ExtractionRecord(BaseModel):
+    """Everything derived from an upload before MCQ generation"""
+    document: ExtractedDocument
+    chunk_spans: List[Tuple[int, int]]
+    # Vector store IDs of the chunks, in chunk order
+    chunk_ids: List[str]
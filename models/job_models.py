@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from enum import Enum
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    payload: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
\ No newline at end of file
@@ -11,6 +11,8 @@ class MCQSource(str, Enum):
     MAIN_BRAIN = "main_brain"
     SERP_API = "serp_api"
     WIKIPEDIA = "wikipedia"
+    WEB_AND_WIKIPEDIA = "serp_wikipedia"
+    ALL_SOURCES = "all_sources"
 
 class MCQOption(BaseModel):
     text: str
@@ -21,6 +23,8 @@ class MCQ(BaseModel):
     options: List[MCQOption]
     explanation: str
     difficulty: DifficultyLevel
+    source_pages: Optional[List[int]] = None
+    model: Optional[str] = None
 
 class MCQRequest(BaseModel):
     domain: str
@@ -29,9 +33,17 @@ class MCQRequest(BaseModel):
     source: MCQSource
     email: Optional[str] = None
     custom_prompt: Optional[str] = None
+    force_refresh: bool = False
 
 class DocumentMCQRequest(BaseModel):
     count: int
     difficulty: DifficultyLevel
     email: Optional[str] = None
-    custom_prompt: Optional[str] = None
\ No newline at end of file
+    custom_prompt: Optional[str] = None
+    force_refresh: bool = False
+
+class BulkExportRequest(BaseModel):
+    mcqs: List[MCQ]
+    variants: int = 30
+    title: str = "MCQ Assessment"
+    seed: Optional[int] = None
@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+# Settings are read once at import, so the offline configuration has to be in
+# place before any application module is imported by a test
+_STATE_DIR = tempfile.mkdtemp(prefix="mcq-tests-")
+
+os.environ.update({
+    "VECTOR_BACKEND": "local",
+    "LLM_BACKEND": "mock",
+    "LLM_MOCK_LATENCY": "0.05",
+    "PROMPT_TOKENIZER": "off",
+    "HF_HUB_OFFLINE": "1",
+    "LOCAL_VECTOR_DIR": os.path.join(_STATE_DIR, "vector_index"),
+    "JOB_DB_PATH": os.path.join(_STATE_DIR, "jobs.db"),
+    "DELIVERY_DB_PATH": os.path.join(_STATE_DIR, "deliveries.db"),
+    "QUESTION_BANK_PATH": os.path.join(_STATE_DIR, "question_bank.db"),
+    "EMBEDDING_CACHE_PATH": os.path.join(_STATE_DIR, "embedding_cache.db"),
+    "EXTRACTION_CACHE_PATH": os.path.join(_STATE_DIR, "extraction_cache.db"),
+    "UPLOAD_DIR": os.path.join(_STATE_DIR, "uploads")
+})
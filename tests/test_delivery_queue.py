@@ -0,0 +1,336 @@
+import asyncio
+import base64
+import contextlib
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs, urlparse
+import httplib2
+import pytest
+from googleapiclient.discovery import build
+from sendgrid import SendGridAPIClient
+from api import routes
+from config.settings import settings
+from core.delivery_queue import DeliveryQueue
+from models.delivery_models import DeliveryStatus
+
+PDF = b"%PDF-1.4 fake exam " * 64
+BACKOFF_BASE = 0.2
+
+class _FakeService:
+    """Local HTTP server standing in for a remote API
+    
+    fail_next makes the next requests answer 503 and fail_always makes
+    every request fail.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fail_next = 0
+        self.fail_always = False
+        self.attempts: List[float] = []
+        service = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                service._dispatch(self)
+            
+            def do_POST(self):
+                service._dispatch(self)
+            
+            def do_PUT(self):
+                service._dispatch(self)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def _dispatch(self, request: BaseHTTPRequestHandler):
+        body = request.rfile.read(int(request.headers.get("Content-Length") or 0))
+        with self.lock:
+            self.attempts.append(time.monotonic())
+            if self.fail_always or self.fail_next:
+                self.fail_next = max(0, self.fail_next - 1)
+                return self._reply(request, 503, {"error": "unavailable"})
+            
+            status, payload, headers = self.handle(request.command, urlparse(request.path), request.headers, body)
+        self._reply(request, status, payload, headers)
+    
+    def handle(self, method, url, headers, body):
+        raise NotImplementedError
+    
+    @staticmethod
+    def _reply(request: BaseHTTPRequestHandler, status: int, payload=None, headers=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        request.send_response(status)
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+class FakeDrive(_FakeService):
+    """The parts of the Drive v3 API the uploader uses: files.list and resumable files.create
+    
+    lose_next_upload stores the next uploaded file but answers 503, as when
+    the response is lost on the way back.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.lose_next_upload = False
+        self.files = {}
+        self._sessions = {}
+        self._ids = itertools.count(1)
+    
+    def handle(self, method, url, headers, body):
+        query = parse_qs(url.query)
+        if method == "GET" and url.path == "/drive/v3/files":
+            key = re.search(r"value='([^']*)'", query["q"][0]).group(1)
+            matches = [
+                {"id": file_id} for file_id, file in self.files.items()
+                if file["appProperties"].get("idempotency_key") == key
+            ]
+            return 200, {"files": matches[:int(query.get("pageSize", ["100"])[0])]}, None
+        
+        if method == "POST" and url.path == "/upload/drive/v3/files":
+            session = str(next(self._ids))
+            self._sessions[session] = json.loads(body)
+            location = f"{self.url}/upload/drive/v3/files?uploadType=resumable&upload_id={session}"
+            return 200, None, {"Location": location}
+        
+        if method == "PUT" and url.path == "/upload/drive/v3/files":
+            metadata = self._sessions.pop(query["upload_id"][0])
+            file_id = f"file-{next(self._ids)}"
+            self.files[file_id] = {
+                "name": metadata["name"],
+                "appProperties": metadata.get("appProperties", {}),
+                "data": body
+            }
+            if self.lose_next_upload:
+                self.lose_next_upload = False
+                return 503, {"error": "connection reset"}, None
+            return 200, {"id": file_id}, None
+        
+        return 404, {"error": f"unexpected {method} {url.path}"}, None
+
+class FakeSendGrid(_FakeService):
+    """The SendGrid v3 mail send endpoint"""
+    
+    def __init__(self):
+        super().__init__()
+        self.mails = []
+    
+    def handle(self, method, url, headers, body):
+        if method == "POST" and url.path == "/v3/mail/send":
+            self.mails.append(json.loads(body))
+            return 202, None, None
+        return 404, {"error": f"unexpected {method} {url.path}"}, None
+
+class _PlainHttp(httplib2.Http):
+    # The client derives upload URLs from the https root URL, so keep them on the plain HTTP fake
+    def request(self, uri, *args, **kwargs):
+        return super().request(uri.replace("https://", "http://", 1), *args, **kwargs)
+
+@pytest.fixture
+def drive(monkeypatch):
+    fake = FakeDrive()
+    service = build(
+        "drive", "v3",
+        http=_PlainHttp(),
+        client_options={"api_endpoint": f"{fake.url}/drive/v3/"},
+        static_discovery=True
+    )
+    monkeypatch.setattr(routes.drive_uploader, "service", service)
+    yield fake
+    fake.close()
+
+@pytest.fixture
+def sendgrid(monkeypatch):
+    fake = FakeSendGrid()
+    monkeypatch.setattr(routes.email_sender, "sg", SendGridAPIClient(api_key="test-key", host=fake.url))
+    yield fake
+    fake.close()
+
+@contextlib.asynccontextmanager
+async def running_queue(db_path: str, max_attempts: int = 6):
+    """A delivery queue wired to the app's Drive and email handlers"""
+    queue = DeliveryQueue(db_path, workers=2, max_attempts=max_attempts, backoff_base=BACKOFF_BASE, backoff_max=5)
+    queue.register("drive", routes._deliver_to_drive)
+    queue.register("email", routes._deliver_email)
+    await queue.start()
+    try:
+        yield queue
+    finally:
+        await queue.stop()
+
+async def _wait_for(queue: DeliveryQueue, delivery_id: str, *statuses: DeliveryStatus, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        delivery = await queue.get(delivery_id)
+        if delivery.status in statuses:
+            return delivery
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"delivery {delivery_id[:12]} stayed {delivery.status.value}")
+
+def test_delivers_to_drive_and_email(tmp_path, drive, sendgrid):
+    async def scenario():
+        async with running_queue(str(tmp_path / "deliveries.db")) as queue:
+            drive_id = await queue.submit("exam.pdf", PDF, "drive")
+            email_id = await queue.submit("exam.pdf", PDF, "email", "student@example.com")
+            return (
+                await _wait_for(queue, drive_id, DeliveryStatus.DELIVERED),
+                await _wait_for(queue, email_id, DeliveryStatus.DELIVERED),
+                await queue.for_artifact("exam.pdf")
+            )
+    
+    uploaded, emailed, deliveries = asyncio.run(scenario())
+    
+    assert list(drive.files) == [uploaded.result]
+    file = drive.files[uploaded.result]
+    assert file["name"] == "exam.pdf"
+    assert file["data"] == PDF
+    assert file["appProperties"] == {"idempotency_key": uploaded.id}
+    
+    assert emailed.result is True
+    [mail] = sendgrid.mails
+    assert mail["personalizations"][0]["to"] == [{"email": "student@example.com"}]
+    assert base64.b64decode(mail["attachments"][0]["content"]) == PDF
+    assert {delivery.channel for delivery in deliveries} == {"drive", "email"}
+
+def test_resubmitting_an_artifact_sends_it_once(tmp_path, drive, sendgrid):
+    async def scenario():
+        async with running_queue(str(tmp_path / "deliveries.db")) as queue:
+            first = [
+                await queue.submit("exam.pdf", PDF, "drive"),
+                await queue.submit("exam.pdf", PDF, "email", "student@example.com")
+            ]
+            second = [
+                await queue.submit("exam.pdf", PDF, "drive"),
+                await queue.submit("exam.pdf", PDF, "email", "student@example.com")
+            ]
+            for delivery_id in first:
+                await _wait_for(queue, delivery_id, DeliveryStatus.DELIVERED)
+            
+            # Also after delivery, e.g. when a cached PDF is published again
+            third = [
+                await queue.submit("exam.pdf", PDF, "drive"),
+                await queue.submit("exam.pdf", PDF, "email", "student@example.com")
+            ]
+            await asyncio.sleep(0.2)
+            return first, second, third
+    
+    first, second, third = asyncio.run(scenario())
+    
+    assert first == second == third
+    assert len(drive.files) == 1
+    assert len(sendgrid.mails) == 1
+
+def test_lost_drive_response_does_not_upload_twice(tmp_path, drive, sendgrid):
+    drive.lose_next_upload = True
+    
+    async def scenario():
+        async with running_queue(str(tmp_path / "deliveries.db")) as queue:
+            delivery_id = await queue.submit("exam.pdf", PDF, "drive")
+            return await _wait_for(queue, delivery_id, DeliveryStatus.DELIVERED)
+    
+    delivery = asyncio.run(scenario())
+    
+    # The file landed on the first attempt; the retry found it by its idempotency key
+    assert list(drive.files) == [delivery.result]
+    assert delivery.attempts == 2
+
+def test_failures_back_off_then_dead_letter_until_retried(tmp_path, drive, sendgrid):
+    sendgrid.fail_always = True
+    
+    async def scenario():
+        async with running_queue(str(tmp_path / "deliveries.db"), max_attempts=3) as queue:
+            delivery_id = await queue.submit("exam.pdf", PDF, "email", "student@example.com")
+            dead = await _wait_for(queue, delivery_id, DeliveryStatus.DEAD_LETTER)
+            dead_letters = await queue.dead_letters()
+            attempts = list(sendgrid.attempts)
+            
+            sendgrid.fail_always = False
+            assert await queue.retry(delivery_id)
+            delivered = await _wait_for(queue, delivery_id, DeliveryStatus.DELIVERED)
+            return dead, dead_letters, attempts, delivered, await queue.dead_letters()
+    
+    dead, dead_letters, attempts, delivered, dead_letters_after = asyncio.run(scenario())
+    
+    assert dead.attempts == 3
+    assert dead.error == "Delivery handler reported failure"
+    assert [delivery.id for delivery in dead_letters] == [dead.id]
+    
+    # Delays are backoff_base * 2^(n-1), scaled by jitter between 0.5 and 1
+    gaps = [later - earlier for earlier, later in zip(attempts, attempts[1:])]
+    assert len(gaps) == 2
+    assert BACKOFF_BASE * 0.5 * 0.9 <= gaps[0] <= BACKOFF_BASE + 0.2
+    assert BACKOFF_BASE * 0.9 <= gaps[1] <= 2 * BACKOFF_BASE + 0.2
+    
+    assert delivered.attempts == 1
+    assert dead_letters_after == []
+    assert len(sendgrid.mails) == 1
+
+def test_unfinished_deliveries_resume_after_restart(tmp_path, drive, sendgrid):
+    db_path = str(tmp_path / "deliveries.db")
+    drive.fail_next = 1
+    
+    async def first_run():
+        async with running_queue(db_path) as queue:
+            delivery_id = await queue.submit("exam.pdf", PDF, "drive")
+            await _wait_for(queue, delivery_id, DeliveryStatus.RETRYING)
+            return delivery_id
+    
+    async def second_run(delivery_id: str):
+        async with running_queue(db_path) as queue:
+            return await _wait_for(queue, delivery_id, DeliveryStatus.DELIVERED)
+    
+    delivery_id = asyncio.run(first_run())
+    assert drive.files == {}
+    
+    delivery = asyncio.run(second_run(delivery_id))
+    
+    assert list(drive.files) == [delivery.result]
+    assert drive.files[delivery.result]["data"] == PDF
+    assert delivery.attempts == 2
+
+def test_bulk_email_skips_invalid_addresses(monkeypatch, sendgrid):
+    monkeypatch.setattr(settings, "EMAIL_BATCH_SIZE", 2)
+    recipients = [
+        ("ada@example.com", "Ada"),
+        ("grace@example", "Grace"),
+        ("alan@example.com", "Alan"),
+        ("edsger@@example.com", None),
+        ("barbara@example.com", "Barbara"),
+        ("Ada@Example.com", "Ada again")
+    ]
+    
+    results = asyncio.run(routes.email_sender.send_bulk_mcq_pdf(recipients, PDF))
+    
+    assert results == {
+        "ada@example.com": True,
+        "alan@example.com": True,
+        "barbara@example.com": True,
+        "grace@example": False,
+        "edsger@@example.com": False
+    }
+    # Only valid addresses were batched, so no request was rejected over a typo
+    sent = sorted(
+        to["email"] for mail in sendgrid.mails
+        for personalization in mail["personalizations"] for to in personalization["to"]
+    )
+    assert sent == ["ada@example.com", "alan@example.com", "barbara@example.com"]
+    assert len(sendgrid.mails) == 2
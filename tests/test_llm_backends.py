@@ -0,0 +1,301 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import socket
+import sys
+import time
+import types
+import httpx
+import pytest
+from api import routes
+from config.settings import settings
+from core.llm_backends import MockBackend, OpenAICompatibleBackend, create_llm_backend
+from core.mcq_generator import MCQGenerator
+from core.model_router import ModelRouter
+from models.mcq_models import DifficultyLevel
+
+MESSAGES = [{"role": "user", "content": "Generate 3 multiple choice questions about graphs with easy difficulty."}]
+
+@pytest.fixture
+def offline(monkeypatch):
+    """Fail any attempt to reach a host other than this one
+    
+    Attempts are also checked afterwards, since the app logs and swallows
+    errors from some backends.
+    """
+    getaddrinfo = socket.getaddrinfo
+    attempted = []
+    
+    def local_only(host, *args, **kwargs):
+        if host not in ("localhost", "127.0.0.1", "::1"):
+            attempted.append(host)
+            raise OSError(f"network access to {host} attempted in an offline test")
+        return getaddrinfo(host, *args, **kwargs)
+    
+    monkeypatch.setattr(socket, "getaddrinfo", local_only)
+    yield
+    assert attempted == []
+
+class _Peak:
+    """Wraps a backend's _complete to record how many calls ran at once"""
+    
+    def __init__(self, monkeypatch, backend):
+        self.current = 0
+        self.peak = 0
+        self.calls = 0
+        complete = backend._complete
+        
+        async def tracked(messages, max_tokens):
+            self.calls += 1
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+            try:
+                return await complete(messages, max_tokens)
+            finally:
+                self.current -= 1
+        
+        monkeypatch.setattr(backend, "_complete", tracked)
+
+def _generator(monkeypatch, **tiers) -> MCQGenerator:
+    generator = MCQGenerator()
+    monkeypatch.setattr(generator, "router", ModelRouter(tiers))
+    return generator
+
+def test_mock_synthesizes_the_requested_questions():
+    backend = MockBackend("mock-model", timeout=5, max_concurrency=1, latency=0)
+    response = asyncio.run(backend.complete(MESSAGES, 1000))
+    
+    questions = json.loads(response)
+    assert len(questions) == 3
+    assert all(question["difficulty"] == "easy" for question in questions)
+    assert all(sum(option["is_correct"] for option in question["options"]) == 1 for question in questions)
+    # Deterministic per prompt
+    assert asyncio.run(backend.complete(MESSAGES, 1000)) == response
+
+def test_mock_replays_recorded_responses(tmp_path):
+    recorded = [
+        [{"question": "Recorded as JSON?", "options": [], "explanation": "", "difficulty": "easy"}],
+        '```json\n[{"question": "Recorded as text?"}]\n```'
+    ]
+    path = tmp_path / "responses.json"
+    path.write_text(json.dumps(recorded), encoding="utf-8")
+    backend = MockBackend("mock-model", timeout=5, max_concurrency=1, responses_path=str(path), latency=0)
+    
+    async def replay():
+        return [
+            await backend.complete([{"role": "user", "content": f"Prompt {i}"}], 100)
+            for i in range(20)
+        ]
+    
+    responses = asyncio.run(replay())
+    assert set(responses) == {json.dumps(recorded[0]), recorded[1]}
+    assert asyncio.run(replay()) == responses
+
+def test_mock_stream_spreads_latency_over_pieces():
+    backend = MockBackend("mock-model", timeout=5, max_concurrency=1, latency=0.3)
+    
+    async def consume():
+        started = time.monotonic()
+        arrivals, pieces = [], []
+        async for piece in backend.stream(MESSAGES, 1000):
+            arrivals.append(time.monotonic() - started)
+            pieces.append(piece)
+        return arrivals, "".join(pieces)
+    
+    arrivals, text = asyncio.run(consume())
+    assert len(arrivals) > 3
+    assert arrivals[0] < 0.3 / 2
+    assert arrivals[-1] >= 0.3 * 0.9
+    assert text == asyncio.run(MockBackend("mock-model", 5, 1, latency=0).complete(MESSAGES, 1000))
+
+def test_timeout_applies_to_completions_and_whole_streams():
+    backend = MockBackend("slow-model", timeout=0.1, max_concurrency=2, latency=0.5)
+    
+    async def stream():
+        return [piece async for piece in backend.stream(MESSAGES, 1000)]
+    
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(backend.complete(MESSAGES, 1000))
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(stream())
+
+def test_concurrency_limit_is_per_backend(monkeypatch):
+    limited = MockBackend("limited-model", timeout=5, max_concurrency=2, latency=0.1)
+    other = MockBackend("other-model", timeout=5, max_concurrency=6, latency=0.1)
+    limited_calls, other_calls = _Peak(monkeypatch, limited), _Peak(monkeypatch, other)
+    
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(backend.complete(MESSAGES, 100) for backend in [limited, other] * 6))
+        return time.monotonic() - started
+    
+    elapsed = asyncio.run(run())
+    assert limited_calls.peak == 2
+    assert other_calls.peak == 6
+    # The limited backend needed three rounds; the other one was not held back by it
+    assert 0.3 * 0.9 <= elapsed < 0.3 + 0.3
+
+def test_openai_compatible_backend_speaks_chat_completions():
+    requests = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append((request.url.path, request.headers.get("authorization"), body))
+        if not body.get("stream"):
+            return httpx.Response(200, json={"choices": [{"message": {"content": "[1, 2]"}}]})
+        
+        events = [
+            {"choices": [{"delta": {"role": "assistant"}}]},
+            {"choices": [{"delta": {"content": "[1, "}}]},
+            {"choices": []},
+            {"choices": [{"delta": {"content": "2]"}}]}
+        ]
+        text = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + ": keep-alive\n\ndata: [DONE]\n\n"
+        return httpx.Response(200, text=text, headers={"Content-Type": "text/event-stream"})
+    
+    backend = OpenAICompatibleBackend("local-model", "http://vllm.internal:8000/v1/", timeout=5,
+                                      max_concurrency=2, api_key="secret")
+    backend.client = httpx.AsyncClient(transport=httpx.MockTransport(handler), headers=backend.client.headers)
+    
+    async def run():
+        return await backend.complete(MESSAGES, 256), "".join([delta async for delta in backend.stream(MESSAGES, 256)])
+    
+    completion, streamed = asyncio.run(run())
+    assert completion == streamed == "[1, 2]"
+    assert [path for path, _, _ in requests] == ["/v1/chat/completions"] * 2
+    assert all(auth == "Bearer secret" for _, auth, _ in requests)
+    assert requests[0][2] == {"model": "local-model", "messages": MESSAGES, "max_tokens": 256}
+    assert requests[1][2]["stream"] is True
+
+def test_factory_applies_per_tier_settings(monkeypatch):
+    monkeypatch.setattr(settings, "MAIN_MODEL", "big-model")
+    monkeypatch.setattr(settings, "FAST_MODEL", "small-model")
+    monkeypatch.setattr(settings, "MAIN_MODEL_TIMEOUT", 90.0)
+    monkeypatch.setattr(settings, "FAST_MODEL_TIMEOUT", 15.0)
+    
+    tiers = MCQGenerator().router.tiers
+    
+    assert isinstance(tiers[ModelRouter.PRIMARY], MockBackend)
+    assert (tiers[ModelRouter.PRIMARY].model, tiers[ModelRouter.PRIMARY].timeout) == ("big-model", 90.0)
+    assert (tiers[ModelRouter.FAST].model, tiers[ModelRouter.FAST].timeout) == ("small-model", 15.0)
+    
+    monkeypatch.setattr(settings, "LLM_BACKEND", "openai")
+    monkeypatch.setattr(settings, "LLM_BASE_URL", None)
+    with pytest.raises(ValueError):
+        create_llm_backend()
+
+def test_load_batched_generation_offline(monkeypatch, offline):
+    monkeypatch.setattr(settings, "MCQ_BATCH_SIZE", 10)
+    monkeypatch.setattr(settings, "MCQ_BATCH_CONCURRENCY", 5)
+    backend = MockBackend("mock-model", timeout=5, max_concurrency=4, latency=0.1)
+    calls = _Peak(monkeypatch, backend)
+    generator = _generator(monkeypatch, primary=backend)
+    
+    async def run():
+        started = time.monotonic()
+        results = await asyncio.gather(*(
+            generator.generate_mcqs_from_domain(f"Topic {i}", 30, DifficultyLevel.HARD) for i in range(10)
+        ))
+        return results, time.monotonic() - started
+    
+    results, elapsed = asyncio.run(run())
+    
+    assert calls.calls == 30
+    assert calls.peak == 4
+    for mcqs in results:
+        assert len(mcqs) == 30
+        assert len({mcq.question for mcq in mcqs}) == 30
+        assert all(mcq.model == "mock-model" for mcq in mcqs)
+    # 30 calls of 0.1s, four at a time
+    minimum = 30 / 4 * 0.1
+    assert minimum * 0.9 <= elapsed < minimum * 2
+
+def test_load_streamed_generation_offline(monkeypatch, offline):
+    # Enough slots for every sub-batch, so no stream waits for another to finish
+    backend = MockBackend("mock-model", timeout=5, max_concurrency=12, latency=0.3)
+    generator = _generator(monkeypatch, primary=backend)
+    
+    async def consume(domain: str):
+        started = time.monotonic()
+        first, mcqs = None, []
+        async for mcq in generator.stream_mcqs_from_domain(domain, 25, DifficultyLevel.MEDIUM):
+            first = first or time.monotonic() - started
+            mcqs.append(mcq)
+        return first, time.monotonic() - started, mcqs
+    
+    async def run():
+        return await asyncio.gather(*(consume(f"Stream topic {i}") for i in range(4)))
+    
+    for first, total, mcqs in asyncio.run(run()):
+        assert len(mcqs) == 25
+        assert len({mcq.question for mcq in mcqs}) == 25
+        # Questions arrive while the responses are still streaming
+        assert first < 0.3 / 2
+        assert total >= 0.3 * 0.9
+
+@contextlib.asynccontextmanager
+async def _running_app():
+    await routes.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=routes.app), base_url="http://test") as client:
+            yield client
+    finally:
+        await routes.job_queue.stop()
+        await routes.delivery_queue.stop()
+
+def _sse_events(text: str):
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        yield lines["event"], json.loads(lines["data"])
+
+class _HubTokenizer:
+    """Stand-in for transformers.AutoTokenizer that contacts the hub unless told not to"""
+    
+    @staticmethod
+    def from_pretrained(model, local_files_only=False):
+        if not local_files_only:
+            socket.getaddrinfo("huggingface.co", 443)
+        raise OSError(f"no cached tokenizer for {model}")
+
+def test_load_full_pipeline_offline(monkeypatch, offline):
+    """Concurrent streamed requests through the API with only the mock LLM behind them"""
+    async def fetch_embeddings(texts):
+        return [[byte / 255 for byte in hashlib.sha256(text.encode("utf-8")).digest()] for text in texts]
+    
+    # Behave like an install that has transformers, and load the tokenizer afresh at startup
+    monkeypatch.setitem(sys.modules, "transformers", types.SimpleNamespace(AutoTokenizer=_HubTokenizer))
+    monkeypatch.setattr(routes.mcq_generator.prompt_builder, "_tokenizer_loaded", False)
+    delivered = []
+    monkeypatch.setattr(routes.vector_store, "_fetch_embeddings", fetch_embeddings)
+    monkeypatch.setattr(routes.drive_uploader, "upload_bytes", lambda data, name, **kwargs: delivered.append(name) or "file-id")
+    for backend in routes.mcq_generator.router.tiers.values():
+        monkeypatch.setattr(backend, "latency", 0.2)
+    
+    async def request(client: httpx.AsyncClient, i: int):
+        response = await client.post("/generate-domain-mcq/stream", json={
+            "domain": f"Offline load topic {i}",
+            "count": 12,
+            "difficulty": ["easy", "medium", "hard"][i % 3],
+            "source": "main_brain",
+            "force_refresh": True
+        })
+        events = list(_sse_events(response.text))
+        pdf = await client.get(events[-1][1]["pdf_url"])
+        return events, pdf
+    
+    async def run():
+        async with _running_app() as client:
+            results = await asyncio.gather(*(request(client, i) for i in range(6)))
+            # Give the delivery workers a moment to pick up the uploads
+            await asyncio.sleep(0.2)
+            return results
+    
+    for events, pdf in asyncio.run(run()):
+        kinds = [kind for kind, _ in events]
+        assert kinds == ["mcq"] * 12 + ["complete"]
+        assert events[-1][1]["mcq_count"] == 12
+        assert all(data["model"] for kind, data in events if kind == "mcq")
+        assert pdf.status_code == 200
+        assert pdf.content.startswith(b"%PDF")
+    assert len(delivered) == 6
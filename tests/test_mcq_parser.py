@@ -0,0 +1,186 @@
+import asyncio
+import json
+import random
+from typing import List
+import pytest
+from core.llm_backends import LLMBackend
+from core.mcq_generator import MCQGenerator
+from core.mcq_parser import MCQStreamParser, parse_mcq_objects
+from core.model_router import ModelRouter
+from models.mcq_models import DifficultyLevel
+
+def _mcq(n: int, difficulty: str = "medium") -> dict:
+    return {
+        "question": f"Which statement about topic {n} is true?",
+        "options": [{"text": f"Statement {n}{letter}", "is_correct": letter == "B"} for letter in "ABCD"],
+        "explanation": f"Statement {n}B is the only true one.",
+        "difficulty": difficulty
+    }
+
+def _feed_in_pieces(text: str, rng: random.Random):
+    parser = MCQStreamParser()
+    objects = []
+    pos = 0
+    while pos < len(text):
+        size = rng.choice([1, 2, 3, 7, 16, 64, 500])
+        objects.extend(parser.feed(text[pos:pos + size]))
+        pos += size
+    parser.finish()
+    return objects, parser.dropped
+
+# Responses in the shapes models actually produce, with the questions that
+# must come out of each and how many items must be reported as dropped
+_ITEM = json.dumps(_mcq(1))
+_OTHER = json.dumps(_mcq(2))
+_TRICKY = json.dumps({**_mcq(1), "question": 'In topic 1 what does {"question": "}"} parse to?'})
+CORPUS = {
+    "plain array": (f"[{_ITEM}, {_OTHER}]", [1, 2], 0),
+    "code fence and prose": (f"Here are your questions:\n```json\n[{_ITEM},\n{_OTHER}]\n```\nGood luck!", [1, 2], 0),
+    "wrapper object": (f'{{"questions": [{_ITEM}, {_OTHER}]}}', [1, 2], 0),
+    "single object": (_ITEM, [1], 0),
+    "trailing commas": (f"[{_ITEM[:-1]},}}, {_OTHER},]", [1, 2], 0),
+    "python literals": (f"[{_ITEM.replace(': true', ': True').replace(': false', ': False')}, {_OTHER}]", [1, 2], 0),
+    "raw newline in string": (f"[{_ITEM.replace('is the only', 'is the' + chr(10) + 'only')}, {_OTHER}]", [1, 2], 0),
+    "braces and quotes inside strings": (f"[{_TRICKY}, {_OTHER}]", [1, 2], 0),
+    "curly quotes": (f"[{_ITEM.replace('true one', '“true” one')}, {_OTHER}]", [1, 2], 0),
+    "first key is not question": (json.dumps({"difficulty": "easy", **_mcq(1)}), [1], 0),
+    "truncated mid item": (f"[{_ITEM}, {_OTHER[:len(_OTHER) // 2]}", [1], 1),
+    "truncated wrapper": (f'{{"questions": [{_ITEM}, {_OTHER}', [1, 2], 0),
+    "missing closing brace": (f"[{_ITEM[:-1]}, {_OTHER}]", [2], 1),
+    "unreadable item": (f"[{_ITEM.replace(': true', ': tru')}, {_OTHER}]", [2], 1),
+    "prose only": ("I'm sorry, I can't help with that.", [], 0),
+    "empty": ("", [], 0)
+}
+
+def _topic(mcq: dict) -> int:
+    return int(mcq["question"].split("topic ")[1].split(" ")[0])
+
+@pytest.mark.parametrize("name", CORPUS)
+def test_corpus(name):
+    text, topics, dropped_count = CORPUS[name]
+    objects, dropped = parse_mcq_objects(text)
+    
+    assert [_topic(mcq) for mcq in objects] == topics, dropped
+    assert len(dropped) == dropped_count, dropped
+    
+    # Streaming in arbitrary pieces must give the same answer
+    assert _feed_in_pieces(text, random.Random(name)) == (objects, dropped)
+
+# Faults applied to one item of a generated response
+FAULTS = ["trailing_comma", "python_literal", "raw_newline", "missing_brace", "unreadable", "truncate"]
+
+def _render(items: List[dict], rng: random.Random, fault: str, target: int):
+    """Serialize items with a random layout and wrapper, damaging the target item
+    
+    Returns the text, the items a tolerant parser must recover and whether
+    exactly one item has to be reported as dropped.
+    """
+    indent = rng.choice([None, 2])
+    texts = [json.dumps(item, indent=indent) for item in items]
+    expected = list(items)
+    
+    if fault == "trailing_comma":
+        texts[target] = texts[target][:-1].rstrip() + ",\n}"
+    elif fault == "python_literal":
+        texts[target] = texts[target].replace(": true", ": True").replace(": false", ": False")
+    elif fault == "raw_newline":
+        texts[target] = texts[target].replace('"explanation": "', '"explanation": "Because\n')
+        expected[target] = {**items[target], "explanation": "Because\n" + items[target]["explanation"]}
+    elif fault == "missing_brace":
+        texts[target] = texts[target][:-1]
+        del expected[target]
+    elif fault == "unreadable":
+        texts[target] = texts[target].replace('"is_correct": true', '"is_correct": yes')
+        del expected[target]
+    
+    separator = rng.choice([", ", ",\n", ",\n\n  "])
+    body = "[" + separator.join(texts) + "]"
+    prefix, suffix = rng.choice([
+        ("", ""),
+        ("```json\n", "\n```"),
+        ("Sure! Here are the questions:\n\n", "\n\nLet me know if you need more."),
+        ('{"questions": ', "}"),
+        ('```\n{"mcqs": ', "}\n```")
+    ])
+    text = prefix + body + suffix
+    
+    if fault == "truncate":
+        cut = rng.randrange(len(prefix), len(prefix) + len(body))
+        text = text[:cut]
+        # Only items whose closing brace made it are complete
+        ends, pos = [], len(prefix) + 1
+        for item_text in texts:
+            pos += len(item_text)
+            ends.append(pos)
+            pos += len(separator)
+        expected = [item for item, end in zip(items, ends) if end <= cut]
+        return text, expected, None
+    
+    return text, expected, fault in ("missing_brace", "unreadable")
+
+@pytest.mark.parametrize("fault", FAULTS)
+def test_fuzz_one_fault_costs_at_most_one_item(fault):
+    for seed in range(300):
+        rng = random.Random(f"{fault}-{seed}")
+        items = [_mcq(n, rng.choice(["easy", "medium", "hard"])) for n in range(rng.randint(1, 8))]
+        target = rng.randrange(len(items))
+        text, expected, drops_one = _render(items, rng, fault, target)
+        
+        objects, dropped = parse_mcq_objects(text)
+        
+        context = f"seed {seed}, target {target}: {text!r}"
+        assert objects == expected, context
+        if drops_one is None:
+            assert len(dropped) <= 1, context
+        else:
+            assert len(dropped) == int(drops_one), context
+        assert _feed_in_pieces(text, rng) == (objects, dropped), context
+
+def test_fuzz_random_bytes_never_raise():
+    alphabet = '{}[]",:\\ \n\tabcqustion' + "".join(json.dumps(_mcq(1)))
+    for seed in range(500):
+        rng = random.Random(seed)
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 400)))
+        objects, dropped = parse_mcq_objects(text)
+        assert all(isinstance(obj, dict) for obj in objects)
+        assert _feed_in_pieces(text, rng) == (objects, dropped), f"seed {seed}: {text!r}"
+
+class _ScriptedBackend(LLMBackend):
+    """Returns canned responses in order and records the prompts it was sent"""
+    
+    def __init__(self, responses: List[str]):
+        super().__init__("scripted-model", timeout=5, max_concurrency=4)
+        self.responses = list(responses)
+        self.prompts: List[str] = []
+    
+    async def _complete(self, messages, max_tokens):
+        self.prompts.append(messages[-1]["content"])
+        return self.responses.pop(0)
+
+def test_generation_re_requests_only_the_dropped_items(monkeypatch):
+    items = [_mcq(n) for n in range(5)]
+    texts = [json.dumps(item) for item in items]
+    # The model loses a brace on one item and is cut off in the middle of another
+    first = "[" + ", ".join([texts[0], texts[1][:-1], texts[2], texts[3]]) + ", " + texts[4][:40]
+    second = json.dumps([_mcq(10), _mcq(11)])
+    
+    backend = _ScriptedBackend([first, second])
+    generator = MCQGenerator()
+    monkeypatch.setattr(generator, "router", ModelRouter({ModelRouter.PRIMARY: backend}))
+    
+    mcqs = asyncio.run(generator.generate_mcqs_from_domain("Topology", 5, DifficultyLevel.HARD))
+    
+    assert [mcq.question for mcq in mcqs] == [item["question"] for item in [items[0], items[2], items[3], _mcq(10), _mcq(11)]]
+    assert all(mcq.model == "scripted-model" for mcq in mcqs)
+    assert len(backend.prompts) == 2
+    assert backend.prompts[0].startswith("Generate 5 ")
+    assert backend.prompts[1].startswith("Generate 2 ")
+
+def test_parsed_items_that_are_not_valid_mcqs_are_dropped():
+    incomplete = {**_mcq(2), "options": [{"text": "Only one", "is_correct": True}]}
+    wrong_type = {**_mcq(3), "options": "A, B, C or D"}
+    response = json.dumps([_mcq(1), incomplete, wrong_type])
+    
+    mcqs = MCQGenerator()._parse_mcq_response(response)
+    
+    assert [mcq.question for mcq in mcqs] == [_mcq(1)["question"]]
@@ -0,0 +1,177 @@
+import asyncio
+import statistics
+import time
+import httpx
+import pytest
+from api import routes
+from config.settings import settings
+from core.llm_backends import MockBackend
+from core.mcq_generator import MCQGenerator
+from core.model_router import ModelRouter
+from models.mcq_models import DifficultyLevel
+
+EASY, MEDIUM, HARD = DifficultyLevel.EASY, DifficultyLevel.MEDIUM, DifficultyLevel.HARD
+MESSAGES = [{"role": "user", "content": "Generate 2 multiple choice questions about sets with hard difficulty."}]
+
+class _FailingBackend(MockBackend):
+    """Fails every call after its latency, or after fail_after streamed pieces"""
+    
+    def __init__(self, model: str, latency: float = 0.0, fail_after: int = 0):
+        super().__init__(model, timeout=5, max_concurrency=16, latency=latency)
+        self.fail_after = fail_after
+        self.calls = 0
+    
+    async def _complete(self, messages, max_tokens):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        raise RuntimeError("model overloaded")
+    
+    async def _stream(self, messages, max_tokens):
+        self.calls += 1
+        sent = 0
+        async for piece in super()._stream(messages, max_tokens):
+            if sent == self.fail_after:
+                raise RuntimeError("connection dropped")
+            sent += 1
+            yield piece
+
+def _tiers(primary_latency: float = 0.3, fast_latency: float = 0.05, primary=None) -> dict:
+    return {
+        ModelRouter.PRIMARY: primary or MockBackend("big-model", timeout=5, max_concurrency=16, latency=primary_latency),
+        ModelRouter.FAST: MockBackend("small-model", timeout=5, max_concurrency=16, latency=fast_latency)
+    }
+
+def _generator(monkeypatch, router: ModelRouter) -> MCQGenerator:
+    generator = MCQGenerator()
+    monkeypatch.setattr(generator, "router", router)
+    return generator
+
+@pytest.fixture(autouse=True)
+def router_settings(monkeypatch):
+    monkeypatch.setattr(settings, "ROUTER_SMALL_REQUEST", 5)
+    monkeypatch.setattr(settings, "ROUTER_MAX_IN_FLIGHT", 16)
+    monkeypatch.setattr(settings, "ROUTER_WINDOW_SECONDS", 300)
+    monkeypatch.setattr(settings, "ROUTER_MIN_SAMPLES", 5)
+    monkeypatch.setattr(settings, "ROUTER_P95_LATENCY", 0.2)
+    monkeypatch.setattr(settings, "ROUTER_ERROR_RATE", 0.2)
+    monkeypatch.setattr(settings, "MCQ_BATCH_SIZE", 10)
+
+@pytest.mark.parametrize("difficulty, count, tier", [
+    (EASY, 50, ModelRouter.FAST),
+    (MEDIUM, 5, ModelRouter.FAST),
+    (MEDIUM, 6, ModelRouter.PRIMARY),
+    (HARD, 1, ModelRouter.PRIMARY),
+    (HARD, 50, ModelRouter.PRIMARY)
+])
+def test_routes_by_difficulty_and_count(difficulty, count, tier):
+    assert ModelRouter(_tiers()).select(difficulty, count) == tier
+
+def test_single_tier_takes_everything():
+    router = ModelRouter({ModelRouter.PRIMARY: _tiers()[ModelRouter.PRIMARY]})
+    assert {router.select(difficulty, 3) for difficulty in (EASY, MEDIUM, HARD)} == {ModelRouter.PRIMARY}
+
+def test_slow_primary_sends_hard_requests_to_fast_tier():
+    router = ModelRouter(_tiers(primary_latency=0.3))
+    
+    async def call_primary(times: int):
+        await asyncio.gather(*(router.complete(ModelRouter.PRIMARY, MESSAGES, 100) for _ in range(times)))
+    
+    asyncio.run(call_primary(settings.ROUTER_MIN_SAMPLES - 1))
+    # Too few samples to judge
+    assert router.select(HARD, 20) == ModelRouter.PRIMARY
+    
+    asyncio.run(call_primary(1))
+    assert router.stats()[ModelRouter.PRIMARY]["p95_latency"] >= 0.3
+    assert router.select(HARD, 20) == ModelRouter.FAST
+
+def test_failing_primary_falls_back_and_is_then_avoided(monkeypatch):
+    primary = _FailingBackend("big-model")
+    generator = _generator(monkeypatch, ModelRouter(_tiers(primary=primary)))
+    
+    async def run():
+        return [
+            await generator.generate_mcqs_from_domain(f"Failing topic {i}", 10, HARD)
+            for i in range(settings.ROUTER_MIN_SAMPLES + 3)
+        ]
+    
+    results = asyncio.run(run())
+    
+    # Every request was answered, each by the fast tier after the primary failed
+    assert all(len(mcqs) == 10 for mcqs in results)
+    assert {mcq.model for mcqs in results for mcq in mcqs} == {"small-model"}
+    # Once its error rate crossed the threshold the primary was no longer tried
+    assert primary.calls == settings.ROUTER_MIN_SAMPLES
+    stats = generator.router.stats()
+    assert stats[ModelRouter.PRIMARY]["error_rate"] == 1.0
+    assert stats[ModelRouter.FAST]["calls"] == settings.ROUTER_MIN_SAMPLES + 3
+
+def test_stream_falls_back_only_before_first_delta():
+    async def consume(router: ModelRouter):
+        return [pair async for pair in router.stream(ModelRouter.PRIMARY, MESSAGES, 100)]
+    
+    before = ModelRouter(_tiers(primary=_FailingBackend("big-model", latency=0.05, fail_after=0)))
+    pairs = asyncio.run(consume(before))
+    assert pairs and {model for _, model in pairs} == {"small-model"}
+    
+    during = ModelRouter(_tiers(primary=_FailingBackend("big-model", latency=0.05, fail_after=1)))
+    with pytest.raises(RuntimeError):
+        asyncio.run(consume(during))
+    assert during.stats()[ModelRouter.FAST]["calls"] == 0
+
+def test_load_easy_requests_get_the_fast_tier(monkeypatch):
+    generator = _generator(monkeypatch, ModelRouter(_tiers(primary_latency=0.3, fast_latency=0.05)))
+    
+    async def timed(difficulty: DifficultyLevel, i: int):
+        started = time.monotonic()
+        mcqs = await generator.generate_mcqs_from_domain(f"{difficulty.value} topic {i}", 10, difficulty)
+        return difficulty, time.monotonic() - started, mcqs
+    
+    async def run():
+        return await asyncio.gather(*(timed(difficulty, i) for i in range(10) for difficulty in (EASY, HARD)))
+    
+    results = asyncio.run(run())
+    
+    models = {
+        difficulty: {mcq.model for level, _, mcqs in results if level == difficulty for mcq in mcqs}
+        for difficulty in (EASY, HARD)
+    }
+    assert models == {EASY: {"small-model"}, HARD: {"big-model"}}
+    assert all(len(mcqs) == 10 for _, _, mcqs in results)
+    
+    latency = {
+        difficulty: statistics.mean(elapsed for level, elapsed, _ in results if level == difficulty)
+        for difficulty in (EASY, HARD)
+    }
+    assert latency[EASY] < latency[HARD] / 2
+
+def test_load_overload_spills_to_fast_tier(monkeypatch):
+    monkeypatch.setattr(settings, "ROUTER_MAX_IN_FLIGHT", 3)
+    generator = _generator(monkeypatch, ModelRouter(_tiers(primary_latency=0.5, fast_latency=0.05)))
+    
+    async def run():
+        async def arrive(i: int):
+            # Requests arrive one after another while the first ones are still running
+            await asyncio.sleep(i * 0.02)
+            return await generator.generate_mcqs_from_domain(f"Busy topic {i}", 10, HARD)
+        
+        return await asyncio.gather(*(arrive(i) for i in range(8)))
+    
+    results = asyncio.run(run())
+    
+    assert [{mcq.model for mcq in mcqs} for mcqs in results] == [{"big-model"}] * 3 + [{"small-model"}] * 5
+    assert all(len(mcqs) == 10 for mcqs in results)
+    assert generator.router.stats()[ModelRouter.PRIMARY]["in_flight"] == 0
+
+def test_model_stats_endpoint(monkeypatch):
+    monkeypatch.setattr(routes.mcq_generator, "router", ModelRouter(_tiers(primary_latency=0, fast_latency=0)))
+    
+    async def run():
+        await routes.mcq_generator.router.complete(ModelRouter.FAST, MESSAGES, 100)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=routes.app), base_url="http://test") as client:
+            return (await client.get("/model-stats")).json()
+    
+    stats = asyncio.run(run())
+    
+    assert stats[ModelRouter.PRIMARY] == {"model": "big-model", "in_flight": 0, "calls": 0, "error_rate": 0.0, "p95_latency": 0.0}
+    assert stats[ModelRouter.FAST]["model"] == "small-model"
+    assert stats[ModelRouter.FAST]["calls"] == 1
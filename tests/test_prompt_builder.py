@@ -0,0 +1,70 @@
+import sys
+import types
+import pytest
+from config.settings import settings
+from core.prompt_builder import PromptBuilder
+
+class _FastTokenizer:
+    is_fast = True
+    
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        # One token per character
+        return {"offset_mapping": [(i, i + 1) for i in range(len(text))]}
+
+@pytest.fixture
+def transformers(monkeypatch):
+    """Stand-in transformers module that records how tokenizers are requested
+    
+    Without local_files_only it behaves like a machine without a cached
+    copy or network access and raises.
+    """
+    calls = []
+    
+    class AutoTokenizer:
+        @staticmethod
+        def from_pretrained(model, local_files_only=False):
+            calls.append((model, local_files_only))
+            if not local_files_only:
+                raise OSError(f"could not reach huggingface.co for {model}")
+            return _FastTokenizer()
+    
+    monkeypatch.setitem(sys.modules, "transformers", types.SimpleNamespace(AutoTokenizer=AutoTokenizer))
+    monkeypatch.setattr(settings, "LLM_BACKEND", "hf_router")
+    monkeypatch.setattr(settings, "HF_HUB_OFFLINE", False)
+    return calls
+
+def test_off_never_loads_a_tokenizer(monkeypatch, transformers):
+    monkeypatch.setattr(settings, "PROMPT_TOKENIZER", "off")
+    builder = PromptBuilder("big-model")
+    
+    assert builder.load_tokenizer() is None
+    assert transformers == []
+    assert builder.count_tokens("Two words.") == 3
+
+def test_mock_backend_skips_the_download(monkeypatch, transformers):
+    monkeypatch.setattr(settings, "PROMPT_TOKENIZER", "auto")
+    monkeypatch.setattr(settings, "LLM_BACKEND", "mock")
+    
+    assert PromptBuilder("big-model").load_tokenizer() is None
+    assert transformers == []
+
+@pytest.mark.parametrize("mode, offline", [("local", False), ("auto", True)])
+def test_local_and_offline_only_use_cached_copies(monkeypatch, transformers, mode, offline):
+    monkeypatch.setattr(settings, "PROMPT_TOKENIZER", mode)
+    monkeypatch.setattr(settings, "HF_HUB_OFFLINE", offline)
+    builder = PromptBuilder("big-model")
+    
+    assert builder.load_tokenizer() is not None
+    assert transformers == [("big-model", True)]
+    assert builder.count_tokens("Two words.") == len("Two words.")
+
+def test_unavailable_tokenizer_falls_back_to_approximation(monkeypatch, transformers):
+    monkeypatch.setattr(settings, "PROMPT_TOKENIZER", "auto")
+    builder = PromptBuilder("big-model")
+    
+    assert builder.load_tokenizer() is None
+    assert transformers == [("big-model", False)]
+    assert builder.count_tokens("Two words.") == 3
+    # The failure is remembered instead of retried on every prompt
+    builder.load_tokenizer()
+    assert len(transformers) == 1
@@ -0,0 +1,26 @@
+import asyncio
+from api import routes
+from config.settings import settings
+from core.generation_cache import GenerationCache
+from models.mcq_models import MCQRequest
+
+def test_domain_lookup_survives_embedding_failure(monkeypatch):
+    async def unavailable(texts):
+        raise RuntimeError("embedding service unavailable")
+    
+    monkeypatch.setattr(settings, "GENERATION_CACHE_SEMANTIC", True)
+    monkeypatch.setattr(routes, "generation_cache", GenerationCache(max_items=10, ttl_seconds=60, similarity_threshold=0.9))
+    monkeypatch.setattr(routes.vector_store, "_fetch_embeddings", unavailable)
+    request = MCQRequest(domain="Unembeddable topology", count=3, difficulty="easy", source="main_brain")
+    
+    async def run():
+        missed = await routes._lookup_domain_mcqs(request)
+        mcqs = await routes.mcq_generator.generate_mcqs_from_domain(request.domain, request.count, request.difficulty)
+        await routes._remember_domain_mcqs(request, mcqs, missed[1])
+        return missed, mcqs, await routes._lookup_domain_mcqs(request)
+    
+    missed, mcqs, hit = asyncio.run(run())
+    
+    assert missed == (None, None)
+    # The exact-match cache still serves the repeat request
+    assert hit == (mcqs, None)
@@ -0,0 +1,202 @@
+import asyncio
+import contextlib
+import hashlib
+import time
+import httpx
+import pytest
+from api import routes
+
+# Latencies of the stubbed backends; a request that queued behind another
+# would take at least their sum
+LLM_LATENCY = 0.5
+HTTP_LATENCY = 0.2
+BLOCKING_LATENCY = 0.2
+CONCURRENT_REQUESTS = 4
+
+class _InFlight:
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+    
+    @contextlib.contextmanager
+    def track(self):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+        try:
+            yield
+        finally:
+            self.current -= 1
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """Stub every backend the domain pipeline touches and count concurrent LLM calls
+    
+    Async backends (LLM, SerpAPI, Wikipedia, embeddings) sleep on the event
+    loop. Blocking SDKs (vector store query, Drive, SendGrid) sleep in their
+    thread, so any of them run on the loop would stall it.
+    """
+    in_flight = _InFlight()
+    
+    for backend in routes.mcq_generator.router.tiers.values():
+        complete = backend._complete
+        
+        async def tracked(messages, max_tokens, complete=complete):
+            with in_flight.track():
+                return await complete(messages, max_tokens)
+        
+        monkeypatch.setattr(backend, "latency", LLM_LATENCY)
+        monkeypatch.setattr(backend, "_complete", tracked)
+    
+    async def search_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(HTTP_LATENCY)
+        query = request.url.params.get("q") or request.url.params.get("gsrsearch")
+        if request.url.host == "serpapi.com":
+            return httpx.Response(200, json={"organic_results": [
+                {"title": query, "snippet": f"{query} is a field of study with many subtopics."}
+            ]})
+        return httpx.Response(200, json={"query": {"pages": [
+            {"index": 1, "extract": f"{query} has a long history. It is taught at many universities."}
+        ]}})
+    
+    async def fetch_embeddings(texts):
+        return [[byte / 255 for byte in hashlib.sha256(text.encode("utf-8")).digest()] for text in texts]
+    
+    def query(embedding, top_k):
+        time.sleep(BLOCKING_LATENCY)
+        return []
+    
+    def upload_bytes(data, file_name, mime_type="application/pdf", idempotency_key=None):
+        time.sleep(BLOCKING_LATENCY)
+        return f"drive-{idempotency_key[:12]}"
+    
+    def send_mcq_pdf_bytes(recipient_email, data, recipient_name=None, subject=None):
+        time.sleep(BLOCKING_LATENCY)
+        return True
+    
+    monkeypatch.setattr(routes.external_apis, "client", httpx.AsyncClient(transport=httpx.MockTransport(search_handler)))
+    monkeypatch.setattr(routes.vector_store, "_fetch_embeddings", fetch_embeddings)
+    monkeypatch.setattr(routes.vector_store.backend, "query", query)
+    monkeypatch.setattr(routes.drive_uploader, "upload_bytes", upload_bytes)
+    monkeypatch.setattr(routes.email_sender, "send_mcq_pdf_bytes", send_mcq_pdf_bytes)
+    return in_flight
+
+@contextlib.asynccontextmanager
+async def running_app():
+    """Run the app's startup without its shutdown, which would close the shared thread pool"""
+    await routes.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=routes.app), base_url="http://test") as client:
+            yield client
+    finally:
+        await routes.job_queue.stop()
+        await routes.delivery_queue.stop()
+
+async def _run_job(client: httpx.AsyncClient, domain: str) -> dict:
+    response = await client.post("/generate-domain-mcq", json={
+        "domain": domain,
+        "count": 5,
+        "difficulty": "easy",
+        "source": "all_sources",
+        "email": "student@example.com",
+        "force_refresh": True
+    })
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+    
+    while True:
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(0.02)
+
+async def _watch_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Longest delay past a short sleep, i.e. how long the loop was stalled"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.monotonic() - started - interval)
+    return worst
+
+def test_concurrent_requests_overlap(llm_calls):
+    async def scenario():
+        async with running_app() as client:
+            started = time.monotonic()
+            job = await _run_job(client, "Warm-up topology")
+            single = time.monotonic() - started
+            assert job["status"] == "completed", job["error"]
+            
+            llm_calls.peak = 0
+            started = time.monotonic()
+            jobs = await asyncio.gather(*(
+                _run_job(client, f"Concurrent topology {i}") for i in range(CONCURRENT_REQUESTS)
+            ))
+            together = time.monotonic() - started
+        return single, together, jobs
+    
+    single, together, jobs = asyncio.run(scenario())
+    
+    assert [job["status"] for job in jobs] == ["completed"] * CONCURRENT_REQUESTS
+    assert all(job["result"]["mcq_count"] == 5 for job in jobs)
+    # Every request was waiting on the model at the same time
+    assert llm_calls.peak == CONCURRENT_REQUESTS
+    # Queued one after another they would take CONCURRENT_REQUESTS times as long
+    assert together < single * 2, f"{CONCURRENT_REQUESTS} requests took {together:.2f}s, one took {single:.2f}s"
+
+def test_blocking_backends_do_not_stall_event_loop(llm_calls):
+    async def scenario():
+        async with running_app() as client:
+            stop = asyncio.Event()
+            watcher = asyncio.create_task(_watch_loop_lag(stop))
+            jobs = await asyncio.gather(*(
+                _run_job(client, f"Responsive topology {i}") for i in range(CONCURRENT_REQUESTS)
+            ))
+            
+            # Let the queued Drive uploads and emails run on the blocking stubs as well
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                deliveries = [
+                    delivery
+                    for job in jobs
+                    for delivery in (await client.get(job["result"]["delivery_url"])).json()["deliveries"]
+                ]
+                if all(delivery["status"] == "delivered" for delivery in deliveries):
+                    break
+                await asyncio.sleep(0.05)
+            
+            stop.set()
+            return jobs, deliveries, await watcher
+    
+    jobs, deliveries, worst_lag = asyncio.run(scenario())
+    
+    assert [job["status"] for job in jobs] == ["completed"] * CONCURRENT_REQUESTS
+    assert len(deliveries) == 2 * CONCURRENT_REQUESTS
+    assert all(delivery["status"] == "delivered" for delivery in deliveries)
+    # Any blocking stub run on the loop would stall it for BLOCKING_LATENCY
+    assert worst_lag < BLOCKING_LATENCY / 2, f"event loop stalled for {worst_lag:.3f}s"
+
+def test_cache_stats_do_not_stall_event_loop(monkeypatch):
+    def slow(stats):
+        def wrapper():
+            time.sleep(BLOCKING_LATENCY)
+            return stats()
+        return wrapper
+    
+    monkeypatch.setattr(routes.vector_store.embedding_cache, "stats", slow(routes.vector_store.embedding_cache.stats))
+    monkeypatch.setattr(routes.extraction_cache, "stats", slow(routes.extraction_cache.stats))
+    
+    async def scenario():
+        stop = asyncio.Event()
+        watcher = asyncio.create_task(_watch_loop_lag(stop))
+        # Let the watcher start before a stall could happen
+        await asyncio.sleep(0.02)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=routes.app), base_url="http://test") as client:
+            response = await client.get("/cache-stats")
+        stop.set()
+        return response, await watcher
+    
+    response, worst_lag = asyncio.run(scenario())
+    
+    assert response.status_code == 200
+    assert {"embedding_cache", "extraction_cache"} <= set(response.json())
+    assert worst_lag < BLOCKING_LATENCY / 2, f"event loop stalled for {worst_lag:.3f}s"
@@ -0,0 +1,20 @@
+import pytest
+from utils.text_normalizer import clean_text, clean_text_for_pdf
+
+@pytest.mark.parametrize("text, compact, spaced", [
+    ("", "", ""),
+    ("Plain  ASCII stays", "Plain  ASCII stays", "Plain ASCII stays"),
+    ("“Quoted” — it’s…", '"Quoted" - it\'s...', '"Quoted" - it\'s...'),
+    ("x ≤ 3 × y ± 1", "x <= 3 x y +/- 1", "x <= 3 x y +/- 1"),
+    ("•item ∑ ∞", "*item Sum infinity", "* item Sum infinity"),
+    ("naïve 日本 ≠", "na?ve ?? !=", "na ve !="),
+    ("Itâ€™s â€œmojibakeâ€\u009d", 'It\'s "mojibake"', 'It\'s "mojibake"')
+])
+def test_normalizes_to_ascii(text, compact, spaced):
+    assert clean_text(text) == compact
+    assert clean_text_for_pdf(text) == spaced
+
+def test_dense_symbols_match_a_character_by_character_pass():
+    text = "≤×—“”…•日" * 1000
+    expected = "".join(clean_text(char) for char in text)
+    assert clean_text(text) == expected
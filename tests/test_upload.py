@@ -0,0 +1,136 @@
+import asyncio
+import contextlib
+import hashlib
+import os
+import httpx
+import pytest
+from api import routes
+from config.settings import settings
+from utils import upload_stream
+
+BOUNDARY = "test-boundary"
+DOCUMENT = "\n\n".join(
+    f"Section {i}. Graph theory studies vertices and edges. A tree is a connected graph without cycles."
+    for i in range(40)
+).encode("utf-8")
+
+def _multipart(content: bytes, filename: str = "notes.txt", **fields) -> bytes:
+    parts = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: text/plain\r\n\r\n".encode() + content + b"\r\n"
+    )
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+HEADERS = {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+@pytest.fixture
+def uploads(monkeypatch):
+    """Stub the embedding model and Drive, and return the files left in the upload directory"""
+    async def fetch_embeddings(texts):
+        return [[byte / 255 for byte in hashlib.sha256(text.encode("utf-8")).digest()] for text in texts]
+    
+    monkeypatch.setattr(routes.vector_store, "_fetch_embeddings", fetch_embeddings)
+    monkeypatch.setattr(routes.drive_uploader, "upload_bytes", lambda data, name, **kwargs: "file-id")
+    return lambda: sorted(os.listdir(settings.UPLOAD_DIR))
+
+@contextlib.asynccontextmanager
+async def running_app():
+    await routes.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=routes.app), base_url="http://test") as client:
+            yield client
+    finally:
+        await routes.job_queue.stop()
+        await routes.delivery_queue.stop()
+
+async def _wait_for_job(client: httpx.AsyncClient, job_id: str) -> dict:
+    while True:
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(0.02)
+
+def test_oversize_upload_is_rejected_and_removed(monkeypatch, uploads):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", len(DOCUMENT) // 2)
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 1024)
+    body = _multipart(DOCUMENT)
+    created = []
+    named_temporary_file = upload_stream.tempfile.NamedTemporaryFile
+    
+    def tracked(*args, **kwargs):
+        target = named_temporary_file(*args, **kwargs)
+        created.append(target.name)
+        return target
+    
+    monkeypatch.setattr(upload_stream.tempfile, "NamedTemporaryFile", tracked)
+    
+    async def chunked():
+        # No Content-Length, so the limit is only hit part way through the body
+        for start in range(0, len(body), 1000):
+            yield body[start:start + 1000]
+    
+    async def run():
+        before = uploads()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=routes.app), base_url="http://test") as client:
+            streamed = await client.post("/upload-document-mcq", content=chunked(), headers=HEADERS)
+            # Declared past the limit plus the multipart allowance, so refused before reading
+            declared = await client.post("/upload-document-mcq", content=_multipart(DOCUMENT * 40), headers=HEADERS)
+        return before, streamed, declared
+    
+    before, streamed, declared = asyncio.run(run())
+    
+    assert streamed.status_code == 413
+    assert declared.status_code == 413
+    # Only the streamed upload got as far as writing to disk before it was cut off
+    assert len(created) == 1
+    assert not os.path.exists(created[0])
+    assert uploads() == before
+
+def test_non_multipart_body_is_rejected(uploads):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=routes.app), base_url="http://test") as client:
+            return (
+                await client.post("/upload-document-mcq", json={"count": 5}),
+                await client.post("/upload-document-mcq", content=b"--x\r\nbroken", headers=HEADERS)
+            )
+    
+    before = uploads()
+    not_multipart, malformed = asyncio.run(run())
+    
+    assert not_multipart.status_code == 400
+    assert malformed.status_code == 400
+    assert uploads() == before
+
+def test_repeat_upload_reuses_cached_extraction(monkeypatch, uploads):
+    extractions = []
+    extract_and_chunk = routes.document_processor.extract_and_chunk
+    
+    def counted(file_path):
+        extractions.append(file_path)
+        return extract_and_chunk(file_path)
+    
+    monkeypatch.setattr(routes.document_processor, "extract_and_chunk", counted)
+    body = _multipart(DOCUMENT, count="3", difficulty="easy", force_refresh="true")
+    
+    async def run():
+        async with running_app() as client:
+            jobs = []
+            for _ in range(2):
+                response = await client.post("/upload-document-mcq", content=body, headers=HEADERS)
+                assert response.status_code == 200, response.text
+                jobs.append(await _wait_for_job(client, response.json()["job_id"]))
+            return jobs
+    
+    before = uploads()
+    jobs = asyncio.run(run())
+    
+    assert [job["status"] for job in jobs] == ["completed"] * 2, [job["error"] for job in jobs]
+    assert [job["result"]["mcq_count"] for job in jobs] == [3, 3]
+    # Only the first upload was extracted; the second was found by its hash
+    assert len(extractions) == 1
+    assert routes.extraction_cache.get(hashlib.sha256(DOCUMENT).hexdigest()) is not None
+    assert uploads() == before
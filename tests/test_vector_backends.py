@@ -0,0 +1,115 @@
+import os
+import threading
+import numpy as np
+import pytest
+from core.vector_backends import LocalVectorBackend
+
+DIM = 16
+
+def _vectors(rng: np.random.Generator, start: int, count: int, tag: str = "v1") -> list:
+    return [
+        {"id": f"doc-{i}", "values": rng.standard_normal(DIM), "metadata": {"n": i, "tag": tag}}
+        for i in range(start, start + count)
+    ]
+
+def _search(backend: LocalVectorBackend, queries: np.ndarray) -> list:
+    return [[(match["id"], match["metadata"]) for match in backend.query(query, 5)] for query in queries]
+
+@pytest.mark.parametrize("ivf_threshold", [10**6, 150])
+def test_reload_after_several_flushes(tmp_path, ivf_threshold):
+    rng = np.random.default_rng(0)
+    backend = LocalVectorBackend(str(tmp_path), ivf_threshold=ivf_threshold, nprobe=4)
+    
+    for start in range(0, 300, 100):
+        backend.upsert(_vectors(rng, start, 100))
+        backend.flush()
+    # Overwrite some stored vectors, some of them twice, and add a few more
+    backend.upsert(_vectors(rng, 50, 20, tag="v2") + _vectors(rng, 300, 5))
+    backend.flush()
+    backend.upsert(_vectors(rng, 55, 2, tag="v3"))
+    backend.flush()
+    
+    queries = rng.standard_normal((20, DIM))
+    reloaded = LocalVectorBackend(str(tmp_path), ivf_threshold=ivf_threshold, nprobe=4)
+    
+    assert reloaded._size == 305
+    assert reloaded._ids == backend._ids
+    assert reloaded._metadata[55] == {"n": 55, "tag": "v3"}
+    assert reloaded._metadata[60] == {"n": 60, "tag": "v2"}
+    assert np.array_equal(reloaded._vectors[:305], backend._vectors[:305])
+    assert (reloaded._centroids is None) == (ivf_threshold > 305)
+    assert _search(reloaded, queries) == _search(backend, queries)
+
+def test_flush_appends_only_new_rows(tmp_path):
+    rng = np.random.default_rng(1)
+    backend = LocalVectorBackend(str(tmp_path))
+    vectors_path = os.path.join(tmp_path, "vectors.f32")
+    records_path = os.path.join(tmp_path, "records.jsonl")
+    
+    backend.upsert(_vectors(rng, 0, 100))
+    backend.flush()
+    with open(records_path, "rb") as f:
+        first_records = f.read()
+    
+    backend.upsert(_vectors(rng, 100, 10))
+    backend.flush()
+    backend.flush()
+    
+    assert os.path.getsize(vectors_path) == 110 * DIM * 4
+    with open(records_path, "rb") as f:
+        records = f.read()
+    assert records.startswith(first_records)
+    assert records.count(b"\n") == 110
+
+def test_failed_flush_is_repeated(tmp_path, monkeypatch):
+    rng = np.random.default_rng(2)
+    backend = LocalVectorBackend(str(tmp_path))
+    backend.upsert(_vectors(rng, 0, 50))
+    backend.flush()
+    backend.upsert(_vectors(rng, 50, 50) + _vectors(rng, 0, 5, tag="v2"))
+    
+    write_rows = backend._write_rows
+    
+    def fail_after_vectors(name, *args):
+        write_rows(name, *args)
+        raise OSError("disk full")
+    
+    monkeypatch.setattr(backend, "_write_rows", fail_after_vectors)
+    with pytest.raises(OSError):
+        backend.flush()
+    monkeypatch.setattr(backend, "_write_rows", write_rows)
+    backend.flush()
+    
+    reloaded = LocalVectorBackend(str(tmp_path))
+    assert reloaded._ids == backend._ids
+    assert reloaded._metadata == backend._metadata
+    assert np.array_equal(reloaded._vectors[:100], backend._vectors[:100])
+
+def test_queries_are_not_blocked_by_a_flush(tmp_path, monkeypatch):
+    rng = np.random.default_rng(3)
+    backend = LocalVectorBackend(str(tmp_path))
+    backend.upsert(_vectors(rng, 0, 100))
+    
+    writing, release = threading.Event(), threading.Event()
+    write_rows = backend._write_rows
+    
+    def slow_write_rows(*args):
+        writing.set()
+        assert release.wait(5)
+        write_rows(*args)
+    
+    monkeypatch.setattr(backend, "_write_rows", slow_write_rows)
+    flush = threading.Thread(target=backend.flush)
+    flush.start()
+    try:
+        assert writing.wait(5)
+        # Both return while the flush is still writing
+        assert len(backend.query(rng.standard_normal(DIM), 5)) == 5
+        backend.upsert(_vectors(rng, 100, 1))
+    finally:
+        release.set()
+        flush.join()
+    
+    # The row added during the flush is written by the next one
+    backend.flush()
+    assert LocalVectorBackend(str(tmp_path))._size == 101
@@ -0,0 +1,51 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from config.settings import settings
+
+# Shared, bounded pool for SDK calls that have no async client (Pinecone,
+# Google Drive, SendGrid, ReportLab, document parsers)
+_executor = ThreadPoolExecutor(
+    max_workers=settings.BLOCKING_POOL_SIZE,
+    thread_name_prefix="mcq-blocking"
+)
+
+# CPU-bound work (PDF parsing, rendering) runs in processes, created on first use
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+# Workers start from a clean single-threaded server instead of being forked from
+# this multithreaded process, where inherited locks (logging, parsers) can deadlock
+_PROCESS_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+# Modules whose functions run in the pool; preloading them replaces the default
+# of importing __main__, which would build the whole app in the fork server
+_PROCESS_PRELOAD = ["core.document_processor", "core.bulk_export"]
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool, creating it on first use"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            context = multiprocessing.get_context(_PROCESS_START_METHOD)
+            if _PROCESS_START_METHOD == "forkserver":
+                context.set_forkserver_preload(_PROCESS_PRELOAD)
+            _process_pool = ProcessPoolExecutor(max_workers=settings.PROCESS_POOL_SIZE, mp_context=context)
+        return _process_pool
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking callable in the shared thread pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+async def run_in_process(func, *args):
+    """Run a picklable, CPU-bound callable in the shared process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), functools.partial(func, *args))
+
+def shutdown_executor():
+    """Stop accepting new blocking work and wait for running calls to finish"""
+    _executor.shutdown(wait=True)
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True)
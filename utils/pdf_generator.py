@@ -3,101 +3,100 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from typing import List
+from reportlab.pdfgen import canvas
+from typing import BinaryIO, List, Union
+from config.settings import settings
 from models.mcq_models import MCQ
-import os
+from utils.text_normalizer import clean_text_for_pdf
+import io
+
+# Styles are built once; creating ParagraphStyles per question dominated small renders
+_STYLES = getSampleStyleSheet()
+
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=18,
+    spaceAfter=30,
+    alignment=1,
+    fontName='Helvetica-Bold'
+)
+
+_QUESTION_STYLE = ParagraphStyle(
+    'Question',
+    parent=_STYLES['Normal'],
+    fontSize=12,
+    fontName='Helvetica-Bold',
+    spaceAfter=10,
+    leftIndent=0
+)
+
+_OPTION_STYLE = ParagraphStyle(
+    'Option',
+    parent=_STYLES['Normal'],
+    fontSize=11,
+    fontName='Helvetica',
+    leftIndent=20,
+    spaceAfter=3
+)
+
+_CORRECT_OPTION_STYLE = ParagraphStyle(
+    'CorrectOption',
+    parent=_OPTION_STYLE,
+    fontName='Helvetica-Bold'
+)
+
+_EXPLANATION_STYLE = ParagraphStyle(
+    'Explanation',
+    parent=_STYLES['Normal'],
+    fontSize=10,
+    fontName='Helvetica',
+    leftIndent=20,
+    spaceAfter=15,
+    textColor='#444444'
+)
+
+_MARGIN = inch
 
 class PDFGenerator:
     
     @staticmethod
     def _clean_text_for_pdf(text: str) -> str:
         """Clean text specifically for PDF generation"""
-        if not text:
-            return ""
-        
-        # Dictionary of character replacements for PDF
-        replacements = {
-            # Em-dash and en-dash
-            '—': '-',
-            '–': '-',
-            '―': '-',
-            
-            # Quotes
-            '"': '"',
-            '"': '"',
-            ''': "'",
-            ''': "'",
-            
-            # Bullets and special symbols
-            '•': '* ',
-            '◦': '- ',
-            '▪': '* ',
-            '▫': '- ',
-            '■': '* ',
-            '□': '- ',
-            
-            # Mathematical symbols
-            '×': ' x ',
-            '÷': ' / ',
-            '±': ' +/- ',
-            '∑': 'Sum',
-            '∏': 'Product',
-            '∞': 'infinity',
-            '≈': ' ~= ',
-            '≤': ' <= ',
-            '≥': ' >= ',
-            '≠': ' != ',
-            
-            # Other problematic characters
-            '…': '...',
-            '™': '(TM)',
-            '©': '(C)',
-            '®': '(R)',
-            
-            # Common encoding issues
-            'â€™': "'",
-            'â€œ': '"',
-            'â€': '"',
-            'â€"': '-',
-            'â€"': '--',
-        }
-        
-        # Apply replacements
-        cleaned_text = text
-        for old_char, new_char in replacements.items():
-            cleaned_text = cleaned_text.replace(old_char, new_char)
-        
-        # Handle any remaining problematic characters
-        # Replace with closest ASCII equivalent or remove
-        cleaned_text = ''.join(char if ord(char) < 128 else ' ' for char in cleaned_text)
-        
-        # Clean up multiple spaces
-        cleaned_text = ' '.join(cleaned_text.split())
-        
-        return cleaned_text
+        return clean_text_for_pdf(text)
     
     @staticmethod
-    def generate_mcq_pdf(mcqs: List[MCQ], filename: str, title: str = "MCQ Assessment") -> str:
+    def generate_mcq_pdf(mcqs: List[MCQ], filename: str, title: str = "MCQ Assessment", show_answers: bool = True) -> str:
         """Generate PDF from MCQs with proper character encoding"""
+        PDFGenerator._render(mcqs, filename, title, show_answers)
+        return filename
+    
+    @staticmethod
+    def render_mcq_pdf(mcqs: List[MCQ], title: str = "MCQ Assessment", show_answers: bool = True) -> bytes:
+        """Render the MCQ PDF in memory without touching the filesystem"""
+        buffer = io.BytesIO()
+        PDFGenerator._render(mcqs, buffer, title, show_answers)
+        return buffer.getvalue()
+    
+    @staticmethod
+    def _render(mcqs: List[MCQ], output: Union[str, BinaryIO], title: str, show_answers: bool):
+        if settings.PDF_RENDER_MODE == "canvas":
+            PDFGenerator._draw_mcq_pdf(mcqs, output, title, show_answers)
+        else:
+            PDFGenerator._build_mcq_pdf(mcqs, output, title, show_answers)
+    
+    @staticmethod
+    def _build_mcq_pdf(mcqs: List[MCQ], output: Union[str, BinaryIO], title: str, show_answers: bool = True):
+        """Lay out the MCQs with Platypus flowables"""
         
-        doc = SimpleDocTemplate(filename, pagesize=letter)
-        styles = getSampleStyleSheet()
+        doc = SimpleDocTemplate(output, pagesize=letter)
         story = []
         
         # Clean the title
         clean_title = PDFGenerator._clean_text_for_pdf(title)
         
         # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=1,
-            fontName='Helvetica-Bold'
-        )
-        story.append(Paragraph(clean_title, title_style))
+        story.append(Paragraph(clean_title, _TITLE_STYLE))
         story.append(Spacer(1, 20))
         
         # MCQs
@@ -106,74 +105,131 @@ class PDFGenerator:
             clean_question = PDFGenerator._clean_text_for_pdf(mcq.question)
             
             # Question
-            question_style = ParagraphStyle(
-                'Question',
-                parent=styles['Normal'],
-                fontSize=12,
-                fontName='Helvetica-Bold',
-                spaceAfter=10,
-                leftIndent=0
-            )
-            story.append(Paragraph(f"Q{i}. {clean_question}", question_style))
+            story.append(Paragraph(f"Q{i}. {clean_question}", _QUESTION_STYLE))
             
             # Options
-            option_style = ParagraphStyle(
-                'Option',
-                parent=styles['Normal'],
-                fontSize=11,
-                fontName='Helvetica',
-                leftIndent=20,
-                spaceAfter=3
-            )
-            
             for j, option in enumerate(mcq.options):
                 clean_option_text = PDFGenerator._clean_text_for_pdf(option.text)
                 option_text = f"{'ABCD'[j]}. {clean_option_text}"
                 
-                if option.is_correct:
-                    # Use a simple checkmark or indicator for correct answer
+                if option.is_correct and show_answers:
+                    # Use a simple checkmark or indicator for correct answer, in bold
                     option_text += " [CORRECT]"
-                    # Make correct option bold
-                    correct_style = ParagraphStyle(
-                        'CorrectOption',
-                        parent=option_style,
-                        fontName='Helvetica-Bold'
-                    )
-                    story.append(Paragraph(option_text, correct_style))
+                    story.append(Paragraph(option_text, _CORRECT_OPTION_STYLE))
                 else:
-                    story.append(Paragraph(option_text, option_style))
+                    story.append(Paragraph(option_text, _OPTION_STYLE))
             
             # Explanation
-            clean_explanation = PDFGenerator._clean_text_for_pdf(mcq.explanation)
-            story.append(Spacer(1, 8))
-            
-            explanation_style = ParagraphStyle(
-                'Explanation',
-                parent=styles['Normal'],
-                fontSize=10,
-                fontName='Helvetica',
-                leftIndent=20,
-                spaceAfter=15,
-                textColor='#444444'
-            )
-            
-            story.append(Paragraph(f"<b>Explanation:</b> {clean_explanation}", explanation_style))
+            if show_answers:
+                clean_explanation = PDFGenerator._clean_text_for_pdf(mcq.explanation)
+                story.append(Spacer(1, 8))
+                story.append(Paragraph(f"<b>Explanation:</b> {clean_explanation}", _EXPLANATION_STYLE))
             story.append(Spacer(1, 15))
         
         # Build the PDF
         try:
             doc.build(story)
-            return filename
         except Exception as e:
             # If there are still encoding issues, create a fallback version
             print(f"PDF generation error: {e}")
-            return PDFGenerator._generate_fallback_pdf(mcqs, filename, clean_title)
+            if isinstance(output, io.BytesIO):
+                output.seek(0)
+                output.truncate()
+            PDFGenerator._generate_fallback_pdf(mcqs, output, clean_title, show_answers)
+    
+    @staticmethod
+    def _draw_mcq_pdf(mcqs: List[MCQ], output: Union[str, BinaryIO], title: str, show_answers: bool = True):
+        """Draw the MCQs straight onto the canvas, skipping Platypus layout
+        
+        Text is wrapped greedily by measured width and matches the Platypus
+        styles; questions flow across pages the same way.
+        """
+        page_width, page_height = letter
+        width = page_width - 2 * _MARGIN
+        pdf = canvas.Canvas(output, pagesize=letter)
+        y = page_height - _MARGIN
+        
+        def draw_lines(lines, style, indent=0, label=""):
+            nonlocal y
+            leading = style.leading
+            for n, line in enumerate(lines):
+                if y - leading < _MARGIN:
+                    pdf.showPage()
+                    y = page_height - _MARGIN
+                y -= leading
+                x = _MARGIN + indent
+                if n == 0 and label:
+                    pdf.setFont('Helvetica-Bold', style.fontSize)
+                    pdf.drawString(x, y, label)
+                    x += pdfmetrics.stringWidth(label, 'Helvetica-Bold', style.fontSize)
+                pdf.setFont(style.fontName, style.fontSize)
+                pdf.setFillColor(style.textColor)
+                pdf.drawString(x, y, line)
+        
+        clean_title = PDFGenerator._clean_text_for_pdf(title)
+        for line in PDFGenerator._wrap(clean_title, _TITLE_STYLE, width):
+            y -= _TITLE_STYLE.leading
+            pdf.setFont(_TITLE_STYLE.fontName, _TITLE_STYLE.fontSize)
+            pdf.drawCentredString(page_width / 2, y, line)
+        y -= _TITLE_STYLE.spaceAfter + 20
+        
+        for i, mcq in enumerate(mcqs, 1):
+            question = f"Q{i}. {PDFGenerator._clean_text_for_pdf(mcq.question)}"
+            draw_lines(PDFGenerator._wrap(question, _QUESTION_STYLE, width), _QUESTION_STYLE)
+            y -= _QUESTION_STYLE.spaceAfter
+            
+            for j, option in enumerate(mcq.options):
+                option_text = f"{'ABCD'[j]}. {PDFGenerator._clean_text_for_pdf(option.text)}"
+                style = _OPTION_STYLE
+                if option.is_correct and show_answers:
+                    option_text += " [CORRECT]"
+                    style = _CORRECT_OPTION_STYLE
+                draw_lines(PDFGenerator._wrap(option_text, style, width - style.leftIndent), style, style.leftIndent)
+                y -= style.spaceAfter
+            
+            if not show_answers:
+                y -= 15
+                continue
+            
+            y -= 8
+            label = "Explanation: "
+            label_width = pdfmetrics.stringWidth(label, 'Helvetica-Bold', _EXPLANATION_STYLE.fontSize)
+            explanation_width = width - _EXPLANATION_STYLE.leftIndent
+            lines = PDFGenerator._wrap(
+                PDFGenerator._clean_text_for_pdf(mcq.explanation), _EXPLANATION_STYLE, explanation_width, label_width
+            )
+            draw_lines(lines, _EXPLANATION_STYLE, _EXPLANATION_STYLE.leftIndent, label)
+            y -= _EXPLANATION_STYLE.spaceAfter + 15
+        
+        pdf.save()
+    
+    @staticmethod
+    def _wrap(text: str, style: ParagraphStyle, width: float, first_line_offset: float = 0) -> List[str]:
+        """Greedily break text into lines that fit width in the style's font"""
+        space_width = pdfmetrics.stringWidth(" ", style.fontName, style.fontSize)
+        lines = []
+        current = []
+        current_width = 0.0
+        available = width - first_line_offset
+        
+        for word in text.split():
+            word_width = pdfmetrics.stringWidth(word, style.fontName, style.fontSize)
+            needed = word_width + (space_width if current else 0)
+            if current and current_width + needed > available:
+                lines.append(" ".join(current))
+                current, current_width, available = [word], word_width, width
+            else:
+                current.append(word)
+                current_width += needed
+        
+        lines.append(" ".join(current))
+        return lines
     
     @staticmethod
-    def _generate_fallback_pdf(mcqs: List[MCQ], filename: str, title: str) -> str:
+    def _generate_fallback_pdf(mcqs: List[MCQ], output: Union[str, BinaryIO], title: str, show_answers: bool = True):
         """Generate a fallback PDF with extra character cleaning"""
-        doc = SimpleDocTemplate(filename, pagesize=letter)
-        styles = getSampleStyleSheet()
+        doc = SimpleDocTemplate(output, pagesize=letter)
+        styles = _STYLES
         story = []
         
         # Simple title
@@ -188,12 +244,12 @@ class PDFGenerator:
             
             for j, option in enumerate(mcq.options):
                 option_text = ''.join(c if c.isalnum() or c in ' .,?!-()[]{}:;' else ' ' for c in option.text)
-                marker = " [CORRECT]" if option.is_correct else ""
+                marker = " [CORRECT]" if option.is_correct and show_answers else ""
                 story.append(Paragraph(f"{'ABCD'[j]}. {option_text}{marker}", styles['Normal']))
             
-            explanation = ''.join(c if c.isalnum() or c in ' .,?!-()[]{}:;' else ' ' for c in mcq.explanation)
-            story.append(Paragraph(f"Explanation: {explanation}", styles['Normal']))
+            if show_answers:
+                explanation = ''.join(c if c.isalnum() or c in ' .,?!-()[]{}:;' else ' ' for c in mcq.explanation)
+                story.append(Paragraph(f"Explanation: {explanation}", styles['Normal']))
             story.append(Spacer(1, 15))
         
         doc.build(story)
-        return filename
\ No newline at end of file
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+class AsyncTTLCache:
+    """LRU cache whose entries expire ttl_seconds after they are stored
+    
+    get_or_fetch runs concurrent misses for the same key only once, and
+    only caches truthy results so failed lookups are retried next time.
+    The fetch runs in its own task, so it finishes and fills the cache
+    even if the caller that started it is cancelled.
+    """
+    
+    def __init__(self, max_items: int = 1000, ttl_seconds: float = 3600):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+    
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.hits += 1
+        else:
+            # The cache owns the fetch, so a cancelled caller never cancels the other waiters
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(key, fetch))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._fetch_done(key, done))
+        
+        return await asyncio.shield(task)
+    
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetch()
+        if value:
+            self.set(key, value)
+        return value
+    
+    def _fetch_done(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Every waiter may have gone away; mark the exception retrieved so it does not warn
+        if not task.cancelled():
+            task.exception()
+    
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "items": len(self._entries)
+        }
@@ -0,0 +1,164 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from fastapi import Request
+import multipart
+from multipart.multipart import parse_options_header
+from utils.concurrency import run_blocking
+
+class UploadTooLarge(Exception):
+    """The request body grew past the upload limit"""
+
+@dataclass
+class StreamedUpload:
+    fields: Dict[str, str]
+    filename: Optional[str] = None
+    path: Optional[str] = None
+    sha256: Optional[str] = None
+    size: int = 0
+
+@dataclass
+class _Part:
+    name: str = ""
+    filename: Optional[str] = None
+    data: bytearray = field(default_factory=bytearray)
+
+class _UploadParser:
+    """multipart callbacks that keep form fields in memory and queue file bytes for writing"""
+    
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.file_started = False
+        self.pending: List[bytes] = []
+        self.pending_size = 0
+        self.file_size = 0
+        self._part = _Part()
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+    
+    def on_part_begin(self):
+        self._part = _Part()
+        self._disposition = b""
+    
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+    
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+    
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+    
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise ValueError('The Content-Disposition header field "name" must be provided')
+        self._part.name = options[b"name"].decode("utf-8", errors="replace")
+        if b"filename" in options:
+            if self.file_started:
+                raise ValueError("Only one file can be uploaded")
+            self.file_started = True
+            self._part.filename = options[b"filename"].decode("utf-8", errors="replace")
+            self.filename = self._part.filename
+    
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._part.filename is None:
+            self._part.data += data[start:end]
+        else:
+            self.pending.append(data[start:end])
+            self.pending_size += end - start
+            self.file_size += end - start
+    
+    def on_part_end(self):
+        if self._part.filename is None:
+            self.fields[self._part.name] = self._part.data.decode("utf-8", errors="replace")
+    
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished
+        }
+
+async def receive_upload(request: Request, directory: str, max_bytes: int,
+                         field_overhead: int, chunk_size: int) -> StreamedUpload:
+    """Parse a multipart/form-data body straight off the socket
+    
+    The file part is hashed and written to directory in chunk_size writes,
+    so the upload lands on disk once. A declared Content-Length over the
+    limit is rejected before any of the body is read, and an undeclared
+    one as soon as the bytes received cross it. Raises UploadTooLarge for
+    oversized bodies and ValueError for malformed ones.
+    """
+    body_limit = max_bytes + field_overhead
+    declared_size = request.headers.get("content-length", "")
+    if declared_size.isdigit() and int(declared_size) > body_limit:
+        raise UploadTooLarge()
+    
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise ValueError("Expected a multipart/form-data body")
+    
+    state = _UploadParser()
+    parser = multipart.MultipartParser(boundary, state.callbacks())
+    digest = hashlib.sha256()
+    target = None
+    received = 0
+    
+    async def drain():
+        data = b"".join(state.pending)
+        state.pending.clear()
+        state.pending_size = 0
+        digest.update(data)
+        await run_blocking(target.write, data)
+    
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise UploadTooLarge()
+            
+            parser.write(chunk)
+            if state.file_size > max_bytes:
+                raise UploadTooLarge()
+            
+            if state.file_started and target is None:
+                # Keep the file where it survives a restart until its job runs
+                target = tempfile.NamedTemporaryFile(
+                    delete=False,
+                    dir=directory,
+                    suffix=f".{state.filename.split('.')[-1]}"
+                )
+            if target is not None and state.pending_size >= chunk_size:
+                await drain()
+        
+        parser.finalize()
+        if target is None:
+            return StreamedUpload(fields=state.fields)
+        
+        await drain()
+        target.close()
+        return StreamedUpload(
+            fields=state.fields,
+            filename=state.filename,
+            path=target.name,
+            sha256=digest.hexdigest(),
+            size=state.file_size
+        )
+    except BaseException:
+        if target is not None:
+            target.close()
+            os.unlink(target.name)
+        raise